@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for MCP SSH against a local stand-in SSH server
+Usage: python scripts/benchmark.py engines [--calls N] [--concurrency C]
+       python scripts/benchmark.py algorithms [--handshakes N] [--size MB]
+       python scripts/benchmark.py keys [--handshakes N] [--concurrency C]
+
+The stand-in server is a small paramiko server on 127.0.0.1 that accepts
+any public key and runs exec requests with /bin/sh, so benchmarks need no
+real sshd and measure the client side under identical conditions.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import paramiko
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+# Add project root to path for imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+BENCH_HOST = "bench"
+
+
+class _StandInServer(paramiko.ServerInterface):
+    """Accepts any key and runs exec requests locally"""
+
+    def __init__(self):
+        self.pending = {}
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def get_allowed_auths(self, username):
+        return "publickey"
+
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_global_request(self, kind, msg):
+        return True  # Answer keepalives
+
+    def check_channel_exec_request(self, channel, command):
+        # Started once the request is acknowledged, see _handle_request
+        self.pending[channel.get_id()] = command.decode()
+        return True
+
+
+def _run_exec(channel, command):
+    """Run command with /bin/sh and stream its output over channel"""
+    proc = subprocess.Popen(
+        ["/bin/sh", "-c", command],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    def pump(stream, send):
+        for block in iter(lambda: stream.read1(32768), b""):
+            send(block)
+
+    err_thread = threading.Thread(
+        target=pump, args=(proc.stderr, channel.sendall_stderr), daemon=True
+    )
+    err_thread.start()
+    pump(proc.stdout, channel.sendall)
+    err_thread.join()
+    channel.send_exit_status(proc.wait())
+    channel.close()
+
+
+class LocalSSHServer:
+    """Stand-in SSH server listening on an ephemeral localhost port"""
+
+    def __init__(self, server_options=None):
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.server_options = server_options or {}
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(128)
+        self.port = self.sock.getsockname()[1]
+        self._transports = []
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.sock.close()
+        for transport in self._transports:
+            transport.close()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        transport = paramiko.Transport(conn, **self.server_options)
+        self._transports.append(transport)
+        transport.add_server_key(self.host_key)
+        transport.use_compression(True)  # Offered, used only if the client asks
+        server = _StandInServer()
+
+        # paramiko replies to an exec request only after the server callback
+        # returns, so output sent from the callback could beat the reply
+        def handle_request(channel, m):
+            paramiko.Channel._handle_request(channel, m)
+            command = server.pending.pop(channel.get_id(), None)
+            if command is not None:
+                threading.Thread(
+                    target=_run_exec, args=(channel, command), daemon=True
+                ).start()
+
+        transport._channel_handler_table = {
+            **transport._channel_handler_table,
+            paramiko.common.MSG_CHANNEL_REQUEST: handle_request,
+        }
+        try:
+            transport.start_server(server=server)
+        except Exception:
+            return
+        # Channels are weakly referenced by the transport, so hold on to
+        # them until their command has finished
+        channels = set()
+        while transport.is_active():
+            channel = transport.accept(1)
+            if channel is not None:
+                channels.add(channel)
+            channels = {c for c in channels if not c.closed}
+
+
+def setup_environment(server, key_type="rsa", hosts=None):
+    """Point HOME at a temp dir with an SSH config for the stand-in server
+
+    hosts maps each Host alias to extra config lines for it; by default a
+    single BENCH_HOST entry is written.
+    """
+    home = tempfile.mkdtemp(prefix="mcp_ssh_bench_")
+    ssh_dir = Path(home) / ".ssh"
+    ssh_dir.mkdir()
+    key_file = ssh_dir / f"id_{key_type}"
+    write_private_key(key_file, key_type)
+    entries = []
+    for alias, extra_config in (hosts or {BENCH_HOST: ""}).items():
+        entries.append(
+            f"Host {alias}\n"
+            f"    HostName 127.0.0.1\n"
+            f"    Port {server.port}\n"
+            f"    User {os.environ.get('USER', 'bench')}\n"
+            f"    IdentityFile {key_file}\n"
+            f"{extra_config}"
+        )
+    (ssh_dir / "config").write_text("\n".join(entries))
+    os.environ["HOME"] = home
+    return home
+
+
+def write_private_key(path, key_type):
+    """Generate an unencrypted private key of the given type"""
+    if key_type == "rsa":
+        paramiko.RSAKey.generate(2048).write_private_key_file(str(path))
+    elif key_type == "rsa4096":
+        paramiko.RSAKey.generate(4096).write_private_key_file(str(path))
+    elif key_type == "ecdsa":
+        paramiko.ECDSAKey.generate(bits=256).write_private_key_file(str(path))
+    elif key_type == "ed25519":
+        # paramiko cannot write Ed25519 keys, so use the OpenSSH format directly
+        key = ed25519.Ed25519PrivateKey.generate()
+        path.write_bytes(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.OpenSSH,
+                serialization.NoEncryption(),
+            )
+        )
+    else:
+        raise ValueError(f"Unsupported key type: {key_type}")
+
+
+def summarize(name, latencies, elapsed):
+    """Print throughput and latency percentiles for one run"""
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    print(
+        f"{name:<12} {len(latencies):>6} calls  {elapsed:>7.2f}s  "
+        f"{len(latencies) / elapsed:>8.1f} calls/s  "
+        f"p50 {statistics.median(latencies) * 1000:>7.1f} ms  "
+        f"p95 {p95 * 1000:>7.1f} ms"
+    )
+
+
+async def _drive(call, calls, concurrency):
+    """Run call() calls times with bounded concurrency, return latencies"""
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with limit:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies, time.perf_counter() - start
+
+
+async def bench_engines(args):
+    """Compare the paramiko worker-pool path with the asyncssh engine"""
+    from mcp_ssh import async_engine
+    from mcp_ssh.executor import run_blocking
+    from mcp_ssh.ssh import (
+        execute_ssh_command,
+        get_ssh_client_from_config,
+        release_ssh_client,
+    )
+
+    def paramiko_call():
+        client = get_ssh_client_from_config(BENCH_HOST)
+        try:
+            stdout, stderr, exit_code = execute_ssh_command(client, "echo ok")
+            assert exit_code == 0, stderr
+        finally:
+            release_ssh_client(BENCH_HOST, client)
+
+    async def asyncssh_call():
+        conn = await async_engine.get_ssh_client_from_config(BENCH_HOST)
+        try:
+            stdout, stderr, exit_code = await async_engine.execute_ssh_command(
+                conn, "echo ok"
+            )
+            assert exit_code == 0, stderr
+        finally:
+            await async_engine.release_ssh_client(BENCH_HOST, conn)
+
+    print(f"{args.calls} x 'echo ok', concurrency {args.concurrency}")
+    summarize(
+        "paramiko",
+        *await _drive(
+            lambda: run_blocking(BENCH_HOST, paramiko_call),
+            args.calls,
+            args.concurrency,
+        ),
+    )
+    if async_engine.asyncssh is None:
+        print("asyncssh     not installed, skipped")
+        return
+    summarize("asyncssh", *await _drive(asyncssh_call, args.calls, args.concurrency))
+
+
+# Algorithm sets compared by the algorithms benchmark, as ssh config lines
+ALGORITHM_SETS = {
+    "default": "",
+    "aes128-ctr": "    Ciphers aes128-ctr\n    MACs hmac-sha2-256\n",
+    "aes256-ctr": "    Ciphers aes256-ctr\n    MACs hmac-sha2-256-etm@openssh.com\n",
+    "aes128-gcm": "    Ciphers aes128-gcm@openssh.com\n",
+    "aes256-gcm": "    Ciphers aes256-gcm@openssh.com\n",
+    "curve25519": "    KexAlgorithms curve25519-sha256\n",
+    "ecdh-p256": "    KexAlgorithms ecdh-sha2-nistp256\n",
+    "dh-group14": "    KexAlgorithms diffie-hellman-group14-sha256\n",
+    "compression": "    Compression yes\n",
+}
+
+# Shell commands producing the transfer payload
+PAYLOADS = {
+    "random": "head -c {size} /dev/urandom",
+    "text": "yes 'INFO request served in 12ms status=200 path=/api/v1/items' "
+    "| head -c {size}",
+}
+
+
+def bench_algorithms(args):
+    """Handshake time and transfer throughput per algorithm set"""
+    from mcp_ssh.ssh import _connect_from_config
+
+    size = args.size * 1024 * 1024
+    command = PAYLOADS[args.data].format(size=size)
+    print(
+        f"{args.handshakes} handshakes, {args.size} MB {args.data} download "
+        f"per algorithm set"
+    )
+    print(f"{'set':<12} {'handshake p50':>14} {'throughput':>12}  negotiated")
+
+    for name in ALGORITHM_SETS:
+        handshakes = []
+        for _ in range(args.handshakes):
+            start = time.perf_counter()
+            client = _connect_from_config(f"bench-{name}")
+            handshakes.append(time.perf_counter() - start)
+            client.close()
+
+        client = _connect_from_config(f"bench-{name}")
+        transport = client.get_transport()
+        negotiated = (
+            f"{transport.remote_cipher} {transport.remote_mac} "
+            f"{transport.remote_compression}"
+        )
+        start = time.perf_counter()
+        _, stdout, _ = client.exec_command(command)
+        received = len(stdout.read())
+        elapsed = time.perf_counter() - start
+        client.close()
+
+        assert received == size, f"{name}: got {received} of {size} bytes"
+        print(
+            f"{name:<12} {statistics.median(handshakes) * 1000:>11.1f} ms "
+            f"{size / elapsed / 1024 / 1024:>7.1f} MB/s  {negotiated}"
+        )
+
+
+# Identity key types compared by the keys benchmark
+KEY_TYPES = ["rsa", "rsa4096", "ecdsa", "ed25519"]
+
+
+def bench_keys(args, server):
+    """Handshake latency per identity key type, with parallel connects"""
+    from mcp_ssh.ssh import _connect_from_config
+
+    def handshake():
+        start = time.perf_counter()
+        client = _connect_from_config(BENCH_HOST)
+        elapsed = time.perf_counter() - start
+        assert client is not None, "connection failed"
+        client.close()
+        return elapsed
+
+    print(
+        f"{args.handshakes} handshakes per key type, " f"concurrency {args.concurrency}"
+    )
+    for key_type in KEY_TYPES:
+        setup_environment(server, key_type=key_type)
+        handshake()  # Load the key into the key cache first
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            latencies = list(pool.map(lambda _: handshake(), range(args.handshakes)))
+        summarize(key_type, latencies, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    engines = sub.add_parser("engines", help="paramiko vs asyncssh engine")
+    engines.add_argument("--calls", type=int, default=200)
+    engines.add_argument("--concurrency", type=int, default=20)
+
+    algorithms = sub.add_parser("algorithms", help="ciphers, KEX, MACs, compression")
+    algorithms.add_argument("--handshakes", type=int, default=10)
+    algorithms.add_argument("--size", type=int, default=32, help="megabytes")
+    algorithms.add_argument("--data", choices=sorted(PAYLOADS), default="random")
+
+    keys = sub.add_parser("keys", help="RSA vs ECDSA vs Ed25519 identity keys")
+    keys.add_argument("--handshakes", type=int, default=50)
+    keys.add_argument("--concurrency", type=int, default=8)
+
+    args = parser.parse_args()
+
+    # Connection resets as benchmark clients disconnect are expected
+    logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+
+    # Keep connections open between calls, as a long-running server would
+    os.environ.setdefault("MCP_SSH_CONNECTION_REUSE", "true")
+    server = LocalSSHServer().start()
+    try:
+        if args.benchmark == "engines":
+            setup_environment(server)
+            asyncio.run(bench_engines(args))
+        elif args.benchmark == "algorithms":
+            setup_environment(
+                server,
+                hosts={f"bench-{name}": c for name, c in ALGORITHM_SETS.items()},
+            )
+            bench_algorithms(args)
+        elif args.benchmark == "keys":
+            bench_keys(args, server)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
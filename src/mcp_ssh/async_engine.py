@@ -0,0 +1,418 @@
+"""
+Async SSH Engine - Native asyncio implementation of the SSH operations
+
+An optional alternative to the paramiko functions in ssh.py, selected with
+MCP_SSH_ENGINE=asyncssh. Every operation is a coroutine running on the
+event loop, so many concurrent channels need no worker threads. Function
+names and return values mirror ssh.py; the first argument is an asyncssh
+connection instead of a paramiko client. Requires the asyncssh package.
+"""
+
+import asyncio
+import logging
+import os
+import weakref
+from dataclasses import dataclass, field
+from typing import Any
+
+from .background import BackgroundProcess
+from .keys import KeyCache
+from .slices import utf8_slice
+from .ssh import (
+    SSH_AUTH_MODE,
+    SSH_COMMAND_TIMEOUT,
+    SSH_CONNECT_TIMEOUT,
+    SSH_CONNECTION_REUSE,
+    SSH_READ_TIMEOUT,
+    SSH_TRANSFER_TIMEOUT,
+    _background_wrapper,
+    _circuit_breaker,
+    _is_simple_command,
+    _parse_snapshot,
+    _prepare_shell_command,
+    _snapshot_script,
+    _wait_script,
+    resolve_host_config,
+)
+
+try:
+    import asyncssh
+except ImportError:  # pragma: no cover - optional dependency
+    _ASYNCSSH_INSTALLED = False
+else:
+    _ASYNCSSH_INSTALLED = True
+
+logger = logging.getLogger(__name__)
+
+# Engine selection from environment variables
+SSH_ENGINE = os.getenv("MCP_SSH_ENGINE", "paramiko").lower()
+
+# Output files kept open for get_output_chunk
+_SFTP_MAX_FILES = 64
+
+
+if SSH_ENGINE == "asyncssh" and not _ASYNCSSH_INSTALLED:
+    logger.warning(
+        "MCP_SSH_ENGINE=asyncssh but asyncssh is not installed, "
+        "falling back to paramiko"
+    )
+
+
+def use_async_engine() -> bool:
+    """Whether the asyncssh engine is selected and installed"""
+    return SSH_ENGINE == "asyncssh" and _ASYNCSSH_INSTALLED
+
+
+@dataclass
+class _SharedConnection:
+    """An asyncssh connection and the tool calls currently using it."""
+
+    conn: Any
+    users: int = 0
+
+
+@dataclass
+class _EngineState:
+    """Connections opened on one event loop."""
+
+    connections: dict[str, _SharedConnection] = field(default_factory=dict)
+    locks: dict[str, asyncio.Lock] = field(default_factory=dict)
+    # SFTP sessions per connection and open output files, oldest first
+    sftp_sessions: weakref.WeakKeyDictionary[Any, Any] = field(
+        default_factory=weakref.WeakKeyDictionary
+    )
+    sftp_files: dict[tuple[int, str], Any] = field(default_factory=dict)
+
+
+# asyncssh connections belong to the loop that opened them
+_states: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _EngineState] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _state() -> _EngineState:
+    return _states.setdefault(asyncio.get_running_loop(), _EngineState())
+
+
+async def get_ssh_client_from_config(config_host: str) -> Any | None:
+    """Get an asyncssh connection using only the SSH config host name
+
+    One connection per host is shared by all concurrent callers; asyncssh
+    multiplexes their channels natively. Raises HostUnavailableError while
+    the host's circuit is open.
+    """
+    _circuit_breaker.check(config_host)
+    state = _state()
+    lock = state.locks.setdefault(config_host, asyncio.Lock())
+
+    async with lock:
+        shared = state.connections.get(config_host)
+        if shared is not None and not shared.conn.is_closed():
+            shared.users += 1
+            return shared.conn
+
+        conn = await _connect_from_config(config_host)
+        if conn is None:
+            return None
+        state.connections[config_host] = _SharedConnection(conn, users=1)
+        return conn
+
+
+async def release_ssh_client(config_host: str, conn: Any) -> None:
+    """Return a connection from get_ssh_client_from_config when done with it"""
+    state = _state()
+    shared = state.connections.get(config_host)
+    if shared is None or shared.conn is not conn:
+        conn.close()
+        return
+
+    shared.users = max(0, shared.users - 1)
+    if shared.users == 0 and (not SSH_CONNECTION_REUSE or conn.is_closed()):
+        del state.connections[config_host]
+        conn.close()
+
+
+async def _connect_from_config(config_host: str) -> Any | None:
+    """Open a new asyncssh connection for an SSH config host name"""
+    host_config = resolve_host_config(config_host)
+    if host_config is None:
+        logger.error(f"Host '{config_host}' not found in SSH config or inventory")
+        return None
+
+    key_filename: str | None = host_config.get(
+        "identityfile", os.environ.get("SSH_KEY_FILE", "~/.ssh/id_rsa")
+    )
+    # asyncssh implements ServerAliveInterval/CountMax natively
+    try:
+        keepalive_interval = int(host_config.get("serveraliveinterval", 0))
+        keepalive_count_max = int(host_config.get("serveralivecountmax", 3))
+    except ValueError:
+        logger.warning(f"Invalid ServerAlive settings for {config_host}, ignoring")
+        keepalive_interval, keepalive_count_max = 0, 3
+    options: dict[str, Any] = {
+        "port": int(host_config.get("port", 22)),
+        "username": host_config.get("user"),
+        "connect_timeout": SSH_CONNECT_TIMEOUT,
+        "keepalive_interval": keepalive_interval,
+        "keepalive_count_max": keepalive_count_max,
+        # asyncssh accepts OpenSSH algorithm lists, including +, - and ^
+        "encryption_algs": host_config.get("ciphers"),
+        "kex_algs": host_config.get("kexalgorithms"),
+        "mac_algs": host_config.get("macs"),
+    }
+    if host_config.get("compression", "").lower() == "yes":
+        options["compression_algs"] = "zlib@openssh.com,zlib"
+    # asyncssh falls back to the ssh-agent itself when no client_keys are given
+    use_agent = SSH_AUTH_MODE != "key" and bool(os.environ.get("SSH_AUTH_SOCK"))
+    if SSH_AUTH_MODE == "agent":
+        if not use_agent:
+            logger.error("MCP_SSH_AUTH_MODE=agent but SSH_AUTH_SOCK is not set")
+            return None
+        key_filename = None
+    if key_filename:
+        key_filename = os.path.expanduser(key_filename.strip("\"'"))
+        if not os.path.exists(key_filename):
+            if use_agent:
+                key_filename = None
+            else:
+                logger.error(f"Key file does not exist: {key_filename}")
+                return None
+    if key_filename:
+        # Decrypting can take a while (bcrypt), so keep it off the event loop
+        key = await asyncio.to_thread(_key_cache.get, key_filename, _read_private_key)
+        if key is None:
+            return None
+        options["client_keys"] = [key]
+    options = {k: v for k, v in options.items() if v is not None}
+    options["known_hosts"] = None  # Same trust model as paramiko's AutoAddPolicy
+
+    try:
+        conn = await asyncssh.connect(
+            host_config.get("hostname", config_host), **options
+        )
+        logger.info(f"Successfully connected to {config_host} (asyncssh)")
+        _circuit_breaker.record_success(config_host)
+        return conn
+    except Exception as e:
+        logger.error(f"Failed to connect to {config_host}: {str(e)}")
+        if not isinstance(e, asyncssh.PermissionDenied):
+            _circuit_breaker.record_failure(config_host, str(e))
+        return None
+
+
+def _read_private_key(key_filename: str) -> Any | None:
+    """Load a private key file, decrypting it with SSH_KEY_PHRASE if needed"""
+    try:
+        return asyncssh.read_private_key(key_filename, os.environ.get("SSH_KEY_PHRASE"))
+    except (asyncssh.KeyImportError, asyncssh.KeyEncryptionError) as e:
+        logger.error(f"Failed to load key {key_filename}: {str(e)}")
+        return None
+
+
+# asyncssh keys are separate objects from paramiko's, so they get their own cache
+_key_cache = KeyCache()
+
+
+async def _run(conn: Any, command: str, timeout: float = SSH_COMMAND_TIMEOUT) -> Any:
+    return await conn.run(command, check=False, timeout=timeout, encoding=None)
+
+
+async def execute_ssh_command(
+    conn: Any, command: str
+) -> tuple[str | None, str | None, int | None]:
+    """Execute a command on the SSH server with proper shell handling"""
+    try:
+        if not _is_simple_command(command):
+            command = _prepare_shell_command(command)
+        result = await _run(conn, command, timeout=SSH_READ_TIMEOUT)
+        return (
+            result.stdout.decode("utf-8"),
+            result.stderr.decode("utf-8"),
+            result.exit_status,
+        )
+    except Exception as e:
+        logger.error(f"SSH command execution failed: {str(e)}")
+        return None, str(e), None
+
+
+async def execute_command_background(
+    conn: Any, command: str, output_file: str, error_file: str
+) -> int:
+    """Execute command in background, return PID."""
+    bg_command = _background_wrapper(command, output_file, error_file)
+    result = await _run(conn, bg_command, timeout=SSH_READ_TIMEOUT)
+
+    pid_output = result.stdout.decode().strip()
+    stderr_output = result.stderr.decode().strip()
+    try:
+        return int(pid_output)
+    except ValueError:
+        logger.error(f"Failed to parse PID from output: '{pid_output}'")
+        if stderr_output:
+            logger.error(f"Background command error: {stderr_output}")
+        raise RuntimeError(f"Failed to get PID: {pid_output}") from None
+
+
+async def wait_for_process(
+    conn: Any, process: BackgroundProcess, timeout: float, min_output: int
+) -> bool:
+    """Wait until a background process exits or has written min_output bytes"""
+    if not process.pid:
+        return True
+    try:
+        result = await _run(
+            conn,
+            _wait_script(process, timeout, min_output),
+            timeout=timeout + SSH_COMMAND_TIMEOUT,
+        )
+    except Exception as e:
+        logger.warning(f"Waiting for process {process.pid} failed: {str(e)}")
+        return False
+    return bool(result.stdout.decode().strip() == "done")
+
+
+async def is_process_running(conn: Any, process: BackgroundProcess) -> bool:
+    """Check whether the remote PID of a background process is still alive."""
+    result = await _run(
+        conn, f"kill -0 {process.pid} 2>/dev/null && echo 'RUNNING' || echo 'STOPPED'"
+    )
+    return bool(result.stdout.decode().strip() == "RUNNING")
+
+
+async def get_process_output(
+    conn: Any, process: BackgroundProcess, max_size: int
+) -> tuple[str, str, str, int | None, int, int]:
+    """Get current status and output from process files in one round trip."""
+    result = await _run(conn, _snapshot_script(process, max_size))
+    return _parse_snapshot(result.stdout)
+
+
+async def get_output_chunk(
+    conn: Any, process: BackgroundProcess, start_byte: int, chunk_size: int
+) -> tuple[str, bool, int]:
+    """Get specific chunk of output, cut on UTF-8 character boundaries."""
+    try:
+        file = await _sftp_file(conn, process.output_file)
+        file_size = (await file.stat()).size or 0
+        chunk = b""
+        if start_byte < file_size:
+            size = min(chunk_size, file_size - start_byte)
+            chunk = await file.read(size, start_byte)
+    except asyncssh.SFTPNoSuchFile:
+        _forget_sftp(conn, process.output_file)
+        return "", False, start_byte
+    except (asyncssh.Error, OSError):
+        _forget_sftp(conn)
+        raise
+    text, _, end = utf8_slice(chunk, 0, chunk_size)
+    next_byte = start_byte + end
+    return text, next_byte < file_size, next_byte
+
+
+async def _sftp_file(conn: Any, path: str) -> Any:
+    """An open file on the connection's SFTP session, both kept for reuse"""
+    state = _state()
+    key = (id(conn), path)
+    file = state.sftp_files.get(key)
+    if file is None:
+        sftp = state.sftp_sessions.get(conn)
+        if sftp is None:
+            sftp = await conn.start_sftp_client()
+            state.sftp_sessions[conn] = sftp
+        file = await sftp.open(path, "rb")
+        state.sftp_files[key] = file
+        while len(state.sftp_files) > _SFTP_MAX_FILES:
+            oldest = next(iter(state.sftp_files))
+            asyncio.ensure_future(state.sftp_files.pop(oldest).close())
+    return file
+
+
+def _forget_sftp(conn: Any, path: str | None = None) -> None:
+    """Drop the cached file for path, or everything cached for conn"""
+    state = _state()
+    for key in list(state.sftp_files):
+        if key[0] == id(conn) and path in (None, key[1]):
+            asyncio.ensure_future(state.sftp_files.pop(key).close())
+    if path is None:
+        state.sftp_sessions.pop(conn, None)
+
+
+async def kill_background_process(
+    conn: Any, process: BackgroundProcess
+) -> tuple[bool, str]:
+    """
+    Kill a background process.
+
+    Returns (success, message) tuple.
+    Uses escalating kill signals: TERM -> KILL
+    """
+    if not process.pid:
+        return False, "No PID available for process"
+
+    try:
+        await _run(conn, f"kill {process.pid} 2>&1")
+
+        # Wait a moment for graceful shutdown
+        await asyncio.sleep(2)
+
+        if not await is_process_running(conn, process):
+            return True, f"Process {process.pid} terminated gracefully"
+
+        result = await _run(conn, f"kill -9 {process.pid} 2>&1")
+        kill_result = result.stdout.decode().strip()
+
+        if not await is_process_running(conn, process):
+            return True, f"Process {process.pid} force killed"
+        return False, f"Failed to kill process {process.pid}: {kill_result}"
+
+    except Exception as e:
+        return False, f"Error killing process: {str(e)}"
+
+
+async def cleanup_process_files(conn: Any, process: BackgroundProcess) -> bool:
+    """Clean up temporary files for a process."""
+    _forget_sftp(conn, process.output_file)
+    try:
+        await _run(
+            conn,
+            f"rm -f {process.output_file} {process.error_file} "
+            f"{process.output_file}.exit 2>/dev/null",
+        )
+        return True
+    except Exception:
+        return False
+
+
+async def transfer_file_scp(
+    conn: Any, local_path: str, remote_path: str, direction: str
+) -> int:
+    """Transfer files over SFTP"""
+    if direction == "upload":
+        if not os.path.exists(local_path):
+            raise FileNotFoundError(f"Local file does not exist: {local_path}")
+        if not os.path.isfile(local_path):
+            raise ValueError(f"Local path is not a file: {local_path}")
+    elif direction != "download":
+        raise ValueError(f"Invalid direction: {direction}. Use 'upload' or 'download'")
+
+    try:
+        async with conn.start_sftp_client() as sftp:
+            if direction == "upload":
+                await asyncio.wait_for(
+                    sftp.put(local_path, remote_path), SSH_TRANSFER_TIMEOUT
+                )
+            else:
+                if not await sftp.exists(remote_path):
+                    raise FileNotFoundError(
+                        f"Remote file does not exist: {remote_path}"
+                    )
+                await asyncio.wait_for(
+                    sftp.get(remote_path, local_path), SSH_TRANSFER_TIMEOUT
+                )
+    except Exception as e:
+        logger.error(f"File transfer failed: {str(e)}")
+        raise
+
+    bytes_transferred = os.path.getsize(local_path)
+    logger.info(f"Successfully transferred {bytes_transferred} bytes ({direction})")
+    return bytes_transferred
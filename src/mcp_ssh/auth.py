@@ -0,0 +1,213 @@
+"""
+SSH Authentication - ssh-agent identities and remembered per-host auth methods
+"""
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+
+class AgentError(paramiko.SSHException):
+    """The local ssh-agent could not be reached or refused to sign."""
+
+
+class _AgentKey(paramiko.AgentKey):
+    """Agent key whose signing failures are raised as AgentError."""
+
+    def sign_ssh_data(self, data, algorithm=None):  # type: ignore[no-untyped-def]
+        try:
+            return super().sign_ssh_data(data, algorithm)
+        except AgentError:
+            raise
+        except paramiko.SSHException as e:
+            raise AgentError(f"ssh-agent cannot sign: {str(e)}") from e
+
+
+class _SharedAgent(paramiko.Agent):
+    """Agent connection used from many threads, one request at a time."""
+
+    def __init__(self) -> None:
+        self._request_lock = threading.Lock()
+        super().__init__()
+        self._keys = tuple(
+            _AgentKey(agent=self, blob=k.blob, comment=k.comment)
+            for k in self.get_keys()
+        )
+
+    def _send_message(self, msg):  # type: ignore[no-untyped-def]
+        try:
+            with self._request_lock:
+                return super()._send_message(msg)
+        except (paramiko.SSHException, OSError) as e:
+            raise AgentError(f"Lost ssh-agent: {str(e)}") from e
+
+
+class AgentIdentities:
+    """
+    Keys offered by the running ssh-agent.
+
+    The agent is asked for its identities once; every connection then
+    signs through the same agent connection. The identity that last
+    authenticated each host is offered first, so hosts that accept only
+    one of several agent keys do not pay a rejected attempt per key.
+    Call reset() when the agent fails so a restarted agent is listed again.
+    """
+
+    def __init__(
+        self, agent_factory: Callable[[], paramiko.Agent] = _SharedAgent
+    ) -> None:
+        self._agent_factory = agent_factory
+        self._lock = threading.Lock()
+        self._agent: paramiko.Agent | None = None
+        self._keys: list[paramiko.PKey] = []
+        self._preferred: dict[str, bytes] = {}  # host -> key fingerprint
+
+    def keys(self, host: str) -> list[paramiko.PKey]:
+        """Agent keys, the one that last authenticated host first"""
+        with self._lock:
+            if self._agent is None:
+                if not os.environ.get("SSH_AUTH_SOCK"):
+                    return []
+                try:
+                    self._agent = self._agent_factory()
+                    self._keys = list(self._agent.get_keys())
+                except (paramiko.SSHException, OSError) as e:
+                    logger.warning(f"Cannot use ssh-agent: {str(e)}")
+                    if self._agent is not None:
+                        self._agent.close()
+                    self._agent = None
+                    self._keys = []
+                    return []
+                logger.debug(f"ssh-agent offers {len(self._keys)} identities")
+            keys = list(self._keys)
+            preferred = self._preferred.get(host)
+
+        if preferred is not None:
+            keys.sort(key=lambda k: k.get_fingerprint() != preferred)
+        return keys
+
+    def record_success(self, host: str, key: paramiko.PKey) -> None:
+        """Remember key as the one to offer host first next time"""
+        with self._lock:
+            self._preferred[host] = key.get_fingerprint()
+
+    def reset(self) -> None:
+        """Close the agent connection; identities are listed again on next use"""
+        with self._lock:
+            agent, self._agent = self._agent, None
+            self._keys = []
+            self._preferred.clear()
+        if agent is not None:
+            agent.close()
+
+
+@dataclass
+class Identity:
+    """A key that can be offered to a host."""
+
+    method: str  # 'key' (IdentityFile), 'agent', 'default' (~/.ssh/id_*)
+    name: str  # Key file path, or agent key fingerprint
+    key: paramiko.PKey | None = None  # Key files are loaded when first offered
+
+
+class AuthHints:
+    """
+    The identity that last authenticated each host, persisted as JSON.
+
+    Hosts that accept only one of several available keys would otherwise
+    see every rejected key first, costing a round trip each and possibly
+    hitting the server's MaxAuthTries. The file is read once and only
+    rewritten when a host authenticates with a different identity than
+    recorded. An empty path keeps hints in memory only.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._hints: dict[str, dict[str, str]] | None = None
+
+    def get(self, host: str) -> dict[str, str] | None:
+        """The recorded {"method", "identity"} for host, if any"""
+        with self._lock:
+            return self._load().get(host)
+
+    def order(self, host: str, identities: list[Identity]) -> list[Identity]:
+        """identities with the one that last authenticated host first"""
+        hint = self.get(host)
+        if hint is None:
+            return identities
+        return sorted(
+            identities,
+            key=lambda i: (i.method, i.name) != (hint["method"], hint["identity"]),
+        )
+
+    def record(self, host: str, identity: Identity) -> None:
+        """Remember identity as the one that authenticated host"""
+        entry = {"method": identity.method, "identity": identity.name}
+        with self._lock:
+            hints = self._load()
+            if hints.get(host) == entry:
+                return
+            hints[host] = entry
+            self._save(hints)
+
+    def clear(self) -> None:
+        """Forget hints held in memory; the file is read again on next use"""
+        with self._lock:
+            self._hints = None
+
+    def _load(self) -> dict[str, dict[str, str]]:
+        """Hints from the file, read on first use; caller holds the lock"""
+        if self._hints is None:
+            self._hints = {}
+            if self.path:
+                try:
+                    with open(os.path.expanduser(self.path)) as f:
+                        data = json.load(f)
+                    if isinstance(data, dict):
+                        self._hints = {
+                            host: hint
+                            for host, hint in data.items()
+                            if _valid_hint(hint)
+                        }
+                        if len(self._hints) < len(data):
+                            logger.warning(
+                                f"Ignoring malformed entries in auth hints {self.path}"
+                            )
+                except FileNotFoundError:
+                    pass
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring auth hints {self.path}: {str(e)}")
+        return self._hints
+
+    def _save(self, hints: dict[str, dict[str, str]]) -> None:
+        """Atomically rewrite the hints file; caller holds the lock"""
+        if not self.path:
+            return
+        path = os.path.expanduser(self.path)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp"
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(hints, f, indent=1, sort_keys=True)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Cannot save auth hints to {self.path}: {str(e)}")
+
+
+def _valid_hint(hint: Any) -> bool:
+    """Whether a hints file entry has a string method and identity"""
+    return (
+        isinstance(hint, dict)
+        and isinstance(hint.get("method"), str)
+        and isinstance(hint.get("identity"), str)
+    )
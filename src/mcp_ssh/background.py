@@ -4,6 +4,8 @@ import uuid
 from dataclasses import dataclass
 from datetime import datetime
 
+from .spool import OutputSpool
+
 
 @dataclass
 class BackgroundProcess:
@@ -18,6 +20,7 @@ class BackgroundProcess:
     output_file: str
     error_file: str
     exit_code: int | None = None
+    spool: OutputSpool | None = None  # Set when output is spooled locally
 
 
 class BackgroundProcessManager:
@@ -0,0 +1,164 @@
+"""
+Circuit Breaker - Fail fast on SSH hosts that are known to be unreachable
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+class HostUnavailableError(ConnectionError):
+    """Raised instead of connecting to a host whose circuit is open."""
+
+
+@dataclass
+class _Circuit:
+    """Failure state for a single host."""
+
+    state: str = "closed"  # 'closed', 'open', 'half_open'
+    failures: int = 0  # consecutive failed connection attempts
+    backoff: float = 0.0
+    retry_at: float = 0.0
+    last_error: str = ""
+    timer: threading.Timer | None = None
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker for SSH connections.
+
+    After threshold consecutive connection failures a host's circuit opens
+    and check() rejects calls immediately instead of letting each one wait
+    out the connect timeout. While open, a background probe retries the
+    host after an exponentially growing backoff (half-open); the circuit
+    closes again as soon as a probe or any other connection succeeds.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[str], bool] | None = None,
+        threshold: int = 2,
+        backoff: float = 5.0,
+        max_backoff: float = 300.0,
+    ) -> None:
+        self._probe = probe
+        self.threshold = threshold
+        self.backoff = backoff
+        self.max_backoff = max(backoff, max_backoff)
+        self._lock = threading.Lock()
+        self._circuits: dict[str, _Circuit] = {}
+
+    def check(self, host: str) -> None:
+        """Raise HostUnavailableError if host is known to be unreachable"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.state == "closed":
+                return
+            if circuit.state == "half_open":
+                retry = "recovery check in progress"
+            else:
+                wait = max(0.0, circuit.retry_at - time.monotonic())
+                retry = f"next check in {wait:.0f}s"
+            message = (
+                f"Host '{host}' is unreachable after {circuit.failures} failed "
+                f"connection attempts (last error: {circuit.last_error}); {retry}"
+            )
+        raise HostUnavailableError(message)
+
+    def record_success(self, host: str) -> None:
+        """Close the circuit for host after a successful connection"""
+        with self._lock:
+            circuit = self._circuits.pop(host, None)
+        if circuit is None:
+            return
+        if circuit.timer is not None:
+            circuit.timer.cancel()
+        if circuit.state != "closed":
+            logger.info(f"Host {host} is reachable again, closing circuit")
+
+    def record_failure(self, host: str, error: str) -> None:
+        """Count a failed connection attempt, opening the circuit at threshold"""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            circuit.last_error = error
+            if circuit.state != "closed":
+                # Probe outcomes are handled by _run_probe
+                return
+            circuit.failures += 1
+            if circuit.failures >= self.threshold:
+                self._open(host, circuit)
+
+    def state(self, host: str) -> str:
+        """Current circuit state for host"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            return circuit.state if circuit else "closed"
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        """Hosts with recorded failures and their circuit state"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: {
+                    "state": c.state,
+                    "failures": c.failures,
+                    "retry_in": round(max(0.0, c.retry_at - now), 1),
+                    "last_error": c.last_error,
+                }
+                for host, c in self._circuits.items()
+            }
+
+    def reset(self) -> None:
+        """Forget all failures and cancel pending probes"""
+        with self._lock:
+            circuits = list(self._circuits.values())
+            self._circuits.clear()
+        for circuit in circuits:
+            if circuit.timer is not None:
+                circuit.timer.cancel()
+
+    def _open(self, host: str, circuit: _Circuit) -> None:
+        """Open the circuit and schedule a probe; caller holds the lock"""
+        circuit.backoff = (
+            min(circuit.backoff * 2, self.max_backoff)
+            if circuit.backoff
+            else self.backoff
+        )
+        circuit.state = "open"
+        circuit.retry_at = time.monotonic() + circuit.backoff
+        logger.warning(
+            f"Opening circuit for {host} after {circuit.failures} failures, "
+            f"retrying in {circuit.backoff:.0f}s: {circuit.last_error}"
+        )
+        if self._probe is not None:
+            circuit.timer = threading.Timer(
+                circuit.backoff, self._run_probe, args=(host, circuit)
+            )
+            circuit.timer.daemon = True
+            circuit.timer.start()
+
+    def _run_probe(self, host: str, circuit: _Circuit) -> None:
+        with self._lock:
+            if self._circuits.get(host) is not circuit:
+                return  # Reset or closed in the meantime
+            circuit.state = "half_open"
+
+        try:
+            recovered = bool(self._probe and self._probe(host))
+        except Exception as e:
+            circuit.last_error = str(e)
+            recovered = False
+
+        if recovered:
+            self.record_success(host)
+            return
+        with self._lock:
+            if self._circuits.get(host) is circuit:
+                circuit.failures += 1
+                self._open(host, circuit)
@@ -0,0 +1,296 @@
+"""
+SSH Config - OpenSSH client config resolution with a compiled host-pattern index
+"""
+
+import fnmatch
+import getpass
+import glob
+import logging
+import os
+import re
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# Same nesting limit as OpenSSH's readconf.c
+MAX_INCLUDE_DEPTH = 16
+
+# "Keyword value" or "Keyword=value"
+_LINE_RE = re.compile(r"^(\S+?)(?:\s*=\s*|\s+)(.*)$")
+
+# Match criteria evaluated here; others (exec, canonical, final, ...) never match
+_MATCH_CRITERIA = {"all", "host", "originalhost", "user", "localuser"}
+
+
+@dataclass
+class _PatternList:
+    """Compiled OpenSSH pattern list: any positive match and no negated match."""
+
+    positive: list[re.Pattern[str]] = field(default_factory=list)
+    negative: list[re.Pattern[str]] = field(default_factory=list)
+    literals: list[str] = field(default_factory=list)  # positive, no wildcards
+
+    @classmethod
+    def compile(cls, patterns: list[str]) -> "_PatternList":
+        result = cls()
+        for pattern in patterns:
+            negated = pattern.startswith("!")
+            pattern = pattern.lstrip("!")
+            if not pattern:
+                continue
+            regex = re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+            if negated:
+                result.negative.append(regex)
+            else:
+                result.positive.append(regex)
+                if not any(c in pattern for c in "*?"):
+                    result.literals.append(pattern)
+        return result
+
+    @property
+    def wildcard(self) -> bool:
+        """Whether some positive pattern can match more than its literal text"""
+        return len(self.literals) < len(self.positive)
+
+    def matches(self, name: str) -> bool:
+        if any(regex.match(name) for regex in self.negative):
+            return False
+        return any(regex.match(name) for regex in self.positive)
+
+
+@dataclass
+class _Block:
+    """A Host or Match block, or the options before the first one in a file."""
+
+    kind: str  # 'global', 'host', 'match'
+    patterns: _PatternList | None = None  # Host patterns
+    criteria: list[tuple[str, _PatternList | None]] = field(default_factory=list)
+    guard: "_Block | None" = None  # block whose Include brought this one in
+    options: list[tuple[str, str]] = field(default_factory=list)
+
+
+class SSHConfig(Mapping[str, dict[str, str]]):
+    """
+    Parsed OpenSSH client config, as a mapping of concrete host aliases to
+    their resolved options.
+
+    Resolution follows ssh_config(5): every Host and Match block whose
+    patterns match contributes options in file order, the first value
+    obtained for each keyword wins, Include is followed (conditionally
+    when it appears inside a block), and multi-alias and negated Host
+    patterns are honoured. Keywords are lower-cased; values are kept as
+    written, apart from %h in HostName.
+
+    Blocks are indexed by their literal aliases, so resolving a host looks
+    up its own blocks directly and only scans blocks with wildcards or
+    Match criteria. Results are memoized per alias and must not be
+    modified by callers.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._blocks: list[_Block] = []
+        self._aliases: dict[str, None] = {}  # ordered set of concrete names
+        self._literal_index: dict[str, list[int]] = {}
+        self._scan_index: list[int] = []
+        self._include_globs: list[str] = []
+        self._resolved: dict[str, dict[str, str]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "SSHConfig":
+        """Parse path and everything it includes; raises OSError if unreadable"""
+        config = cls(path)
+        with open(path) as f:
+            config._parse(f.readlines(), os.path.dirname(path), None, 0)
+        config._build_index()
+        logger.debug(
+            f"Parsed {len(config._aliases)} hosts in {len(config._blocks)} "
+            f"blocks from {path}"
+        )
+        return config
+
+    def __getitem__(self, alias: str) -> dict[str, str]:
+        if alias not in self._aliases:
+            raise KeyError(alias)
+        return self.resolve(alias)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._aliases)
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def __contains__(self, alias: object) -> bool:
+        return alias in self._aliases
+
+    def resolve(self, host: str) -> dict[str, str]:
+        """Options for any host name, whether or not it is a concrete alias"""
+        resolved = self._resolved.get(host)
+        if resolved is None:
+            resolved = self._resolve(host)
+            self._resolved[host] = resolved
+        return resolved
+
+    def signature(self) -> tuple[tuple[str, int, int], ...] | None:
+        """(path, mtime, size) of every file the config is read from
+
+        Include globs are expanded again, so added or removed include files
+        change the signature too. None if a file cannot be stat'ed.
+        """
+        files = [self.path]
+        for pattern in self._include_globs:
+            files.extend(p for p in sorted(glob.glob(pattern)) if os.path.isfile(p))
+        try:
+            return tuple(
+                (p, st.st_mtime_ns, st.st_size) for p in files for st in [os.stat(p)]
+            )
+        except OSError:
+            return None
+
+    def _parse(
+        self, lines: list[str], base_dir: str, guard: _Block | None, depth: int
+    ) -> None:
+        block = _Block("global", guard=guard)
+        self._blocks.append(block)
+
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parsed = _LINE_RE.match(line)
+            if not parsed:
+                continue  # Keyword without a value
+            keyword, value = parsed.group(1).lower(), parsed.group(2).strip()
+
+            if keyword == "host":
+                patterns = _PatternList.compile(value.split())
+                block = _Block("host", patterns=patterns, guard=guard)
+                self._blocks.append(block)
+                for alias in patterns.literals:
+                    self._aliases.setdefault(alias)
+            elif keyword == "match":
+                block = _Block("match", criteria=_parse_match(value), guard=guard)
+                self._blocks.append(block)
+            elif keyword == "include":
+                # An Include inside a block only applies when that block does
+                include_guard = block if block.kind != "global" else guard
+                for pattern in value.split():
+                    self._include(pattern, base_dir, include_guard, depth)
+                # Lines after the Include belong to the enclosing block again
+                resumed = _Block(
+                    block.kind, block.patterns, block.criteria, block.guard
+                )
+                self._blocks.append(resumed)
+                block = resumed
+            else:
+                block.options.append((keyword, value))
+
+    def _include(
+        self, pattern: str, base_dir: str, guard: _Block | None, depth: int
+    ) -> None:
+        if depth >= MAX_INCLUDE_DEPTH:
+            logger.warning(f"Include nested too deeply, skipping: {pattern}")
+            return
+        pattern = os.path.expanduser(pattern)
+        if not os.path.isabs(pattern):
+            # Relative includes are relative to ~/.ssh in user configs
+            pattern = os.path.join(base_dir, pattern)
+        self._include_globs.append(pattern)
+
+        for path in sorted(glob.glob(pattern)):
+            if not os.path.isfile(path):
+                continue
+            try:
+                with open(path) as f:
+                    lines = f.readlines()
+            except OSError as e:
+                logger.warning(f"Cannot read included SSH config {path}: {str(e)}")
+                continue
+            self._parse(lines, base_dir, guard, depth + 1)
+
+    def _build_index(self) -> None:
+        for i, block in enumerate(self._blocks):
+            if block.kind == "host" and block.patterns and not block.patterns.wildcard:
+                for literal in block.patterns.literals:
+                    self._literal_index.setdefault(literal.lower(), []).append(i)
+            elif block.options:
+                self._scan_index.append(i)
+
+    def _resolve(self, host: str) -> dict[str, str]:
+        candidates = set(self._literal_index.get(host.lower(), ()))
+        candidates.update(self._scan_index)
+
+        options: dict[str, str] = {}
+        applies: dict[int, bool] = {}
+        for i in sorted(candidates):
+            block = self._blocks[i]
+            if not block.options or not self._applies(block, host, options, applies):
+                continue
+            for keyword, value in block.options:
+                options.setdefault(keyword, value)
+
+        if "hostname" in options:
+            options["hostname"] = (
+                options["hostname"].replace("%%", "\0").replace("%h", host)
+            ).replace("\0", "%")
+        return options
+
+    def _applies(
+        self,
+        block: _Block,
+        host: str,
+        options: dict[str, str],
+        memo: dict[int, bool],
+    ) -> bool:
+        key = id(block)
+        if key not in memo:
+            memo[key] = (
+                block.guard is None or self._applies(block.guard, host, options, memo)
+            ) and _block_matches(block, host, options)
+        return memo[key]
+
+
+def _parse_match(value: str) -> list[tuple[str, _PatternList | None]]:
+    """Parse Match criteria into (criterion, patterns) pairs"""
+    tokens = value.split()
+    criteria: list[tuple[str, _PatternList | None]] = []
+    i = 0
+    while i < len(tokens):
+        criterion = tokens[i].lower()
+        if criterion == "all":
+            criteria.append(("all", None))
+            i += 1
+        elif criterion in _MATCH_CRITERIA and i + 1 < len(tokens):
+            patterns = _PatternList.compile(tokens[i + 1].split(","))
+            criteria.append((criterion, patterns))
+            i += 2
+        else:
+            logger.debug(f"Unsupported Match criterion '{tokens[i]}', block ignored")
+            criteria.append(("unsupported", None))
+            break
+    return criteria
+
+
+def _block_matches(block: _Block, host: str, options: dict[str, str]) -> bool:
+    if block.kind == "global":
+        return True
+    if block.kind == "host":
+        return block.patterns is not None and block.patterns.matches(host)
+
+    for criterion, patterns in block.criteria:
+        if criterion == "all":
+            continue
+        if criterion == "unsupported" or patterns is None:
+            return False
+        if criterion == "host":
+            subject = options.get("hostname", host).replace("%h", host)
+        elif criterion == "originalhost":
+            subject = host
+        elif criterion == "user":
+            subject = options.get("user", getpass.getuser())
+        else:  # localuser
+            subject = getpass.getuser()
+        if not patterns.matches(subject):
+            return False
+    return bool(block.criteria)
@@ -0,0 +1,113 @@
+"""
+Executor - Runs blocking SSH work off the asyncio event loop
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import weakref
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Worker pool configuration from environment variables
+SSH_WORKER_THREADS = int(
+    os.getenv("MCP_SSH_WORKER_THREADS", "32")
+)  # Total threads for blocking SSH work
+SSH_WORKERS_PER_HOST = int(
+    os.getenv("MCP_SSH_WORKERS_PER_HOST", "8")
+)  # Most threads a single host may occupy at once
+
+
+class HostExecutor:
+    """
+    Bounded thread pool for blocking paramiko calls with per-host fairness.
+
+    Each host may occupy at most per_host workers at a time, so a slow or
+    unreachable host queues behind its own limit instead of starving calls
+    to other hosts of threads.
+    """
+
+    def __init__(self, max_workers: int = 32, per_host: int = 8) -> None:
+        self.max_workers = max(1, max_workers)
+        self.per_host = max(1, min(per_host, self.max_workers))
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        # asyncio semaphores belong to one event loop, so keep a set per loop.
+        # Each is kept only while some call for its host runs or waits, with
+        # the number of such calls, so hosts seen once do not pile up.
+        self._host_limits: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, tuple[asyncio.Semaphore, int]]
+        ] = weakref.WeakKeyDictionary()
+
+    async def run(
+        self, host: str, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        """Run func(*args, **kwargs) on a worker thread, counted against host"""
+        loop = asyncio.get_running_loop()
+        limit = self._acquire_limit(loop, host)
+        try:
+            async with limit:
+                return await loop.run_in_executor(
+                    self._get_executor(), functools.partial(func, *args, **kwargs)
+                )
+        finally:
+            self._release_limit(loop, host)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the worker threads; a new pool is created on next use"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="mcp_ssh"
+                )
+                logger.debug(
+                    f"Started SSH worker pool: {self.max_workers} threads, "
+                    f"{self.per_host} per host"
+                )
+            return self._executor
+
+    def _acquire_limit(
+        self, loop: asyncio.AbstractEventLoop, host: str
+    ) -> asyncio.Semaphore:
+        """The host's semaphore on loop, counting one more call using it"""
+        limits = self._host_limits.setdefault(loop, {})
+        if host in limits:
+            semaphore, users = limits[host]
+        else:
+            semaphore, users = asyncio.Semaphore(self.per_host), 0
+        limits[host] = (semaphore, users + 1)
+        return semaphore
+
+    def _release_limit(self, loop: asyncio.AbstractEventLoop, host: str) -> None:
+        """Count one call fewer, dropping the semaphore once none is left"""
+        limits = self._host_limits.get(loop, {})
+        semaphore, users = limits[host]
+        if users > 1:
+            limits[host] = (semaphore, users - 1)
+        else:
+            del limits[host]
+
+
+# Global executor instance
+_executor = HostExecutor(SSH_WORKER_THREADS, SSH_WORKERS_PER_HOST)
+
+
+# Type parameter syntax would need Python 3.12; 3.11 is still supported
+async def run_blocking(  # noqa: UP047
+    host: str, func: Callable[..., T], *args: Any, **kwargs: Any
+) -> T:
+    """Run a blocking SSH operation for host without stalling the event loop"""
+    return await _executor.run(host, func, *args, **kwargs)
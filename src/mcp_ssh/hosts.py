@@ -0,0 +1,143 @@
+"""
+Host Index - Prebuilt, filterable index of SSH config hosts
+"""
+
+import bisect
+import fnmatch
+import logging
+import re
+import threading
+from collections.abc import Mapping, Sequence
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+_WILDCARDS = "*?["
+
+
+class HostInfo(BaseModel):
+    """SSH host information"""
+
+    name: str = Field(..., description="Host alias name")
+    hostname: str = Field(..., description="Actual hostname or IP")
+    user: str | None = Field(default=None, description="SSH user")
+    port: int = Field(default=22, description="SSH port")
+
+
+class HostIndex:
+    """
+    HostInfo for every configured host, built once per parsed config.
+
+    Hosts keep their config order. Lookups by user and port use exact-match
+    indexes and name patterns narrow to a sorted-name range by their
+    literal prefix, so a filtered page only visits candidate hosts. Pages
+    are continued with a cursor naming the next host to return.
+    """
+
+    def __init__(self, config: Mapping[str, dict[str, str]]) -> None:
+        self.config = config
+        self.hosts: list[HostInfo] = []
+        self._position: dict[str, int] = {}
+        self._by_user: dict[str, list[int]] = {}
+        self._by_port: dict[int, list[int]] = {}
+
+        for name, options in config.items():
+            try:
+                port = int(options.get("port", 22))
+            except ValueError:
+                logger.warning(f"Invalid port for host {name}, assuming 22")
+                port = 22
+            host = HostInfo(
+                name=name,
+                hostname=options.get("hostname", name),
+                user=options.get("user"),
+                port=port,
+            )
+            i = len(self.hosts)
+            self.hosts.append(host)
+            self._position[name] = i
+            if host.user is not None:
+                self._by_user.setdefault(host.user, []).append(i)
+            self._by_port.setdefault(port, []).append(i)
+
+        self._sorted_names = sorted(self._position)
+
+    def search(
+        self,
+        pattern: str = "",
+        hostname: str = "",
+        user: str = "",
+        port: int | None = None,
+        cursor: str = "",
+        limit: int = 100,
+    ) -> tuple[list[HostInfo], str | None]:
+        """Return up to limit matching hosts from cursor, and the next cursor
+
+        pattern matches the alias as a glob, or as a prefix when it has no
+        wildcards; hostname is a glob. Raises ValueError for an unknown
+        cursor, e.g. when the host it names was removed from the config.
+        """
+        start = 0
+        if cursor:
+            if cursor not in self._position:
+                raise ValueError(f"Invalid or expired cursor: {cursor}")
+            start = self._position[cursor]
+
+        if pattern and not any(c in pattern for c in _WILDCARDS):
+            pattern += "*"
+        name_re = _compile(pattern)
+        hostname_re = _compile(hostname, re.IGNORECASE)
+
+        candidates: Sequence[int]
+        if user:
+            candidates = self._by_user.get(user, [])
+        elif port is not None:
+            candidates = self._by_port.get(port, [])
+        elif pattern and not pattern.startswith(tuple(_WILDCARDS)):
+            candidates = self._prefix_positions(_literal_prefix(pattern))
+        else:
+            candidates = range(len(self.hosts))
+
+        page: list[HostInfo] = []
+        for i in candidates[bisect.bisect_left(candidates, start) :]:
+            host = self.hosts[i]
+            if (
+                (name_re is None or name_re.match(host.name))
+                and (hostname_re is None or hostname_re.match(host.hostname))
+                and (not user or host.user == user)
+                and (port is None or host.port == port)
+            ):
+                if len(page) == limit:
+                    return page, host.name
+                page.append(host)
+        return page, None
+
+    def _prefix_positions(self, prefix: str) -> list[int]:
+        lo = bisect.bisect_left(self._sorted_names, prefix)
+        hi = bisect.bisect_left(self._sorted_names, prefix + "\U0010ffff")
+        return sorted(self._position[name] for name in self._sorted_names[lo:hi])
+
+
+def _compile(pattern: str, flags: int = 0) -> re.Pattern[str] | None:
+    return re.compile(fnmatch.translate(pattern), flags) if pattern else None
+
+
+def _literal_prefix(pattern: str) -> str:
+    for i, c in enumerate(pattern):
+        if c in _WILDCARDS:
+            return pattern[:i]
+    return pattern
+
+
+_index_lock = threading.Lock()
+_index: HostIndex | None = None
+
+
+def get_host_index(config: Mapping[str, dict[str, str]]) -> HostIndex:
+    """The index for config, rebuilt only when a different config is passed"""
+    global _index
+    with _index_lock:
+        if _index is None or _index.config is not config:
+            _index = HostIndex(config)
+        return _index
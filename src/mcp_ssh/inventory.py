@@ -0,0 +1,241 @@
+"""
+Host Inventory - Hosts, groups and variables from JSON, YAML or INI files
+
+Reads Ansible-style inventories: INI files with [group], [group:vars] and
+[group:children] sections, and JSON or YAML documents mapping groups to
+hosts, vars and children (including `ansible-inventory --list` output).
+YAML requires the PyYAML package.
+"""
+
+import json
+import logging
+import os
+import re
+import shlex
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - optional dependency
+    _YAML_INSTALLED = False
+else:
+    _YAML_INSTALLED = True
+
+logger = logging.getLogger(__name__)
+
+# Inventory variables that carry SSH settings, as ssh_config keywords
+_SSH_VARIABLES = {
+    "ansible_host": "hostname",
+    "ansible_ssh_host": "hostname",
+    "ansible_user": "user",
+    "ansible_ssh_user": "user",
+    "ansible_port": "port",
+    "ansible_ssh_port": "port",
+    "ansible_ssh_private_key_file": "identityfile",
+    "ansible_private_key_file": "identityfile",
+}
+
+# Numeric host ranges such as web[01:50].example.com
+_RANGE_RE = re.compile(r"\[(\d+):(\d+)\]")
+
+
+class Inventory(Mapping[str, dict[str, str]]):
+    """
+    Hosts and groups loaded from one or more inventory files.
+
+    Maps each host to its SSH settings as lower-case ssh_config keywords
+    (ansible_host becomes hostname, ansible_user user, and so on). Group
+    variables apply from the outermost group inwards and host variables
+    last. Every host belongs to the implicit "all" group; members of a
+    group include those of its child groups. Everything is resolved when
+    loaded, so lookups do not touch the files.
+    """
+
+    def __init__(self, paths: list[str]) -> None:
+        self.paths = paths
+        self._group_hosts: dict[str, dict[str, dict[str, Any]]] = {}
+        self._group_vars: dict[str, dict[str, Any]] = {}
+        self._children: dict[str, list[str]] = {}
+        self._hosts: dict[str, dict[str, str]] = {}
+        self._groups: dict[str, list[str]] = {}
+
+    @classmethod
+    def load(cls, paths: list[str]) -> "Inventory":
+        """Read every inventory file; raises on unreadable or malformed files"""
+        inventory = cls(paths)
+        for path in paths:
+            with open(path) as f:
+                content = f.read()
+            extension = os.path.splitext(path)[1].lower()
+            if extension == ".json":
+                inventory._add_document(json.loads(content) or {})
+            elif extension in (".yml", ".yaml"):
+                if not _YAML_INSTALLED:
+                    raise RuntimeError(f"PyYAML is required to read {path}")
+                inventory._add_document(yaml.safe_load(content) or {})
+            else:
+                inventory._add_ini(content)
+        inventory._resolve()
+        logger.debug(
+            f"Loaded {len(inventory._hosts)} hosts in {len(inventory._groups)} "
+            f"groups from {', '.join(paths)}"
+        )
+        return inventory
+
+    def __getitem__(self, host: str) -> dict[str, str]:
+        return self._hosts[host]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._hosts)
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+    def __contains__(self, host: object) -> bool:
+        return host in self._hosts
+
+    @property
+    def groups(self) -> list[str]:
+        """Names of all groups, including "all" """
+        return list(self._groups)
+
+    def members(self, group: str) -> list[str] | None:
+        """Hosts in group and its child groups, None for an unknown group"""
+        return self._groups.get(group)
+
+    def signature(self) -> tuple[tuple[str, int, int], ...] | None:
+        """(path, mtime, size) of each inventory file, None if one is missing"""
+        try:
+            return tuple(
+                (p, st.st_mtime_ns, st.st_size)
+                for p in self.paths
+                for st in [os.stat(p)]
+            )
+        except OSError:
+            return None
+
+    def _add_host(self, group: str, host: str, variables: dict[str, Any]) -> None:
+        for name in _expand_range(host):
+            self._group_hosts.setdefault(group, {}).setdefault(name, {}).update(
+                variables
+            )
+
+    def _add_child(self, group: str, child: str) -> None:
+        children = self._children.setdefault(group, [])
+        if child not in children:
+            children.append(child)
+        self._group_hosts.setdefault(child, {})
+
+    def _add_ini(self, content: str) -> None:
+        group, section = "ungrouped", "hosts"
+        for line in content.splitlines():
+            line = line.strip()
+            if not line or line.startswith(("#", ";")):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                group, _, section = line[1:-1].partition(":")
+                section = section or "hosts"
+                self._group_hosts.setdefault(group, {})
+                continue
+
+            if section == "vars":
+                key, _, value = line.partition("=")
+                self._group_vars.setdefault(group, {})[key.strip()] = value.strip()
+            elif section == "children":
+                self._add_child(group, line.split()[0])
+            elif section == "hosts":
+                host, *assignments = shlex.split(line, comments=True)
+                variables = dict(a.partition("=")[::2] for a in assignments if "=" in a)
+                self._add_host(group, host, variables)
+
+    def _add_document(self, document: dict[str, Any]) -> None:
+        hostvars = document.get("_meta", {}).get("hostvars", {})
+        for group, body in document.items():
+            if group != "_meta":
+                self._add_group(group, body or {})
+        for host, variables in hostvars.items():
+            self._add_host("all", host, variables or {})
+
+    def _add_group(self, group: str, body: dict[str, Any]) -> None:
+        self._group_hosts.setdefault(group, {})
+        hosts = body.get("hosts") or {}
+        if isinstance(hosts, list):
+            hosts = dict.fromkeys(hosts)
+        for host, variables in hosts.items():
+            self._add_host(group, host, variables or {})
+        self._group_vars.setdefault(group, {}).update(body.get("vars") or {})
+
+        children = body.get("children") or {}
+        if isinstance(children, list):
+            children = dict.fromkeys(children)
+        for child, child_body in children.items():
+            self._add_child(group, child)
+            if child_body:
+                self._add_group(child, child_body)
+
+    def _resolve(self) -> None:
+        # Top-level groups are children of "all"
+        nested = {c for children in self._children.values() for c in children}
+        for group in list(self._group_hosts):
+            if group != "all" and group not in nested:
+                self._add_child("all", group)
+
+        depth: dict[str, int] = {}
+
+        def visit(group: str, level: int, path: tuple[str, ...]) -> list[str]:
+            depth[group] = max(depth.get(group, 0), level)
+            members = dict.fromkeys(self._group_hosts.get(group, {}))
+            for child in self._children.get(group, []):
+                if child in path:
+                    logger.warning(f"Inventory group cycle through '{child}'")
+                    continue
+                members.update(dict.fromkeys(visit(child, level + 1, path + (child,))))
+            self._groups[group] = list(members)
+            return self._groups[group]
+
+        visit("all", 0, ("all",))
+        for group in list(self._group_hosts):
+            if group not in self._groups:
+                # Only reachable through a cycle of child groups
+                self._add_child("all", group)
+                visit("all", 0, ("all",))
+
+        # Outer group vars first, inner groups override, host vars last
+        settings: dict[str, dict[str, Any]] = {host: {} for host in self._groups["all"]}
+        for group in sorted(self._groups, key=lambda g: depth[g]):
+            for host in self._groups[group]:
+                settings[host].update(self._group_vars.get(group, {}))
+        for group_hosts in self._group_hosts.values():
+            for host, variables in group_hosts.items():
+                settings.setdefault(host, {}).update(variables)
+
+        self._hosts = {host: _ssh_settings(v) for host, v in settings.items()}
+
+
+def _ssh_settings(variables: dict[str, Any]) -> dict[str, str]:
+    """Map the known ansible_* connection variables to ssh_config keywords
+
+    Other variables are application data, not SSH options, and are left out.
+    """
+    settings: dict[str, str] = {}
+    for key, value in variables.items():
+        key = key.lower()
+        if key in _SSH_VARIABLES:
+            settings[_SSH_VARIABLES[key]] = str(value)
+    return settings
+
+
+def _expand_range(host: str) -> list[str]:
+    """Expand a numeric [start:end] range, keeping zero padding"""
+    match = _RANGE_RE.search(host)
+    if not match:
+        return [host]
+    start, end = match.groups()
+    width = len(start) if start.startswith("0") else 0
+    prefix, suffix = host[: match.start()], host[match.end() :]
+    return [
+        name
+        for i in range(int(start), int(end) + 1)
+        for name in _expand_range(f"{prefix}{i:0{width}d}{suffix}")
+    ]
@@ -0,0 +1,189 @@
+"""
+Keepalive Scheduler - Detects dead SSH transports before a tool call does
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import paramiko
+from paramiko.common import cMSG_GLOBAL_REQUEST
+from paramiko.message import Message
+
+logger = logging.getLogger(__name__)
+
+# Request name OpenSSH uses for ServerAliveInterval probes; servers answer
+# it (usually with a failure reply), which is all that is needed as an ack
+KEEPALIVE_REQUEST = "keepalive@openssh.com"
+
+
+@dataclass
+class _Watch:
+    """Keepalive state for one transport."""
+
+    host: str
+    client: paramiko.SSHClient
+    interval: float
+    count_max: int
+    misses: int = 0
+    ack: threading.Event | None = None  # set when the last probe is answered
+    due: float = field(default_factory=time.monotonic)
+
+
+class KeepaliveScheduler:
+    """
+    Sends acknowledged keepalives to watched connections, like OpenSSH's
+    ServerAliveInterval and ServerAliveCountMax.
+
+    Every interval seconds each transport gets a keepalive request that
+    the server must answer. A probe still unanswered when the next one is
+    due counts as a miss; after count_max consecutive misses the connection
+    is reported to on_dead and no longer watched. Acked probes are reported
+    to on_ack. One scheduler thread serves all connections; probes are sent
+    without waiting for their replies, so silent servers hold no thread
+    and cannot delay the probes of healthy ones.
+    """
+
+    def __init__(
+        self,
+        on_dead: Callable[[str, paramiko.SSHClient], object],
+        on_ack: Callable[[paramiko.SSHClient], None] | None = None,
+    ) -> None:
+        self._on_dead = on_dead
+        self._on_ack = on_ack
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._heap: list[tuple[float, int, _Watch]] = []
+        self._watches: dict[int, _Watch] = {}
+        self._seq = itertools.count()
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+
+    def watch(
+        self, host: str, client: paramiko.SSHClient, interval: float, count_max: int
+    ) -> None:
+        """Start sending keepalives on client every interval seconds"""
+        if interval <= 0:
+            return
+        entry = _Watch(host, client, interval, max(1, count_max))
+        entry.due = time.monotonic() + interval
+        with self._wakeup:
+            self._watches[id(client)] = entry
+            heapq.heappush(self._heap, (entry.due, next(self._seq), entry))
+            self._stopped = False
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="mcp_ssh_keepalive", daemon=True
+                )
+                self._thread.start()
+            self._wakeup.notify()
+
+    def unwatch(self, client: paramiko.SSHClient) -> None:
+        """Stop sending keepalives on client"""
+        with self._lock:
+            self._watches.pop(id(client), None)
+
+    def watched(self) -> int:
+        """Number of connections currently watched"""
+        with self._lock:
+            return len(self._watches)
+
+    def stop(self) -> None:
+        """Stop the scheduler thread and forget all connections"""
+        with self._wakeup:
+            thread, self._thread = self._thread, None
+            self._stopped = True
+            self._heap.clear()
+            self._watches.clear()
+            self._wakeup.notify()
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._wakeup:
+                while not self._stopped:
+                    now = time.monotonic()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    self._wakeup.wait(timeout)
+                if self._stopped:
+                    return
+                _, _, entry = heapq.heappop(self._heap)
+                if self._watches.get(id(entry.client)) is not entry:
+                    continue  # Unwatched or watched again since
+
+            try:
+                alive = self._tick(entry)
+            except Exception as e:
+                logger.error(f"Keepalive for {entry.host} failed: {str(e)}")
+                alive = False
+
+            with self._wakeup:
+                if self._watches.get(id(entry.client)) is not entry:
+                    continue
+                if alive:
+                    entry.due = time.monotonic() + entry.interval
+                    heapq.heappush(self._heap, (entry.due, next(self._seq), entry))
+                    continue
+                del self._watches[id(entry.client)]
+
+            if entry.misses >= entry.count_max:
+                # Report from a separate thread: replacing may mean reconnecting
+                threading.Thread(
+                    target=self._on_dead,
+                    args=(entry.host, entry.client),
+                    name="mcp_ssh_keepalive_evict",
+                    daemon=True,
+                ).start()
+
+    def _tick(self, entry: _Watch) -> bool:
+        """Check the previous probe and send the next; False when dead or closed"""
+        transport = entry.client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+
+        if entry.ack is not None:
+            if entry.ack.is_set():
+                entry.misses = 0
+                if self._on_ack is not None:
+                    self._on_ack(entry.client)
+            else:
+                entry.misses += 1
+                logger.debug(
+                    f"Keepalive to {entry.host} unanswered "
+                    f"({entry.misses}/{entry.count_max})"
+                )
+                if entry.misses >= entry.count_max:
+                    logger.warning(
+                        f"Connection to {entry.host} missed {entry.misses} "
+                        f"keepalives, evicting it"
+                    )
+                    return False
+                # Only one keepalive may be outstanding per transport
+                return True
+
+        entry.ack = _send_probe(transport)
+        return True
+
+
+def _send_probe(transport: paramiko.Transport) -> threading.Event:
+    """Send a keepalive that wants a reply, without waiting for the reply
+
+    global_request only asks for a reply when it blocks until one arrives,
+    so the request is built here. The transport sets its completion event
+    when the reply comes in, which is the returned ack.
+    """
+    ack = threading.Event()
+    message = Message()
+    message.add_byte(cMSG_GLOBAL_REQUEST)
+    message.add_string(KEEPALIVE_REQUEST)
+    message.add_boolean(True)  # want reply
+    transport.completion_event = ack
+    transport._send_user_message(message)
+    return ack
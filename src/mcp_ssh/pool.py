@@ -0,0 +1,509 @@
+"""
+Connection Pool - Bounded per-host pooling of SSH connections
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledConnection:
+    """An SSH client owned by the pool."""
+
+    host: str
+    client: paramiko.SSHClient
+    created: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)  # last successful I/O
+    last_ack: float = 0.0  # last time the server answered a probe
+    leases: int = 0  # tool calls currently sharing this connection
+    warm: bool = False  # opened by prewarm(), kept open while idle
+
+    @property
+    def last_activity(self) -> float:
+        return max(self.last_used, self.last_ack)
+
+
+@dataclass
+class _HostPool:
+    """Connections for a single host."""
+
+    connections: list[PooledConnection] = field(default_factory=list)
+    pending: int = 0  # connections currently being opened
+    waiters: int = 0
+    expecting: int = 0  # waiters counting on a session of a pending connection
+
+    @property
+    def total(self) -> int:
+        return len(self.connections) + self.pending
+
+    @property
+    def leases(self) -> int:
+        return sum(c.leases for c in self.connections)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SSH connections keyed by SSH config host name.
+
+    Clients are handed out with checkout() and returned with checkin().
+    One authenticated connection is shared by up to max_sessions concurrent
+    callers, each of which opens its own channel on it. A host gets another
+    connection only when every existing one, counting those still being
+    opened, is at max_sessions, up to max_per_host connections; callers
+    beyond that wait until a lease is returned or wait_timeout expires.
+    Connections without leases are kept for idle_timeout seconds (closed
+    right away when keep_idle is off).
+
+    Liveness of a reused connection is judged from transport state alone;
+    a probe round trip is only spent on connections that have seen no
+    traffic for probe_after seconds.
+
+    prewarm() opens connections ahead of the first call, within the spare
+    connection budget. Pre-warmed connections are held open while idle,
+    with transport keepalives, until they fail or close_all() is called.
+
+    Across all hosts at most max_connections are open at once. When the
+    budget is spent, opening a connection evicts the least recently used
+    idle one, or waits for one to become idle. With reap_interval set, a
+    background thread closes idle and dead connections on every host, so
+    sockets are released even for hosts that are never asked for again.
+    on_close runs just before the pool closes a connection.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], paramiko.SSHClient | None],
+        max_per_host: int = 5,
+        max_sessions: int = 10,
+        idle_timeout: float = 300.0,
+        wait_timeout: float = 30.0,
+        probe_after: float = 60.0,
+        probe_timeout: float = 5.0,
+        keep_idle: bool = True,
+        max_connections: int = 100,
+        reap_interval: float = 0.0,
+        on_close: Callable[[paramiko.SSHClient], None] | None = None,
+    ) -> None:
+        self._factory = factory
+        self._on_close = on_close
+        self.max_per_host = max(1, max_per_host)
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.probe_after = probe_after
+        self.probe_timeout = probe_timeout
+        self.keep_idle = keep_idle
+        self.max_connections = max(1, max_connections)
+        self.reap_interval = reap_interval
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._hosts: dict[str, _HostPool] = {}
+        self._owners: dict[int, PooledConnection] = {}
+        # Connections without leases, least recently used first
+        self._idle: OrderedDict[int, PooledConnection] = OrderedDict()
+        self._opening = 0  # connections being opened across all hosts
+        self._counters = {
+            "opened": 0,
+            "evicted_idle": 0,
+            "evicted_lru": 0,
+            "evicted_dead": 0,
+        }
+        self._reaper: threading.Thread | None = None
+        self._stop_reaper = threading.Event()
+
+    def checkout(
+        self, host: str, timeout: float | None = None
+    ) -> paramiko.SSHClient | None:
+        """Lease a connection to host, opening a new one if allowed"""
+        deadline = time.monotonic() + (
+            self.wait_timeout if timeout is None else timeout
+        )
+        self._start_reaper()
+
+        while True:
+            stale: list[PooledConnection] = []
+            candidate: PooledConnection | None = None
+            needs_check = False
+            opening = False
+
+            with self._available:
+                host_pool = self._hosts.setdefault(host, _HostPool())
+                while True:
+                    stale.extend(self._expire_idle(host_pool))
+                    candidate = self._pick(host_pool)
+                    if candidate is not None:
+                        # Busy connections are known good; idle ones get checked
+                        needs_check = candidate.leases == 0
+                        candidate.leases += 1
+                        self._idle.pop(id(candidate.client), None)
+                        break
+                    # Wait for a connection being opened if it will have a
+                    # free session, rather than dial another one
+                    expecting = (
+                        host_pool.pending + host_pool.expecting
+                        < host_pool.pending * self.max_sessions
+                    )
+                    if (
+                        not expecting
+                        and host_pool.total < self.max_per_host
+                        and self._reserve(stale)
+                    ):
+                        host_pool.pending += 1
+                        opening = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    host_pool.waiters += 1
+                    host_pool.expecting += expecting
+                    try:
+                        self._available.wait(remaining)
+                    finally:
+                        host_pool.waiters -= 1
+                        host_pool.expecting -= expecting
+
+            # Close dropped connections outside the lock
+            self._close_all(stale)
+
+            if candidate is None:
+                break
+            if not needs_check or self._is_usable(candidate):
+                logger.debug(
+                    f"Sharing pooled connection to {host} "
+                    f"({candidate.leases}/{self.max_sessions} sessions)"
+                )
+                return candidate.client
+            logger.debug(f"Pooled connection to {host} is dead, dropping it")
+            self.discard(host, candidate.client)
+
+        if not opening:
+            if host_pool.total < self.max_per_host:
+                limit = f"all {self.max_connections} pooled connections busy"
+            else:
+                limit = (
+                    f"{self.max_per_host} connections x {self.max_sessions} "
+                    f"sessions in use"
+                )
+            logger.error(
+                f"Timed out waiting for a pooled connection to {host} ({limit})"
+            )
+            return None
+
+        client = None
+        try:
+            client = self._factory(host)
+        finally:
+            with self._available:
+                host_pool.pending -= 1
+                self._opening -= 1
+                if client is not None:
+                    self._add(PooledConnection(host, client, leases=1))
+                # Waiters may now share the new connection or open their own
+                self._available.notify_all()
+
+        return client
+
+    def prewarm(
+        self, hosts: Iterable[str], concurrency: int = 8, keepalive: int = 0
+    ) -> dict[str, bool]:
+        """Open one idle connection to each host in parallel
+
+        Hosts that already have a connection are left alone. Returns whether
+        each host has a pooled connection afterwards.
+        """
+        hosts = list(dict.fromkeys(hosts))
+        if not hosts:
+            return {}
+
+        self._start_reaper()
+        workers = max(1, min(concurrency, len(hosts)))
+        with ThreadPoolExecutor(workers, thread_name_prefix="mcp_ssh_prewarm") as ex:
+            warmed = ex.map(lambda h: self._prewarm_host(h, keepalive), hosts)
+            results = dict(zip(hosts, warmed, strict=True))
+
+        logger.info(
+            f"Pre-warmed SSH connections to {sum(results.values())}/{len(hosts)} hosts"
+        )
+        return results
+
+    def checkin(self, host: str, client: paramiko.SSHClient) -> None:
+        """Return a leased connection to the pool"""
+        with self._available:
+            conn = self._owners.get(id(client))
+            if conn is not None and conn.host == host:
+                conn.leases = max(0, conn.leases - 1)
+                if self._is_open(client):
+                    conn.last_used = time.monotonic()
+                else:
+                    # Hand out no new leases; close once the last one is back
+                    self._retire(conn, "dead")
+                if conn.leases:
+                    self._available.notify_all()
+                    return
+                if (self.keep_idle or conn.warm) and self._is_pooled(conn):
+                    self._idle[id(client)] = conn
+                    self._idle.move_to_end(id(client))
+                    self._available.notify_all()
+                    return
+                self._retire(conn)
+                del self._owners[id(client)]
+            self._available.notify_all()
+
+        # Not ours, no longer usable, or not kept when idle
+        self._close(client)
+
+    def discard(self, host: str, client: paramiko.SSHClient) -> None:
+        """Drop a leased connection that turned out to be broken"""
+        with self._available:
+            conn = self._owners.pop(id(client), None)
+            if conn is not None:
+                self._retire(conn, "dead")
+            self._available.notify_all()
+        self._close(client)
+
+    def replace(self, host: str, client: paramiko.SSHClient) -> bool:
+        """Drop a connection found dead in the background and reconnect
+
+        A replacement is only opened if the dead connection would have been
+        kept idle. A connection still leased is retired rather than closed
+        under its callers; checkin closes it once the last lease is back.
+        Returns whether a replacement is now pooled.
+        """
+        with self._available:
+            conn = self._owners.get(id(client))
+            reconnect = conn is not None and (self.keep_idle or conn.warm)
+            warm = conn is not None and conn.warm
+            leased = conn is not None and conn.leases > 0
+            if conn is not None and leased:
+                self._retire(conn, "dead")
+                self._available.notify_all()
+        if not leased:
+            self.discard(host, client)
+        if not reconnect:
+            return False
+        logger.info(f"Replacing dead connection to {host}")
+        return self._prewarm_host(host, 0, warm=warm)
+
+    def mark_alive(self, client: paramiko.SSHClient) -> None:
+        """Record that the server answered on client, sparing a liveness probe"""
+        with self._lock:
+            conn = self._owners.get(id(client))
+            if conn is not None:
+                conn.last_ack = time.monotonic()
+
+    def reap(self) -> int:
+        """Close idle and dead connections on every host, return the count"""
+        with self._available:
+            stale: list[PooledConnection] = []
+            for host, host_pool in list(self._hosts.items()):
+                stale.extend(self._expire_idle(host_pool))
+                if not host_pool.total and not host_pool.waiters:
+                    del self._hosts[host]
+            if stale:
+                self._available.notify_all()
+        count = len(stale)
+        self._close_all(stale)
+        return count
+
+    def close_all(self) -> None:
+        """Close every pooled connection and forget all hosts"""
+        with self._available:
+            conns = list(self._owners.values())
+            self._hosts.clear()
+            self._owners.clear()
+            self._idle.clear()
+            self._available.notify_all()
+            reaper, self._reaper = self._reaper, None
+        if reaper is not None:
+            self._stop_reaper.set()
+            reaper.join()
+            self._stop_reaper.clear()
+        self._close_all(conns)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Per-host connection counts"""
+        with self._lock:
+            return {
+                host: {
+                    "connections": len(hp.connections),
+                    "idle": sum(1 for c in hp.connections if not c.leases),
+                    "sessions": hp.leases,
+                    "pending": hp.pending,
+                    "waiters": hp.waiters,
+                }
+                for host, hp in self._hosts.items()
+            }
+
+    def totals(self) -> dict[str, int]:
+        """Pool-wide connection counts and eviction counters"""
+        with self._lock:
+            return {
+                "hosts": len(self._hosts),
+                "connections": len(self._owners),
+                "idle": len(self._idle),
+                "opening": self._opening,
+                "max_connections": self.max_connections,
+                **self._counters,
+            }
+
+    def _pick(self, host_pool: _HostPool) -> PooledConnection | None:
+        """Busiest connection with a free session slot, to pack channels"""
+        best = None
+        for conn in host_pool.connections:
+            if conn.leases >= self.max_sessions or not self._is_open(conn.client):
+                continue
+            if best is None or (conn.leases, conn.last_used) > (
+                best.leases,
+                best.last_used,
+            ):
+                best = conn
+        return best
+
+    def _add(self, conn: PooledConnection) -> None:
+        self._hosts.setdefault(conn.host, _HostPool()).connections.append(conn)
+        self._owners[id(conn.client)] = conn
+        if not conn.leases:
+            self._idle[id(conn.client)] = conn
+        self._counters["opened"] += 1
+
+    def _reserve(self, stale: list[PooledConnection], evict: bool = True) -> bool:
+        """Claim budget for a new connection, evicting the LRU idle one if full"""
+        if len(self._owners) + self._opening >= self.max_connections:
+            if not evict or not self._idle:
+                return False
+            _, victim = self._idle.popitem(last=False)
+            self._retire(victim, "lru")
+            del self._owners[id(victim.client)]
+            stale.append(victim)
+            logger.debug(
+                f"Connection budget of {self.max_connections} reached, "
+                f"evicting least recently used connection to {victim.host}"
+            )
+        self._opening += 1
+        return True
+
+    def _retire(self, conn: PooledConnection, reason: str | None = None) -> None:
+        self._idle.pop(id(conn.client), None)
+        host_pool = self._hosts.get(conn.host)
+        if host_pool and conn in host_pool.connections:
+            host_pool.connections.remove(conn)
+            if reason:
+                self._counters[f"evicted_{reason}"] += 1
+
+    def _is_pooled(self, conn: PooledConnection) -> bool:
+        host_pool = self._hosts.get(conn.host)
+        return host_pool is not None and conn in host_pool.connections
+
+    def _expire_idle(self, host_pool: _HostPool) -> list[PooledConnection]:
+        now = time.monotonic()
+        expired = [
+            c
+            for c in host_pool.connections
+            if not c.leases
+            and (
+                not self._is_open(c.client)
+                or (not c.warm and now - c.last_used > self.idle_timeout)
+            )
+        ]
+        for conn in expired:
+            self._retire(conn, "idle" if self._is_open(conn.client) else "dead")
+            del self._owners[id(conn.client)]
+            logger.debug(f"Evicting idle or dead connection to {conn.host}")
+        return expired
+
+    def _start_reaper(self) -> None:
+        if self.reap_interval <= 0:
+            return
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(
+                target=self._reap_loop, name="mcp_ssh_pool_reaper", daemon=True
+            )
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        while not self._stop_reaper.wait(self.reap_interval):
+            try:
+                closed = self.reap()
+                if closed:
+                    logger.debug(f"Reaper closed {closed} pooled connections")
+            except Exception as e:
+                logger.error(f"Connection reaper failed: {str(e)}")
+
+    def _prewarm_host(self, host: str, keepalive: int, warm: bool = True) -> bool:
+        with self._available:
+            host_pool = self._hosts.setdefault(host, _HostPool())
+            if host_pool.total:
+                return True
+            # Only spare budget is used; evicting would churn other warm hosts
+            if not self._reserve([], evict=False):
+                logger.warning(f"Connection budget exhausted, not pre-warming {host}")
+                return False
+            host_pool.pending += 1
+
+        client = None
+        try:
+            client = self._factory(host)
+            if client is not None and keepalive > 0:
+                client.get_transport().set_keepalive(keepalive)
+        except Exception as e:
+            logger.warning(f"Failed to pre-warm connection to {host}: {str(e)}")
+            if client is not None:
+                self._close(client)
+                client = None
+        finally:
+            with self._available:
+                host_pool.pending -= 1
+                self._opening -= 1
+                if client is not None:
+                    self._add(PooledConnection(host, client, warm=warm))
+                self._available.notify_all()
+
+        return client is not None
+
+    def _is_usable(self, conn: PooledConnection) -> bool:
+        if not self._is_open(conn.client):
+            return False
+        if time.monotonic() - conn.last_activity < self.probe_after:
+            return True
+        return self._probe(conn)
+
+    def _probe(self, conn: PooledConnection) -> bool:
+        """Check a long-idle connection by opening and closing a channel"""
+        try:
+            transport = conn.client.get_transport()
+            channel = transport.open_session(timeout=self.probe_timeout)
+            channel.close()
+        except Exception as e:
+            logger.debug(f"Liveness probe to {conn.host} failed: {str(e)}")
+            return False
+        conn.last_ack = time.monotonic()
+        return True
+
+    @staticmethod
+    def _is_open(client: paramiko.SSHClient) -> bool:
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def _close(self, client: paramiko.SSHClient) -> None:
+        try:
+            if self._on_close is not None:
+                self._on_close(client)
+            client.close()
+        except Exception as e:
+            logger.debug(f"Error closing SSH client: {str(e)}")
+
+    def _close_all(self, conns: list[PooledConnection]) -> None:
+        for conn in conns:
+            self._close(conn.client)
+        conns.clear()
@@ -1,27 +1,50 @@
 import asyncio
 import os
+import threading
 import time
+from collections.abc import Awaitable, Callable
 from datetime import datetime
+from typing import Any, TypeVar, cast
 
 from mcp.server.fastmcp import Context, FastMCP
 from pydantic import BaseModel, Field
 
-from mcp_ssh.ssh import get_ssh_client_from_config
+from mcp_ssh.ssh import (
+    SSH_LOCAL_SPOOL,
+    SSH_PREWARM_HOSTS,
+    connection_stats,
+    get_ssh_client_from_config,
+    inventory_group,
+    prewarm_connections,
+    release_ssh_client,
+)
 
+from . import async_engine
 from .background import process_manager
+from .executor import run_blocking
+from .hosts import HostInfo, get_host_index
 from .security import get_validator, validate_command
 from .ssh import (
     cleanup_process_files,
     execute_command_background,
+    execute_command_background_async,
+    execute_command_spooled,
     get_output_chunk,
     get_process_output,
+    is_process_running,
     kill_background_process,
+    transfer_file_scp,
+    wait_for_process,
+    wait_for_process_async,
 )
 
 # Configuration from environment variables
 MAX_OUTPUT_SIZE = int(os.getenv("MCP_SSH_MAX_OUTPUT_SIZE", "50000"))  # 50KB default
 QUICK_WAIT_TIME = int(os.getenv("MCP_SSH_QUICK_WAIT_TIME", "5"))  # 5 seconds default
 CHUNK_SIZE = int(os.getenv("MCP_SSH_CHUNK_SIZE", "10000"))  # 10KB chunks default
+GROUP_CONCURRENCY = int(
+    os.getenv("MCP_SSH_GROUP_CONCURRENCY", "32")
+)  # Hosts of a group command started at once
 
 # Timeout configuration
 SSH_CONNECT_TIMEOUT = int(
@@ -35,9 +58,6 @@ SSH_TRANSFER_TIMEOUT = int(
 )  # 5 minutes default
 SSH_READ_TIMEOUT = int(os.getenv("MCP_SSH_READ_TIMEOUT", "30"))  # 30 seconds default
 
-# Connection optimization
-SSH_CONNECTION_REUSE = os.getenv("MCP_SSH_CONNECTION_REUSE", "false").lower() == "true"
-
 
 class SSHCommand(BaseModel):
     """SSH command model"""
@@ -62,6 +82,19 @@ class CommandResult(BaseModel):
     output_size: int = 0
     has_more_output: bool = False
     chunk_start: int = 0
+    next_byte: int = 0  # start_byte for the next chunk of output
+    error_message: str = ""
+
+
+class GroupCommandRequest(BaseModel):
+    group: str = Field(..., min_length=1, max_length=253)
+    command: str = Field(..., min_length=1, max_length=2000)
+
+
+class GroupCommandResult(BaseModel):
+    success: bool  # True when the command started on every host
+    group: str
+    results: dict[str, CommandResult] = Field(default_factory=dict)
     error_message: str = ""
 
 
@@ -107,28 +140,81 @@ class FileTransferResult(BaseModel):
     error_message: str = Field(default="", description="Error message if failed")
 
 
-class HostInfo(BaseModel):
-    """SSH host information"""
+class HostSearchRequest(BaseModel):
+    pattern: str = Field(
+        default="", description="Host alias glob, or prefix if it has no wildcards"
+    )
+    hostname: str = Field(default="", description="Hostname glob")
+    user: str = Field(default="", description="Exact SSH user")
+    port: int | None = Field(default=None, ge=1, le=65535)
+    cursor: str = Field(default="", description="next_cursor from a previous page")
+    limit: int = Field(default=100, ge=1, le=1000)
+
 
-    name: str = Field(..., description="Host alias name")
-    hostname: str = Field(..., description="Actual hostname or IP")
-    user: str | None = Field(default=None, description="SSH user")
-    port: int = Field(default=22, description="SSH port")
+class HostPage(BaseModel):
+    hosts: list[HostInfo]
+    next_cursor: str | None = None
+    error_message: str = ""
 
 
 # Create MCP server
 mcp = FastMCP("MCP SSH Server")
 
+T = TypeVar("T")
+
+# The async_engine coroutine standing in for each ssh.py operation
+_ASYNC_OPERATIONS: dict[Callable[..., Any], str] = {
+    cleanup_process_files: "cleanup_process_files",
+    execute_command_background: "execute_command_background",
+    get_output_chunk: "get_output_chunk",
+    get_process_output: "get_process_output",
+    get_ssh_client_from_config: "get_ssh_client_from_config",
+    is_process_running: "is_process_running",
+    kill_background_process: "kill_background_process",
+    release_ssh_client: "release_ssh_client",
+    transfer_file_scp: "transfer_file_scp",
+    wait_for_process: "wait_for_process",
+}
+
+
+# paramiko operations that wait on the event loop instead of a worker thread;
+# they take the host as their first argument
+_PARAMIKO_COROUTINES: dict[Callable[..., Any], Callable[..., Awaitable[Any]]] = {
+    execute_command_background: execute_command_background_async,
+    wait_for_process: wait_for_process_async,
+}
+
+
+# Type parameter syntax would need Python 3.12; 3.11 is still supported
+async def _ssh_call(host: str, func: Callable[..., T], *args: Any) -> T:  # noqa: UP047
+    """Run an ssh.py operation for host on the configured SSH engine
+
+    The paramiko functions run on the worker pool, apart from those in
+    _PARAMIKO_COROUTINES, which only use it around their waits. With
+    MCP_SSH_ENGINE=asyncssh the coroutine mapped in _ASYNC_OPERATIONS runs
+    on the event loop instead. Operations without one run on the worker
+    pool with either engine.
+    """
+    name = _ASYNC_OPERATIONS.get(func)
+    if name is not None and async_engine.use_async_engine():
+        return cast(T, await getattr(async_engine, name)(*args))
+    coroutine = _PARAMIKO_COROUTINES.get(func)
+    if coroutine is not None:
+        return cast(T, await coroutine(host, *args))
+    return await run_blocking(host, func, *args)
+
 
 @mcp.tool()
 async def execute_command(request: CommandRequest, ctx: Context) -> CommandResult:
     """
     Execute SSH command in background. Always returns immediately with process_id.
 
-    Waits briefly for quick commands to complete, then returns current status.
+    Returns as soon as a quick command completes (waiting at most
+    MCP_SSH_QUICK_WAIT_TIME), with its current status.
     Use get_command_output to retrieve more data if needed.
     """
     client = None
+    spooled = False
     start_time = time.time()
 
     try:
@@ -146,7 +232,7 @@ async def execute_command(request: CommandRequest, ctx: Context) -> CommandResul
             )
 
         # Get SSH connection
-        client = get_ssh_client_from_config(request.host)
+        client = await _ssh_call(request.host, get_ssh_client_from_config, request.host)
         if not client:
             return CommandResult(
                 success=False,
@@ -165,19 +251,40 @@ async def execute_command(request: CommandRequest, ctx: Context) -> CommandResul
         await ctx.report_progress(0.3)
 
         # Execute in background
-        pid = execute_command_background(
-            client, request.command, process.output_file, process.error_file
-        )
+        if SSH_LOCAL_SPOOL and not async_engine.use_async_engine():
+            # The spool keeps the connection until the command exits
+            spooled = True
+            pid = await run_blocking(
+                request.host, execute_command_spooled, client, process
+            )
+        else:
+            pid = await _ssh_call(
+                request.host,
+                execute_command_background,
+                client,
+                request.command,
+                process.output_file,
+                process.error_file,
+            )
 
         # Update process with PID
         process_manager.update_process(process_id, pid=pid)
 
         await ctx.report_progress(0.6)
 
-        # Wait briefly for quick commands with timeout
+        # Wait for quick commands, returning as soon as the command finishes
+        # or has printed a full page of output
         try:
             await asyncio.wait_for(
-                asyncio.sleep(QUICK_WAIT_TIME), timeout=QUICK_WAIT_TIME + 5
+                _ssh_call(
+                    request.host,
+                    wait_for_process,
+                    client,
+                    process,
+                    QUICK_WAIT_TIME,
+                    MAX_OUTPUT_SIZE,
+                ),
+                timeout=QUICK_WAIT_TIME + 5,
             )
         except TimeoutError:
             await ctx.warning(
@@ -185,8 +292,8 @@ async def execute_command(request: CommandRequest, ctx: Context) -> CommandResul
             )
 
         # Check current status
-        status, output, errors, exit_code = get_process_output(
-            client, process, MAX_OUTPUT_SIZE
+        status, output, errors, exit_code, output_end, stdout_size = await _ssh_call(
+            request.host, get_process_output, client, process, MAX_OUTPUT_SIZE
         )
 
         # Update process status
@@ -194,9 +301,9 @@ async def execute_command(request: CommandRequest, ctx: Context) -> CommandResul
 
         execution_time = time.time() - start_time
 
-        # Determine if output was truncated
+        # More output follows the bytes returned
         output_size = len(output)
-        has_more = output_size >= MAX_OUTPUT_SIZE
+        has_more = output_end < stdout_size
 
         await ctx.report_progress(1.0)
 
@@ -211,6 +318,7 @@ async def execute_command(request: CommandRequest, ctx: Context) -> CommandResul
             output_size=output_size,
             has_more_output=has_more,
             chunk_start=0,
+            next_byte=output_end,
         )
 
     except Exception as e:
@@ -224,8 +332,44 @@ async def execute_command(request: CommandRequest, ctx: Context) -> CommandResul
             execution_time=execution_time,
         )
     finally:
-        if client and not SSH_CONNECTION_REUSE:
-            client.close()
+        if client and not spooled:
+            await _ssh_call(request.host, release_ssh_client, request.host, client)
+
+
+@mcp.tool()
+async def execute_command_on_group(
+    request: GroupCommandRequest, ctx: Context
+) -> GroupCommandResult:
+    """
+    Execute a command in background on every host of an inventory group.
+
+    Each host gets its own process_id, as with execute_command; use
+    get_command_output with those to follow up on hosts still running.
+    """
+    members = inventory_group(request.group)
+    if not members:
+        return GroupCommandResult(
+            success=False,
+            group=request.group,
+            error_message=f"Inventory group '{request.group}' not found or empty",
+        )
+
+    await ctx.info(f"Starting command on {len(members)} hosts in {request.group}")
+    semaphore = asyncio.Semaphore(GROUP_CONCURRENCY)
+
+    async def run(host: str) -> CommandResult:
+        async with semaphore:
+            result: CommandResult = await execute_command(
+                CommandRequest(host=host, command=request.command), ctx
+            )
+            return result
+
+    results = await asyncio.gather(*(run(host) for host in members))
+    return GroupCommandResult(
+        success=all(r.success for r in results),
+        group=request.group,
+        results=dict(zip(members, results, strict=True)),
+    )
 
 
 @mcp.tool()
@@ -234,7 +378,8 @@ async def get_command_output(request: GetOutputRequest, ctx: Context) -> Command
     Get output from a background command, with optional chunking.
 
     If chunk_size not specified, uses environment default.
-    Returns specific chunk starting from start_byte.
+    Returns specific chunk starting from start_byte, cut on UTF-8 character
+    boundaries; pass next_byte as start_byte to get the following chunk.
     """
     client = None
 
@@ -250,22 +395,30 @@ async def get_command_output(request: GetOutputRequest, ctx: Context) -> Command
 
         await ctx.info(f"Getting output for process {request.process_id}")
 
-        # Get SSH connection
-        client = get_ssh_client_from_config(process.host)
-        if not client:
-            return CommandResult(
-                success=False,
-                process_id=request.process_id,
-                status="failed",
-                error_message="Failed to establish SSH connection",
+        # Get SSH connection, unless the output is spooled locally
+        if process.spool is None:
+            client = await _ssh_call(
+                process.host, get_ssh_client_from_config, process.host
             )
+            if not client:
+                return CommandResult(
+                    success=False,
+                    process_id=request.process_id,
+                    status="failed",
+                    error_message="Failed to establish SSH connection",
+                )
 
         chunk_size = request.chunk_size or CHUNK_SIZE
 
         # Get specific chunk with timeout
         try:
-            chunk, has_more = get_output_chunk(
-                client, process, request.start_byte, chunk_size
+            chunk, has_more, next_byte = await _ssh_call(
+                process.host,
+                get_output_chunk,
+                client,
+                process,
+                request.start_byte,
+                chunk_size,
             )
         except Exception as e:
             if "timeout" in str(e).lower():
@@ -281,8 +434,8 @@ async def get_command_output(request: GetOutputRequest, ctx: Context) -> Command
             raise
 
         # Check current status
-        status, _, errors, exit_code = get_process_output(
-            client, process, 1000
+        status, _, errors, exit_code, _, _ = await _ssh_call(
+            process.host, get_process_output, client, process, 1000
         )  # Small check for status
 
         # Update process status
@@ -300,6 +453,7 @@ async def get_command_output(request: GetOutputRequest, ctx: Context) -> Command
             output_size=len(chunk),
             has_more_output=has_more,
             chunk_start=request.start_byte,
+            next_byte=next_byte,
         )
 
     except Exception as e:
@@ -311,8 +465,8 @@ async def get_command_output(request: GetOutputRequest, ctx: Context) -> Command
             error_message=str(e),
         )
     finally:
-        if client and not SSH_CONNECTION_REUSE:
-            client.close()
+        if client and process is not None:
+            await _ssh_call(process.host, release_ssh_client, process.host, client)
 
 
 @mcp.tool()
@@ -334,20 +488,23 @@ async def get_command_status(request: GetOutputRequest, ctx: Context) -> Command
                 error_message=f"Process {request.process_id} not found",
             )
 
-        # Get SSH connection
-        client = get_ssh_client_from_config(process.host)
-        if not client:
-            return CommandResult(
-                success=False,
-                process_id=request.process_id,
-                status="failed",
-                error_message="Failed to establish SSH connection",
+        # Get SSH connection, unless the output is spooled locally
+        if process.spool is None:
+            client = await _ssh_call(
+                process.host, get_ssh_client_from_config, process.host
             )
+            if not client:
+                return CommandResult(
+                    success=False,
+                    process_id=request.process_id,
+                    status="failed",
+                    error_message="Failed to establish SSH connection",
+                )
 
         # Quick status check only with timeout
         try:
-            status, _, _, exit_code = get_process_output(
-                client, process, 100
+            status, _, _, exit_code, _, _ = await _ssh_call(
+                process.host, get_process_output, client, process, 100
             )  # Minimal output for status
         except Exception as e:
             if "timeout" in str(e).lower():
@@ -386,8 +543,8 @@ async def get_command_status(request: GetOutputRequest, ctx: Context) -> Command
             error_message=str(e),
         )
     finally:
-        if client and not SSH_CONNECTION_REUSE:
-            client.close()
+        if client and process is not None:
+            await _ssh_call(process.host, release_ssh_client, process.host, client)
 
 
 @mcp.tool()
@@ -414,13 +571,14 @@ async def kill_command(request: KillProcessRequest, ctx: Context) -> KillProcess
         # Check current status first
         if process.status not in ["running"]:
             # Update status by checking if still actually running
-            client = get_ssh_client_from_config(process.host)
+            client = await _ssh_call(
+                process.host, get_ssh_client_from_config, process.host
+            )
             if client and process.pid:
-                stdin, stdout, stderr = client.exec_command(
-                    f"kill -0 {process.pid} 2>/dev/null && echo 'RUNNING' || echo 'STOPPED'"
+                running = await _ssh_call(
+                    process.host, is_process_running, client, process
                 )
-                status_check = stdout.read().decode().strip()
-                if status_check == "STOPPED":
+                if not running:
                     process_manager.update_process(
                         request.process_id, status="completed"
                     )
@@ -432,7 +590,9 @@ async def kill_command(request: KillProcessRequest, ctx: Context) -> KillProcess
 
         # Get SSH connection if not already established
         if not client:
-            client = get_ssh_client_from_config(process.host)
+            client = await _ssh_call(
+                process.host, get_ssh_client_from_config, process.host
+            )
         if not client:
             return KillProcessResult(
                 success=False,
@@ -444,7 +604,9 @@ async def kill_command(request: KillProcessRequest, ctx: Context) -> KillProcess
 
         # Kill the process with timeout
         try:
-            killed, message = kill_background_process(client, process)
+            killed, message = await _ssh_call(
+                process.host, kill_background_process, client, process
+            )
         except Exception as e:
             if "timeout" in str(e).lower():
                 await ctx.warning(
@@ -465,7 +627,9 @@ async def kill_command(request: KillProcessRequest, ctx: Context) -> KillProcess
             cleanup_message = ""
             if request.cleanup_files:
                 await ctx.report_progress(0.8)
-                cleaned = cleanup_process_files(client, process)
+                cleaned = await _ssh_call(
+                    process.host, cleanup_process_files, client, process
+                )
                 if cleaned:
                     cleanup_message = " Files cleaned up."
                 else:
@@ -493,8 +657,8 @@ async def kill_command(request: KillProcessRequest, ctx: Context) -> KillProcess
             error_message=str(e),
         )
     finally:
-        if client and not SSH_CONNECTION_REUSE:
-            client.close()
+        if client and process is not None:
+            await _ssh_call(process.host, release_ssh_client, process.host, client)
 
 
 @mcp.tool()
@@ -505,10 +669,8 @@ async def transfer_file(
     await ctx.info(f"Starting {request.direction} to/from {request.host}")
 
     try:
-        from mcp_ssh.ssh import transfer_file_scp
-
         await ctx.report_progress(0.2)
-        client = get_ssh_client_from_config(request.host)
+        client = await _ssh_call(request.host, get_ssh_client_from_config, request.host)
 
         if client is None:
             return FileTransferResult(
@@ -521,8 +683,13 @@ async def transfer_file(
 
         await ctx.report_progress(0.5)
         try:
-            bytes_transferred = transfer_file_scp(
-                client, request.local_path, request.remote_path, request.direction
+            bytes_transferred = await _ssh_call(
+                request.host,
+                transfer_file_scp,
+                client,
+                request.local_path,
+                request.remote_path,
+                request.direction,
             )
         except Exception as e:
             if "timeout" in str(e).lower():
@@ -538,8 +705,7 @@ async def transfer_file(
                 )
             raise
         finally:
-            if not SSH_CONNECTION_REUSE:
-                client.close()
+            await _ssh_call(request.host, release_ssh_client, request.host, client)
 
         await ctx.report_progress(1.0)
         await ctx.info(f"Successfully transferred {bytes_transferred} bytes")
@@ -574,22 +740,31 @@ def list_ssh_hosts() -> list[HostInfo]:
         if not ssh_configs:
             return []
 
-        hosts = []
-        for host, config in ssh_configs.items():
-            hosts.append(
-                HostInfo(
-                    name=host,
-                    hostname=config.get("hostname", host),
-                    user=config.get("user"),
-                    port=int(config.get("port", 22)),
-                )
-            )
-
-        return hosts
+        return list(get_host_index(ssh_configs).hosts)
     except Exception:
         return []
 
 
+@mcp.tool()
+async def search_ssh_hosts(request: HostSearchRequest) -> HostPage:
+    """Find SSH config hosts a page at a time, filtered by name, hostname, user or port"""
+    try:
+        from mcp_ssh.ssh import parse_ssh_config
+
+        index = get_host_index(parse_ssh_config())
+        hosts, next_cursor = index.search(
+            pattern=request.pattern,
+            hostname=request.hostname,
+            user=request.user,
+            port=request.port,
+            cursor=request.cursor,
+            limit=request.limit,
+        )
+        return HostPage(hosts=hosts, next_cursor=next_cursor)
+    except Exception as e:
+        return HostPage(hosts=[], error_message=str(e))
+
+
 @mcp.prompt()
 def ssh_help() -> str:
     """Get help about using the SSH tools"""
@@ -597,12 +772,15 @@ def ssh_help() -> str:
 
 1. List available SSH hosts:
    - Use the 'ssh://hosts' resource to see all configured hosts
+   - Use the 'search_ssh_hosts' tool to page through large configs, filtered by
+     name pattern, hostname, user or port
 
 2. Execute commands (Background Execution):
    - Use the 'execute_command' tool to run commands in background
    - All commands run in background and return immediately with process_id
    - Waits briefly for quick commands to complete
    - Example: execute_command(host="your-host", command="ls -la")
+   - Use 'execute_command_on_group' to run on every host of an inventory group
 
 3. Get command output:
    - Use 'get_command_output' to retrieve output from background commands
@@ -634,17 +812,23 @@ Background Execution Features:
 Performance Features:
 - Connection reuse for faster subsequent operations
 - Configurable connection pooling
+- Optional connection pre-warming at startup (MCP_SSH_PREWARM_HOSTS)
+- Fast failure for unreachable hosts with background recovery checks
+- Global connection budget with LRU eviction (see get_connection_stats)
 - Comprehensive timeout protection
 - Optimized output reading with retry logic
 
 Environment Configuration:
 - MCP_SSH_MAX_OUTPUT_SIZE: Maximum output size before chunking (default: 50KB)
-- MCP_SSH_QUICK_WAIT_TIME: Wait time for quick commands (default: 5 seconds)
+- MCP_SSH_QUICK_WAIT_TIME: Longest wait for quick commands to finish (default: 5 seconds)
 - MCP_SSH_CHUNK_SIZE: Default chunk size for output retrieval (default: 10KB)
+- MCP_SSH_LOCAL_SPOOL: Spool background output locally over its launch channel (default: false)
+- MCP_SSH_SPOOL_DIR: Directory for spooled output (default: system temp dir)
 - MCP_SSH_CONNECT_TIMEOUT: SSH connection timeout in seconds (default: 30)
 - MCP_SSH_COMMAND_TIMEOUT: SSH command execution timeout in seconds (default: 60)
 - MCP_SSH_TRANSFER_TIMEOUT: File transfer timeout in seconds (default: 300)
 - MCP_SSH_READ_TIMEOUT: Output reading timeout in seconds (default: 30)
+- MCP_SSH_MAX_COMMAND_OUTPUT: Bytes kept per output stream of a direct command (default: 0, all)
 
 Security Configuration:
 - MCP_SSH_SECURITY_MODE: Security mode - 'blacklist', 'whitelist', or 'disabled' (default: blacklist)
@@ -661,6 +845,12 @@ async def get_security_info() -> dict:
     return validator.get_security_info()
 
 
+@mcp.tool()
+async def get_connection_stats() -> dict:
+    """Get SSH connection pool usage, eviction counts and unreachable hosts"""
+    return connection_stats()
+
+
 def main() -> None:
     """Main entry point for the MCP server"""
     import sys
@@ -671,6 +861,12 @@ def main() -> None:
     if len(sys.argv) > 1 and sys.argv[1] in ["stdio", "sse", "streamable-http"]:
         transport = sys.argv[1]  # type: ignore[assignment]
 
+    if SSH_PREWARM_HOSTS and not async_engine.use_async_engine():
+        # Connect in the background so the server starts answering at once
+        threading.Thread(
+            target=prewarm_connections, name="mcp_ssh_prewarm", daemon=True
+        ).start()
+
     mcp.run(transport=transport)
 
 
@@ -0,0 +1,182 @@
+"""
+Remote Files - Random-access reads over SFTP sessions kept per connection
+"""
+
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+
+class _Handle:
+    """An open remote file and the lock serialising its seek and read."""
+
+    def __init__(self, file: paramiko.SFTPFile) -> None:
+        self.file = file
+        self.lock = threading.Lock()
+
+
+class _Session:
+    """An SFTP session on one SSH transport."""
+
+    def __init__(self, sftp: paramiko.SFTPClient) -> None:
+        self.sftp = sftp
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.sftp.get_channel().closed)
+
+
+class RemoteFiles:
+    """
+    Open SFTP sessions and file handles, reused across reads.
+
+    Each SSH transport keeps one SFTP session, and recently read files
+    stay open, so reading a page of a large file is a stat and a read at
+    an offset instead of a remote process scanning from the start. At
+    most max_handles files are kept open; the least recently read is
+    closed first. Sessions are keyed on the transport, held weakly, and
+    dropped with their handles when the connection is closed.
+    """
+
+    def __init__(self, max_handles: int = 64) -> None:
+        self.max_handles = max_handles
+        self._lock = threading.Lock()
+        self._sessions: weakref.WeakKeyDictionary[paramiko.Transport, _Session] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._handles: OrderedDict[tuple[_Session, str], _Handle] = OrderedDict()
+
+    def read(
+        self, client: paramiko.SSHClient, path: str, offset: int, size: int
+    ) -> tuple[bytes, int]:
+        """Read up to size bytes at offset; returns them and the file's size
+
+        A missing file reads as empty with size 0. A failed read on a
+        stale session is retried once on a new one.
+        """
+        try:
+            return self._read(client, path, offset, size)
+        except FileNotFoundError:
+            self.forget(path)
+            return b"", 0
+        except (OSError, EOFError, paramiko.SSHException) as e:
+            logger.debug(f"Reopening SFTP session after: {str(e)}")
+            self.drop(client)
+        try:
+            return self._read(client, path, offset, size)
+        except FileNotFoundError:
+            return b"", 0
+
+    def forget(self, path: str) -> None:
+        """Close the cached handles for path on every connection"""
+        with self._lock:
+            keys = [k for k in self._handles if k[1] == path]
+            handles = [self._handles.pop(k) for k in keys]
+        for handle in handles:
+            _close_quietly(handle.file)
+
+    def drop(self, client: paramiko.SSHClient) -> None:
+        """Close the SFTP session and handles of a connection
+
+        Call before closing the client, while its transport is still known.
+        """
+        transport = client.get_transport()
+        if transport is None:
+            return
+        with self._lock:
+            session = self._sessions.pop(transport, None)
+        if session is not None:
+            self._close_session(session)
+
+    def clear(self) -> None:
+        """Close every cached handle and session"""
+        with self._lock:
+            handles = list(self._handles.values())
+            sessions = list(self._sessions.values())
+            self._handles.clear()
+            self._sessions.clear()
+        for closeable in [h.file for h in handles] + [s.sftp for s in sessions]:
+            _close_quietly(closeable)
+
+    def _read(
+        self, client: paramiko.SSHClient, path: str, offset: int, size: int
+    ) -> tuple[bytes, int]:
+        handle = self._handle(client, path)
+        with handle.lock:
+            file_size = handle.file.stat().st_size or 0
+            if offset >= file_size:
+                return b"", file_size
+            handle.file.seek(offset)
+            return handle.file.read(min(size, file_size - offset)), file_size
+
+    def _handle(self, client: paramiko.SSHClient, path: str) -> _Handle:
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            raise paramiko.SSHException("SSH connection is not active")
+        with self._lock:
+            session = self._sessions.get(transport)
+            if session is not None:
+                handle = self._handles.get((session, path))
+                if handle is not None:
+                    self._handles.move_to_end((session, path))
+                    return handle
+
+        if session is None or session.closed:
+            if session is not None:
+                self.drop(client)  # Its handles died with the session
+            session = self._open_session(client, transport)
+
+        key = (session, path)
+        handle = _Handle(session.sftp.open(path, "rb"))
+        with self._lock:
+            existing = self._handles.get(key)
+            if existing is not None:  # Opened concurrently by another read
+                _close_quietly(handle.file)
+                return existing
+            self._handles[key] = handle
+            evicted = []
+            while len(self._handles) > self.max_handles:
+                evicted.append(self._handles.popitem(last=False)[1])
+        for old in evicted:
+            _close_quietly(old.file)
+        return handle
+
+    def _open_session(
+        self, client: paramiko.SSHClient, transport: paramiko.Transport
+    ) -> _Session:
+        """Open an SFTP session on client, dropping those of closed connections"""
+        session = _Session(client.open_sftp())
+        with self._lock:
+            existing = self._sessions.get(transport)
+            if existing is not None and not existing.closed:
+                stale = [session]  # Opened concurrently by another read
+                session = existing
+            else:
+                self._sessions[transport] = session
+                stale = []
+            for other in list(self._sessions):
+                if not other.is_active():
+                    stale.append(self._sessions.pop(other))
+        for old in stale:
+            self._close_session(old)
+        return session
+
+    def _close_session(self, session: _Session) -> None:
+        with self._lock:
+            keys = [k for k in self._handles if k[0] is session]
+            handles = [self._handles.pop(k) for k in keys]
+        for handle in handles:
+            _close_quietly(handle.file)
+        _close_quietly(session.sftp)
+
+
+def _close_quietly(closeable: paramiko.SFTPFile | paramiko.SFTPClient) -> None:
+    try:
+        closeable.close()
+    except Exception as e:
+        logger.debug(f"Ignoring error closing SFTP object: {str(e)}")
@@ -0,0 +1,71 @@
+"""
+Output Slices - Pages of UTF-8 output cut on character boundaries without copying
+"""
+
+import mmap
+
+# Longest UTF-8 encoding of one character
+_MAX_CHAR_BYTES = 4
+
+
+def utf8_slice(
+    data: bytes | bytearray | memoryview | mmap.mmap, start: int, size: int
+) -> tuple[str, int, int]:
+    """Decode up to size bytes of data from start, cut on character boundaries
+
+    A start inside a character moves forward to the next one. A character
+    the page cannot hold whole, including one still being written at the
+    end of data, is left for the next page, unless it is the only one and
+    complete, in which case it is returned whole. Data is sliced through a
+    memoryview, so only the returned text is allocated. Returns the text
+    and the byte offsets where it starts and ends; the end is the next
+    page's start.
+    """
+    with memoryview(data) as view:
+        length = len(view)
+        start = min(max(start, 0), length)
+        skipped = 0
+        while start < length and _is_continuation(view[start]):
+            if skipped == _MAX_CHAR_BYTES - 1:
+                break  # Not a character at all; leave it to the decoder
+            start += 1
+            skipped += 1
+
+        end = _boundary(view, min(start + max(size, 0), length), start)
+        if end == start and start < length and size > 0:
+            # Not even one character fits, so return it rather than nothing,
+            # but only once all of it has arrived
+            whole = start + _char_length(view[start])
+            if whole <= length:
+                end = whole
+
+        with view[start:end] as page:
+            return str(page, "utf-8", "replace"), start, end
+
+
+def _is_continuation(byte: int) -> bool:
+    return byte & 0xC0 == 0x80
+
+
+def _char_length(lead: int) -> int:
+    """Bytes in the character a lead byte starts; 1 for invalid bytes"""
+    if lead < 0xC0:
+        return 1
+    if lead < 0xE0:
+        return 2
+    if lead < 0xF0:
+        return 3
+    if lead < 0xF8:
+        return 4
+    return 1
+
+
+def _boundary(view: memoryview, end: int, floor: int) -> int:
+    """The last character boundary at or before end, and not before floor"""
+    lowest = max(floor, end - _MAX_CHAR_BYTES)
+    for lead in range(end - 1, lowest - 1, -1):
+        if not _is_continuation(view[lead]):
+            if lead + _char_length(view[lead]) > end:
+                return lead
+            return end
+    return end
@@ -0,0 +1,212 @@
+"""
+Output Spool - Background job output streamed into local files as it is produced
+"""
+
+import logging
+import mmap
+import os
+import stat
+import threading
+from collections.abc import Callable
+from typing import BinaryIO
+
+import paramiko
+
+from .slices import utf8_slice
+from .streams import read_until_eof
+
+logger = logging.getLogger(__name__)
+
+
+class OutputSpool:
+    """
+    Local copy of a background job's stdout and stderr.
+
+    The job runs on a channel kept open for its lifetime; a thread writes
+    whatever the channel receives to local files, so status and output
+    are served without network I/O. The first stdout line is the remote
+    PID printed by the launch wrapper and is not spooled. The exit code
+    comes from the channel's exit-status message. on_close runs once the
+    channel is done, to release its connection. Pages are read through a
+    memory map of the spool file, so paging a large output allocates only
+    the returned text. The files are readable only by the current user.
+    """
+
+    def __init__(
+        self,
+        channel: paramiko.Channel,
+        stdout_path: str,
+        stderr_path: str,
+        on_close: Callable[[], None] | None = None,
+    ) -> None:
+        self.channel = channel
+        self.stdout_path = stdout_path
+        self.stderr_path = stderr_path
+        self.pid: int | None = None
+        self.exit_code: int | None = None
+        self.finished = False
+        self.sizes = [0, 0]  # Bytes spooled from stdout, stderr
+        self._on_close = on_close
+        self._cond = threading.Condition()
+        self._pid_line = b""
+        self._pid_seen = False
+        self._maps: list[mmap.mmap | None] = [None, None]
+        self._map_lock = threading.Lock()
+        _private_dir(os.path.dirname(stdout_path))
+        self._files = [_create(stdout_path)]
+        try:
+            self._files.append(_create(stderr_path))
+        except OSError:
+            self._files[0].close()
+            raise
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def wait_for_pid(self, timeout: float) -> int | None:
+        """The remote PID, once the launch wrapper has printed it"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pid_seen or self.finished, timeout)
+            return self.pid
+
+    def wait(self, timeout: float, min_output: int) -> bool:
+        """Wait until the job exits or has written min_output bytes of stdout
+
+        Returns whether the job has finished.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self.finished or self.sizes[0] >= min_output, timeout
+            )
+            return self.finished
+
+    def snapshot(self, max_size: int) -> tuple[str, str, str, int | None, int, int]:
+        """The job's state and output, as get_process_output reports them"""
+        with self._cond:
+            status = "completed" if self.finished else "running"
+            exit_code = self.exit_code
+        output, output_end, output_size = self.page(0, 0, max_size)
+        errors, _, _ = self.page(1, 0, max_size // 2)
+        return status, output, errors, exit_code, output_end, output_size
+
+    def page(self, stream: int, offset: int, size: int) -> tuple[str, int, int]:
+        """Up to size bytes of stdout (0) or stderr (1) at offset, as text
+
+        The page is cut on character boundaries; see utf8_slice. Returns
+        the text, the offset where the next page starts and the bytes
+        spooled so far.
+        """
+        with self._cond:
+            spooled = self.sizes[stream]
+        if not spooled:
+            return "", 0, 0
+        with self._map_lock:
+            mapped = self._map(stream, spooled)
+            if mapped is None:
+                return "", 0, 0
+            text, _, end = utf8_slice(mapped, offset, size)
+        return text, end, spooled
+
+    def remove(self) -> None:
+        """Stop spooling and delete the local files"""
+        self.channel.close()
+        self._thread.join(timeout=5)
+        with self._map_lock:
+            for stream, mapped in enumerate(self._maps):
+                if mapped is not None:
+                    mapped.close()
+                    self._maps[stream] = None
+        for path in (self.stdout_path, self.stderr_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _map(self, stream: int, size: int) -> mmap.mmap | None:
+        """A read-only map of the first size bytes of a spool file
+
+        The map is kept and only replaced once more output has been spooled.
+        """
+        mapped = self._maps[stream]
+        if mapped is not None and len(mapped) == size:
+            return mapped
+        path = (self.stdout_path, self.stderr_path)[stream]
+        try:
+            with open(path, "rb") as f:
+                new = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None  # Removed
+        if mapped is not None:
+            mapped.close()
+        self._maps[stream] = new
+        return new
+
+    def _run(self) -> None:
+        try:
+            read_until_eof(
+                self.channel, self._stdout, lambda data: self._write(1, data)
+            )
+            self.channel.status_event.wait()
+            exit_code = self.channel.exit_status
+        except Exception as e:
+            logger.warning(f"Spooling output failed: {str(e)}")
+            exit_code = -1
+        finally:
+            for f in self._files:
+                f.close()
+
+        with self._cond:
+            self.exit_code = exit_code if exit_code >= 0 else None
+            self.finished = True
+            self._cond.notify_all()
+        logger.debug(f"Spooled job {self.pid} exited with {self.exit_code}")
+        self.channel.close()
+        if self._on_close is not None:
+            self._on_close()
+
+    def _stdout(self, data: bytes) -> None:
+        """Spool stdout, less the PID line"""
+        if not self._pid_seen:
+            data = self._take_pid(data)
+        self._write(0, data)
+
+    def _take_pid(self, data: bytes) -> bytes:
+        """Strip the PID line from the start of stdout"""
+        self._pid_line += data
+        line, newline, rest = self._pid_line.partition(b"\n")
+        if not newline:
+            return b""
+        with self._cond:
+            self._pid_seen = True
+            try:
+                self.pid = int(line)
+            except ValueError:
+                logger.error(f"Failed to parse PID from output: {line!r}")
+            self._cond.notify_all()
+        return rest
+
+    def _write(self, stream: int, data: bytes) -> None:
+        if not data:
+            return
+        self._files[stream].write(data)
+        self._files[stream].flush()
+        with self._cond:
+            self.sizes[stream] += len(data)
+            self._cond.notify_all()
+
+
+def _private_dir(path: str) -> None:
+    """Create path for this user only, refusing one another user owns"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or (
+        hasattr(os, "getuid") and info.st_uid != os.getuid()
+    ):
+        raise PermissionError(f"Spool directory {path} is not owned by this user")
+    if stat.S_IMODE(info.st_mode) & 0o077:
+        os.chmod(path, 0o700)
+
+
+def _create(path: str) -> BinaryIO:
+    """Open a new spool file that only the current user can read"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    return os.fdopen(fd, "wb")
@@ -2,15 +2,34 @@
 SSH Client - Core SSH functionality
 """
 
+import fnmatch
+import getpass
 import logging
 import os
+import shlex
 import sys
+import tempfile
 import time
+from collections.abc import Callable, Mapping
 from pathlib import Path
+from typing import Any
 
 import paramiko
 
+from .auth import AgentError, AgentIdentities, AuthHints, Identity
 from .background import BackgroundProcess
+from .breaker import CircuitBreaker
+from .config import SSHConfig
+from .executor import run_blocking
+from .inventory import Inventory
+from .keepalive import KeepaliveScheduler
+from .keys import KeyCache, detect_key_class
+from .pool import ConnectionPool
+from .sftp import RemoteFiles
+from .slices import utf8_slice
+from .spool import OutputSpool
+from .streams import drain_channel
+from .waits import wait_for_exit_status, wait_for_exit_status_async
 
 # Timeout configuration from environment variables
 SSH_CONNECT_TIMEOUT = int(
@@ -23,6 +42,9 @@ SSH_TRANSFER_TIMEOUT = int(
     os.getenv("MCP_SSH_TRANSFER_TIMEOUT", "300")
 )  # 5 minutes default
 SSH_READ_TIMEOUT = int(os.getenv("MCP_SSH_READ_TIMEOUT", "30"))  # 30 seconds default
+SSH_MAX_COMMAND_OUTPUT = int(
+    os.getenv("MCP_SSH_MAX_COMMAND_OUTPUT", "0")
+)  # Bytes of stdout and of stderr kept per command; 0 keeps all
 
 # Connection optimization settings
 SSH_CONNECTION_POOL_SIZE = int(
@@ -30,10 +52,74 @@ SSH_CONNECTION_POOL_SIZE = int(
 )  # Default pool size
 SSH_CONNECTION_REUSE = (
     os.getenv("MCP_SSH_CONNECTION_REUSE", "false").lower() == "true"
-)  # Disable connection reuse by default for stability
-
-# Simple connection cache for performance
-_connection_cache: dict[str, tuple[paramiko.SSHClient, float]] = {}
+)  # Disable keeping idle connections by default for stability
+SSH_MAX_SESSIONS = int(
+    os.getenv("MCP_SSH_MAX_SESSIONS", "10")
+)  # Concurrent channels per connection, matching OpenSSH's MaxSessions default
+SSH_POOL_IDLE_TIMEOUT = int(
+    os.getenv("MCP_SSH_POOL_IDLE_TIMEOUT", "300")
+)  # Close pooled connections idle for 5 minutes
+SSH_POOL_WAIT_TIMEOUT = int(
+    os.getenv("MCP_SSH_POOL_WAIT_TIMEOUT", str(SSH_CONNECT_TIMEOUT))
+)  # How long to wait for a free pooled connection
+SSH_LIVENESS_PROBE_IDLE = int(
+    os.getenv("MCP_SSH_LIVENESS_PROBE_IDLE", "60")
+)  # Probe reused connections only after 60 seconds without traffic
+SSH_MAX_CONNECTIONS = int(
+    os.getenv("MCP_SSH_MAX_CONNECTIONS", "100")
+)  # Open connections across all hosts; least recently used idle ones go first
+SSH_POOL_REAP_INTERVAL = int(
+    os.getenv("MCP_SSH_POOL_REAP_INTERVAL", "30")
+)  # Seconds between sweeps closing idle and dead connections; 0 disables
+
+# Connection pre-warming at startup
+SSH_PREWARM_HOSTS = os.getenv(
+    "MCP_SSH_PREWARM_HOSTS", ""
+)  # Comma-separated hosts to connect at startup, or "all"; empty disables
+SSH_PREWARM_CONCURRENCY = int(
+    os.getenv("MCP_SSH_PREWARM_CONCURRENCY", "8")
+)  # Hosts connected in parallel during warm-up
+SSH_PREWARM_KEEPALIVE = int(
+    os.getenv("MCP_SSH_PREWARM_KEEPALIVE", "30")
+)  # Keepalive interval in seconds for pre-warmed connections
+
+# Circuit breaker for unreachable hosts
+SSH_BREAKER_THRESHOLD = int(
+    os.getenv("MCP_SSH_BREAKER_THRESHOLD", "2")
+)  # Consecutive connect failures before failing fast; 0 disables
+SSH_BREAKER_BACKOFF = int(
+    os.getenv("MCP_SSH_BREAKER_BACKOFF", "5")
+)  # Seconds before the first background recovery check
+SSH_BREAKER_MAX_BACKOFF = int(
+    os.getenv("MCP_SSH_BREAKER_MAX_BACKOFF", "300")
+)  # Upper bound for the doubling recovery check interval
+
+# Authentication
+SSH_AUTH_MODE = os.getenv(
+    "MCP_SSH_AUTH_MODE", "auto"
+).lower()  # 'key': identity file only, 'agent': ssh-agent only, 'auto': both
+SSH_AUTH_HINTS = os.getenv(
+    "MCP_SSH_AUTH_HINTS", "~/.cache/mcp_ssh/auth_hints.json"
+)  # Identity that last authenticated each host; empty keeps it in memory
+
+# Seconds between remote checks while waiting for a background process
+_WAIT_INTERVAL = 0.05
+
+# Key files offered after the configured key and the agent, like ssh does
+_DEFAULT_KEY_FILES = ("id_rsa", "id_ecdsa", "id_ed25519")
+
+# Local spooling of background job output
+SSH_LOCAL_SPOOL = (
+    os.getenv("MCP_SSH_LOCAL_SPOOL", "false").lower() == "true"
+)  # Stream job output over its launch channel into local files
+SSH_SPOOL_DIR = os.getenv(
+    "MCP_SSH_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "mcp_ssh_spool")
+)  # Where spooled output is kept
+
+# Host inventory files alongside ~/.ssh/config
+SSH_INVENTORY = os.getenv(
+    "MCP_SSH_INVENTORY", ""
+)  # Comma-separated JSON, YAML or INI inventory files; empty disables
 
 # Set up logging to file
 log_dir = Path(__file__).parent.parent.parent / "logs"
@@ -62,185 +148,508 @@ env_vars = {
 logger.debug(f"Environment variables: {env_vars}")
 
 
-def parse_ssh_config() -> dict[str, dict[str, str]]:
-    """Parse the SSH config file (~/.ssh/config) and return host configurations"""
+# Parsed SSH configs keyed by path, with the signature of the files they were read from
+_config_cache: dict[str, tuple[tuple[tuple[str, int, int], ...], SSHConfig]] = {}
+
+
+def parse_ssh_config() -> Mapping[str, dict[str, str]]:
+    """Parse the SSH config file (~/.ssh/config) and return host configurations
+
+    Returns a mapping of each concrete Host alias to its options, resolved
+    with OpenSSH semantics (wildcard blocks, Include, Match, first value
+    wins). The parsed config is cached and only re-read when the config
+    file or one of its includes changes. It is shared between callers and
+    must not be modified.
+    """
     config_file = os.path.expanduser("~/.ssh/config")
-    logger.debug(f"Reading SSH config from: {config_file}")
 
     if not os.path.exists(config_file):
         logger.error(f"SSH config file not found at: {config_file}")
         return {}
 
-    hosts: dict[str, dict[str, str]] = {}
-    current_host = None
+    cached = _config_cache.get(config_file)
+    if cached is not None and cached[1].signature() == cached[0]:
+        return cached[1]
 
+    logger.debug(f"Reading SSH config from: {config_file}")
     try:
-        with open(config_file) as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-
-                if line.lower().startswith("host "):
-                    host_pattern = line[5:].strip()
-                    if "*" in host_pattern or "?" in host_pattern:
-                        current_host = None
-                        continue
-                    current_host = host_pattern
-                    hosts[current_host] = {}
-                    logger.debug(f"Found host: {current_host}")
-                elif current_host and "=" in line:
-                    key, value = line.split("=", 1)
-                    key = key.strip().lower()
-                    value = value.strip()
-                    hosts[current_host][key] = value
-                    logger.debug(f"Added config for {current_host}: {key}={value}")
-                elif current_host and " " in line:
-                    parts = line.split(" ", 1)
-                    key = parts[0].strip().lower()
-                    value = parts[1].strip() if len(parts) > 1 else ""
-                    hosts[current_host][key] = value
-                    logger.debug(f"Added config for {current_host}: {key}={value}")
-
-        logger.debug(f"Parsed hosts: {list(hosts.keys())}")
-        return hosts
+        config = SSHConfig.load(config_file)
     except Exception as e:
         logger.error(f"Error parsing SSH config: {str(e)}")
         return {}
 
+    # Without a signature it cannot be told whether it changed, so do not cache
+    signature = config.signature()
+    if signature is not None:
+        _config_cache[config_file] = (signature, config)
+    return config
 
-def get_ssh_client_from_config(config_host: str) -> paramiko.SSHClient | None:
-    """Get an SSH client connected using only the SSH config host name"""
-    logger.debug(f"Attempting to connect to host: {config_host}")
 
-    # Check connection cache first (skip in test environment)
-    if (
-        SSH_CONNECTION_REUSE
-        and config_host in _connection_cache
-        and "pytest" not in sys.modules
-    ):
-        client, timestamp = _connection_cache[config_host]
-        # Check if connection is still valid (cache for 5 minutes)
-        if time.time() - timestamp < 300:
-            try:
-                # Test if connection is still alive
-                client.exec_command("echo 'test'", timeout=5)
-                logger.debug(f"Reusing cached connection to {config_host}")
-                return client
-            except Exception:
-                # Connection is dead, remove from cache
-                logger.debug(
-                    f"Cached connection to {config_host} is dead, removing from cache"
-                )
-                del _connection_cache[config_host]
+# Loaded inventories keyed by their file list, with the files' signature
+_inventory_cache: dict[str, tuple[tuple[tuple[str, int, int], ...], Inventory]] = {}
+
+
+def load_inventory(paths: str | None = None) -> Inventory | None:
+    """Load the comma-separated inventory files, None if unset or unreadable
+
+    paths defaults to MCP_SSH_INVENTORY. The inventory is cached and only
+    re-read when one of its files changes.
+    It is shared between callers and must not be modified.
+    """
+    if paths is None:
+        paths = SSH_INVENTORY
+    files = [os.path.expanduser(p.strip()) for p in paths.split(",") if p.strip()]
+    if not files:
+        return None
+
+    cached = _inventory_cache.get(paths)
+    if cached is not None and cached[1].signature() == cached[0]:
+        return cached[1]
+
+    try:
+        inventory = Inventory.load(files)
+    except Exception as e:
+        logger.error(f"Error loading inventory {paths}: {str(e)}")
+        return None
+
+    signature = inventory.signature()
+    if signature is not None:
+        _inventory_cache[paths] = (signature, inventory)
+    return inventory
+
 
+def resolve_host_config(host: str) -> dict[str, str] | None:
+    """Settings for an SSH config host or inventory host, None if unknown
+
+    Hosts in ~/.ssh/config take precedence. For inventory hosts, matching
+    wildcard blocks of the SSH config supply defaults that the inventory
+    variables override.
+    """
     hosts = parse_ssh_config()
+    if host in hosts:
+        return hosts[host]
+
+    inventory = load_inventory()
+    if inventory is None or host not in inventory:
+        return None
+    defaults = hosts.resolve(host) if isinstance(hosts, SSHConfig) else {}
+    return {**defaults, **inventory[host]}
+
+
+def inventory_group(group: str) -> list[str] | None:
+    """Hosts in an inventory group, None if there is no such group"""
+    inventory = load_inventory()
+    return inventory.members(group) if inventory is not None else None
+
 
-    if config_host not in hosts:
-        logger.error(f"Host '{config_host}' not found in SSH config")
+def _pool_enabled() -> bool:
+    """Connections are shared through the pool, except under test"""
+    return "pytest" not in sys.modules
+
+
+def get_ssh_client_from_config(config_host: str) -> paramiko.SSHClient | None:
+    """Get an SSH client connected using only the SSH config host name
+
+    Concurrent callers for the same host share one authenticated transport,
+    each opening its own channel. The client must be handed back with
+    release_ssh_client(); with connection reuse enabled it then stays open
+    for later calls.
+
+    Raises HostUnavailableError without connecting if recent attempts to
+    the host failed and it has not been seen to recover since.
+    """
+    _circuit_breaker.check(config_host)
+    if _pool_enabled():
+        return _connection_pool.checkout(config_host)
+    return _connect_from_config(config_host)
+
+
+def release_ssh_client(config_host: str, client: paramiko.SSHClient) -> None:
+    """Return a client from get_ssh_client_from_config when done with it"""
+    if _pool_enabled():
+        _connection_pool.checkin(config_host, client)
+    else:
+        _remote_files.drop(client)
+        client.close()
+
+
+def prewarm_connections(hosts: str = SSH_PREWARM_HOSTS) -> dict[str, bool]:
+    """Connect ahead of the first call to a comma-separated list of hosts
+
+    "all" warms every concrete host in the SSH config. Returns whether each
+    host ended up with a live pooled connection.
+    """
+    if hosts.strip().lower() == "all":
+        names = list(parse_ssh_config())
+    else:
+        names = [h.strip() for h in hosts.split(",") if h.strip()]
+
+    if not names or not _pool_enabled():
+        return {}
+
+    logger.info(f"Pre-warming SSH connections to {len(names)} hosts")
+    return _connection_pool.prewarm(
+        names, concurrency=SSH_PREWARM_CONCURRENCY, keepalive=SSH_PREWARM_KEEPALIVE
+    )
+
+
+def connection_stats() -> dict[str, Any]:
+    """Pool usage, eviction counters, hosts currently failing fast and key cache use"""
+    return {
+        "pool": _connection_pool.totals(),
+        "hosts": _connection_pool.stats(),
+        "unreachable": _circuit_breaker.stats(),
+        "keys": _key_cache.stats(),
+    }
+
+
+def _connect_from_config(
+    config_host: str, keepalive: bool = True
+) -> paramiko.SSHClient | None:
+    """Open a new SSH connection for an SSH config host name
+
+    With keepalive off the connection is not watched by the keepalive
+    scheduler, for connections closed straight away.
+    """
+    logger.debug(f"Attempting to connect to host: {config_host}")
+
+    host_config = resolve_host_config(config_host)
+    if host_config is None:
+        logger.error(f"Host '{config_host}' not found in SSH config or inventory")
         return None
 
-    host_config = hosts[config_host]
     logger.debug(f"Found config for {config_host}: {host_config}")
 
     client = paramiko.SSHClient()
     client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
     try:
-        # Get the key file path from config or environment
-        key_filename = host_config.get(
-            "identityfile", os.environ.get("SSH_KEY_FILE", "~/.ssh/id_rsa")
-        )
-        loaded_key = None
-
-        if key_filename:
-            key_filename = os.path.expanduser(key_filename.strip("\"'"))
-            logger.debug(f"Using key file: {key_filename}")
-
-            # If key is encrypted, use the passphrase from environment
-            if os.path.exists(key_filename):
-                try:
-                    # Try to load the key without passphrase first
-                    logger.debug("Attempting to load key without passphrase")
-                    loaded_key = paramiko.RSAKey.from_private_key_file(key_filename)
-                    logger.debug("Successfully loaded key without passphrase")
-                except paramiko.SSHException as e:
-                    logger.debug(f"Key requires passphrase: {str(e)}")
-                    # If that fails, try with the passphrase
-                    ssh_key_phrase = os.environ.get("SSH_KEY_PHRASE")
-                    if ssh_key_phrase:
-                        logger.debug(
-                            f"SSH_KEY_PHRASE is set in environment: {ssh_key_phrase}"
-                        )
-                        try:
-                            loaded_key = paramiko.RSAKey.from_private_key_file(
-                                key_filename, password=ssh_key_phrase
-                            )
-                            logger.debug("Successfully loaded key with passphrase")
-
-                            # Log key details
-                            if loaded_key:
-                                # Get the fingerprint
-                                fingerprint = loaded_key.get_fingerprint().hex()
-                                logger.debug(f"Key fingerprint: {fingerprint}")
-
-                                # Get the public key
-                                public_key = loaded_key.get_base64()
-                                logger.debug(f"Public key: {public_key}")
-
-                                # Get the key type
-                                key_type = loaded_key.get_name()
-                                logger.debug(f"Key type: {key_type}")
-
-                                # Get the key size
-                                key_size = loaded_key.get_bits()
-                                logger.debug(f"Key size: {key_size} bits")
-                        except Exception as e:
-                            logger.error(
-                                f"Failed to load key with passphrase: {str(e)}"
-                            )
-                            return None
-                    else:
-                        logger.error(
-                            "Private key is encrypted but SSH_KEY_PHRASE is not set in environment"
-                        )
-                        return None
-            else:
-                logger.error(f"Key file does not exist: {key_filename}")
-                return None
-        else:
-            logger.debug("No key file specified in SSH config or environment")
+        identities = _identities(config_host, host_config)
+        if identities is None:
+            return None
 
+        username = host_config.get("user")
         connect_kwargs = {
             "hostname": host_config.get("hostname", config_host),
             "port": int(host_config.get("port", 22)),
-            "username": host_config.get("user"),
+            "username": username,
             "look_for_keys": True,
             "timeout": SSH_CONNECT_TIMEOUT,
         }
 
-        # Add the loaded key if we have one
-        if loaded_key:
-            connect_kwargs["pkey"] = loaded_key
+        # Offer one identity in connect() so its success can be attributed;
+        # the rest are offered on the same transport if it is rejected
+        identity = _next_identity(identities)
+        if identity is not None:
+            connect_kwargs["pkey"] = identity.key
+            connect_kwargs["look_for_keys"] = False
+            connect_kwargs["allow_agent"] = False
+        elif SSH_AUTH_MODE != "key":
+            # Agent keys come from the shared listing rather than a new
+            # agent connection per connect
+            connect_kwargs["allow_agent"] = False
+
+        if host_config.get("compression", "").lower() == "yes":
+            connect_kwargs["compress"] = True
+        preferences = _algorithm_preferences(config_host, host_config)
+        if preferences:
+            connect_kwargs["transport_factory"] = _transport_factory(preferences)
 
         # Remove None values
         connect_kwargs = {k: v for k, v in connect_kwargs.items() if v is not None}
         logger.debug(f"Connection parameters: {connect_kwargs}")
 
-        client.connect(**connect_kwargs)
+        try:
+            client.connect(**connect_kwargs)
+        except paramiko.AuthenticationException:
+            # The transport stays up after a rejected key; offer the rest on it
+            identity = _auth_with_identities(
+                client, username or getpass.getuser(), identities
+            )
+            if identity is None:
+                raise
+        if identity is not None:
+            _auth_hints.record(config_host, identity)
+            if identity.method == "agent":
+                _agent_identities.record_success(config_host, identity.key)
         logger.info(f"Successfully connected to {config_host}")
-
-        # Cache the connection if reuse is enabled
-        if SSH_CONNECTION_REUSE:
-            _connection_cache[config_host] = (client, time.time())
-            logger.debug(f"Cached connection to {config_host}")
-
+        _circuit_breaker.record_success(config_host)
+        if keepalive:
+            _start_keepalive(config_host, client, host_config)
         return client
     except Exception as e:
         logger.error(f"Failed to connect to {config_host}: {str(e)}")
+        if isinstance(e, AgentError):
+            # The local agent failed, not the host; list its keys afresh
+            _agent_identities.reset()
+        elif not isinstance(e, paramiko.AuthenticationException):
+            # The host answered if authentication failed, so it is not down
+            _circuit_breaker.record_failure(config_host, str(e))
         return None
 
 
+def _identities(
+    config_host: str, host_config: Mapping[str, str]
+) -> list[Identity] | None:
+    """Keys to offer a host, the one that last authenticated it first
+
+    The configured IdentityFile, then ssh-agent identities, then the
+    default ~/.ssh/id_* files, as allowed by MCP_SSH_AUTH_MODE. Default
+    key files are only loaded if they are offered. Returns None if the
+    host cannot be authenticated.
+    """
+    key_filename = host_config.get(
+        "identityfile", os.environ.get("SSH_KEY_FILE", "~/.ssh/id_rsa")
+    )
+    identities: list[Identity] = []
+
+    if key_filename and SSH_AUTH_MODE != "agent":
+        key_filename = os.path.expanduser(key_filename.strip("\"'"))
+        logger.debug(f"Using key file: {key_filename}")
+        if os.path.exists(key_filename):
+            loaded_key = _key_cache.get(key_filename, _load_private_key)
+            if loaded_key is None:
+                return None
+            identities.append(Identity("key", key_filename, loaded_key))
+        else:
+            logger.debug(f"Key file {key_filename} not found")
+    elif not key_filename:
+        logger.debug("No key file specified in SSH config or environment")
+
+    if SSH_AUTH_MODE != "key":
+        identities.extend(
+            Identity("agent", key.get_fingerprint().hex(), key)
+            for key in _agent_identities.keys(config_host)
+        )
+
+    if SSH_AUTH_MODE != "agent":
+        for name in _DEFAULT_KEY_FILES:
+            path = os.path.expanduser(f"~/.ssh/{name}")
+            if path != key_filename and os.path.exists(path):
+                identities.append(Identity("default", path))
+
+    if identities or (not key_filename and SSH_AUTH_MODE != "agent"):
+        return _auth_hints.order(config_host, identities)
+    if SSH_AUTH_MODE == "agent":
+        logger.error("MCP_SSH_AUTH_MODE=agent but ssh-agent offers no identities")
+    else:
+        logger.error(f"Key file does not exist: {key_filename}")
+    return None
+
+
+def _next_identity(identities: list[Identity]) -> Identity | None:
+    """Remove and return the first identity whose key loads"""
+    while identities:
+        identity = identities.pop(0)
+        if identity.key is None:
+            identity.key = _key_cache.get(identity.name, _load_private_key)
+        if identity.key is not None:
+            return identity
+    return None
+
+
+def _auth_with_identities(
+    client: paramiko.SSHClient, username: str, identities: list[Identity]
+) -> Identity | None:
+    """Try further identities on a connected transport after a rejected key"""
+    while (identity := _next_identity(identities)) is not None:
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            return None  # The server gave up, e.g. at its MaxAuthTries
+        try:
+            transport.auth_publickey(username, identity.key)
+        except paramiko.AuthenticationException:
+            continue
+        return identity
+    return None
+
+
+def _load_private_key(key_filename: str) -> paramiko.PKey | None:
+    """Load a private key file, decrypting it with SSH_KEY_PHRASE if needed"""
+    key_class = detect_key_class(key_filename)
+    logger.debug(f"Loading {key_filename} as {key_class.__name__}")
+    loaded_key = None
+    try:
+        # Try to load the key without passphrase first
+        logger.debug("Attempting to load key without passphrase")
+        loaded_key = key_class.from_private_key_file(key_filename)
+        logger.debug("Successfully loaded key without passphrase")
+    except paramiko.SSHException as e:
+        logger.debug(f"Key requires passphrase: {str(e)}")
+        # If that fails, try with the passphrase
+        ssh_key_phrase = os.environ.get("SSH_KEY_PHRASE")
+        if ssh_key_phrase:
+            logger.debug(f"SSH_KEY_PHRASE is set in environment: {ssh_key_phrase}")
+            try:
+                loaded_key = key_class.from_private_key_file(
+                    key_filename, password=ssh_key_phrase
+                )
+                logger.debug("Successfully loaded key with passphrase")
+
+                # Log key details
+                if loaded_key:
+                    # Get the fingerprint
+                    fingerprint = loaded_key.get_fingerprint().hex()
+                    logger.debug(f"Key fingerprint: {fingerprint}")
+
+                    # Get the public key
+                    public_key = loaded_key.get_base64()
+                    logger.debug(f"Public key: {public_key}")
+
+                    # Get the key type
+                    key_type = loaded_key.get_name()
+                    logger.debug(f"Key type: {key_type}")
+
+                    # Get the key size
+                    key_size = loaded_key.get_bits()
+                    logger.debug(f"Key size: {key_size} bits")
+            except Exception as e:
+                logger.error(f"Failed to load key with passphrase: {str(e)}")
+                return None
+        else:
+            logger.error(
+                "Private key is encrypted but SSH_KEY_PHRASE is not set in environment"
+            )
+            return None
+    return loaded_key
+
+
+# ssh config keyword -> (paramiko SecurityOptions attribute, algorithms in
+# paramiko's default preference order, which are all it supports)
+_ALGORITHM_KEYWORDS = {
+    "ciphers": ("ciphers", paramiko.Transport._preferred_ciphers),
+    "kexalgorithms": ("kex", paramiko.Transport._preferred_kex),
+    "macs": ("digests", paramiko.Transport._preferred_macs),
+}
+
+# OpenSSH names paramiko only knows under another name
+_ALGORITHM_ALIASES = {"curve25519-sha256": "curve25519-sha256@libssh.org"}
+
+
+def _algorithm_preferences(
+    config_host: str, host_config: dict[str, str]
+) -> dict[str, tuple[str, ...]]:
+    """Resolve Ciphers, KexAlgorithms and MACs to paramiko preference lists"""
+    preferences = {}
+    for keyword, (option, defaults) in _ALGORITHM_KEYWORDS.items():
+        value = host_config.get(keyword, "").strip()
+        if not value:
+            continue
+        algorithms = _resolve_algorithms(value, defaults)
+        if algorithms:
+            preferences[option] = algorithms
+        else:
+            logger.warning(
+                f"No {keyword} supported by paramiko in '{value}' "
+                f"for {config_host}, using defaults"
+            )
+    return preferences
+
+
+def _resolve_algorithms(value: str, defaults: tuple[str, ...]) -> tuple[str, ...]:
+    """Apply an OpenSSH algorithm list, including +, - and ^ prefixes"""
+    prefix = value[0] if value[0] in "+-^" else ""
+    patterns = [
+        _ALGORITHM_ALIASES.get(name.strip(), name.strip())
+        for name in value.lstrip("+-^").split(",")
+        if name.strip()
+    ]
+
+    if prefix == "-":
+        return tuple(
+            a for a in defaults if not any(fnmatch.fnmatch(a, p) for p in patterns)
+        )
+
+    requested: list[str] = []
+    for pattern in patterns:
+        matches = fnmatch.filter(defaults, pattern)
+        if not matches:
+            logger.debug(f"Algorithm '{pattern}' is not supported by paramiko")
+        requested.extend(m for m in matches if m not in requested)
+
+    if prefix == "+":
+        # Everything paramiko supports is already enabled by default
+        return defaults
+    if prefix == "^":
+        return tuple(requested) + tuple(a for a in defaults if a not in requested)
+    return tuple(requested)
+
+
+def _transport_factory(
+    preferences: dict[str, tuple[str, ...]],
+) -> Callable[..., paramiko.Transport]:
+    """Transport factory for SSHClient.connect applying algorithm preferences"""
+
+    def factory(sock: Any, **kwargs: Any) -> paramiko.Transport:
+        transport = paramiko.Transport(sock, **kwargs)
+        options = transport.get_security_options()
+        for option, algorithms in preferences.items():
+            setattr(options, option, algorithms)
+        return transport
+
+    return factory
+
+
+def _start_keepalive(
+    config_host: str, client: paramiko.SSHClient, host_config: dict[str, str]
+) -> None:
+    """Apply ServerAliveInterval/ServerAliveCountMax to a pooled connection"""
+    try:
+        interval = int(host_config.get("serveraliveinterval", 0))
+        count_max = int(host_config.get("serveralivecountmax", 3))
+    except ValueError:
+        logger.warning(f"Invalid ServerAlive settings for {config_host}, ignoring")
+        return
+    if interval <= 0 or not _pool_enabled():
+        return
+
+    # The scheduler's probes keep the connection busy, so paramiko's own
+    # unacknowledged keepalives are not needed on top
+    _keepalive.watch(config_host, client, interval, count_max)
+
+
+def _probe_connection(config_host: str) -> bool:
+    """Background recovery check for a host whose circuit is open"""
+    client = _connect_from_config(config_host, keepalive=False)
+    if client is None:
+        return False
+    client.close()
+    return True
+
+
+_circuit_breaker = CircuitBreaker(
+    _probe_connection,
+    threshold=SSH_BREAKER_THRESHOLD,
+    backoff=SSH_BREAKER_BACKOFF,
+    max_backoff=SSH_BREAKER_MAX_BACKOFF,
+)
+
+_key_cache = KeyCache()
+
+_agent_identities = AgentIdentities()
+
+_auth_hints = AuthHints(SSH_AUTH_HINTS)
+
+_remote_files = RemoteFiles()
+
+_connection_pool = ConnectionPool(
+    _connect_from_config,
+    max_per_host=SSH_CONNECTION_POOL_SIZE,
+    max_sessions=SSH_MAX_SESSIONS,
+    idle_timeout=SSH_POOL_IDLE_TIMEOUT,
+    wait_timeout=SSH_POOL_WAIT_TIMEOUT,
+    probe_after=SSH_LIVENESS_PROBE_IDLE,
+    keep_idle=SSH_CONNECTION_REUSE,
+    max_connections=SSH_MAX_CONNECTIONS,
+    reap_interval=SSH_POOL_REAP_INTERVAL,
+    on_close=_remote_files.drop,
+)
+
+_keepalive = KeepaliveScheduler(
+    on_dead=_connection_pool.replace, on_ack=_connection_pool.mark_alive
+)
+
+
 def execute_ssh_command(
     client: paramiko.SSHClient, command: str
 ) -> tuple[str | None, str | None, int | None]:
@@ -259,24 +668,28 @@ def execute_ssh_command(
                 safe_command, get_pty=False, timeout=SSH_COMMAND_TIMEOUT
             )
 
-        # Read output with timeout to prevent hanging
-        start_time = time.time()
-
-        # Wait for command to complete with timeout
-        while not stdout.channel.exit_status_ready():
-            if time.time() - start_time > SSH_READ_TIMEOUT:
-                logger.warning(
-                    f"Command execution timed out after {SSH_READ_TIMEOUT} seconds"
-                )
-                break
-            time.sleep(0.1)
-
-        # Get exit code first
-        exit_code = stdout.channel.recv_exit_status()
+        # Drain both streams while the command runs, so output larger than
+        # the channel window cannot stall it
+        channel = stdout.channel
+        out, err, exited = drain_channel(
+            channel, SSH_READ_TIMEOUT, max_bytes=SSH_MAX_COMMAND_OUTPUT
+        )
+        if exited:
+            exit_code = channel.recv_exit_status()
+        else:
+            logger.warning(
+                f"Command execution timed out after {SSH_READ_TIMEOUT} seconds"
+            )
+            exit_code = None
+            channel.close()
 
-        # Read output after command completes
-        stdout_str = stdout.read().decode("utf-8")
-        stderr_str = stderr.read().decode("utf-8")
+        stdout_str = out.text()
+        stderr_str = err.text()
+        for name, buffer in (("stdout", out), ("stderr", err)):
+            if buffer.truncated:
+                logger.warning(f"Dropped {buffer.dropped} bytes of {name}")
+        if out.truncated:
+            stdout_str += f"\n[output truncated: {out.dropped} more bytes]"
 
         logger.debug(f"Command executed with exit code: {exit_code}")
         logger.debug(f"stdout: {stdout_str}")
@@ -428,11 +841,8 @@ def transfer_file_scp(
             scp.close()
 
 
-def execute_command_background(
-    client: paramiko.SSHClient, command: str, output_file: str, error_file: str
-) -> int:
-    """Execute command in background, return PID."""
-
+def _background_wrapper(command: str, output_file: str, error_file: str) -> str:
+    """Build the shell wrapper that runs command detached and echoes its PID"""
     # Properly escape the command to handle quotes and shell operators
     # We need to escape the command for safe inclusion in bash -c
     escaped_command = command.replace("'", "'\"'\"'")
@@ -450,20 +860,73 @@ def execute_command_background(
     logger.debug(f"Escaped command: {escaped_command}")
     logger.debug(f"Background wrapper: {bg_command}")
 
-    stdin, stdout, stderr = client.exec_command(bg_command, timeout=SSH_COMMAND_TIMEOUT)
+    return bg_command
+
+
+def _wait_script(process: BackgroundProcess, timeout: float, min_output: int) -> str:
+    """Remote loop that returns once the process exits or has min_output bytes
+
+    Prints 'done' if the process has finished, 'running' otherwise.
+    """
+    out, pid = process.output_file, process.pid
+    checks = max(1, int(timeout / _WAIT_INTERVAL))
+    return (
+        f"i=0; while [ $i -lt {checks} ] && [ ! -s {out}.exit ]"
+        f" && kill -0 {pid} 2>/dev/null"
+        f' && [ "$(($(wc -c 2>/dev/null < {out} || echo 0)))" -lt {min_output} ];'
+        f" do sleep {_WAIT_INTERVAL}; i=$((i+1)); done;"
+        f" if [ -s {out}.exit ] || ! kill -0 {pid} 2>/dev/null;"
+        f" then echo done; else echo running; fi"
+    )
+
+
+def execute_command_background(
+    client: paramiko.SSHClient, command: str, output_file: str, error_file: str
+) -> int:
+    """Execute command in background, return PID."""
+    stdout, stderr = _start_background(client, command, output_file, error_file)
 
     # Read PID with timeout
-    start_time = time.time()
-    pid_output = ""
+    if not wait_for_exit_status(stdout.channel, SSH_READ_TIMEOUT):
+        logger.warning(
+            f"Background command setup timed out after {SSH_READ_TIMEOUT} seconds"
+        )
+    return _read_pid(stdout, stderr)
 
-    while not stdout.channel.exit_status_ready():
-        if time.time() - start_time > SSH_READ_TIMEOUT:
-            logger.warning(
-                f"Background command setup timed out after {SSH_READ_TIMEOUT} seconds"
-            )
-            break
-        time.sleep(0.1)
 
+async def execute_command_background_async(
+    host: str,
+    client: paramiko.SSHClient,
+    command: str,
+    output_file: str,
+    error_file: str,
+) -> int:
+    """execute_command_background that awaits the PID on the event loop
+
+    Only starting the command and reading its PID run on a worker thread
+    for host; the wait in between holds none.
+    """
+    stdout, stderr = await run_blocking(
+        host, _start_background, client, command, output_file, error_file
+    )
+    if not await wait_for_exit_status_async(stdout.channel, SSH_READ_TIMEOUT):
+        logger.warning(
+            f"Background command setup timed out after {SSH_READ_TIMEOUT} seconds"
+        )
+    return await run_blocking(host, _read_pid, stdout, stderr)
+
+
+def _start_background(
+    client: paramiko.SSHClient, command: str, output_file: str, error_file: str
+) -> tuple[paramiko.ChannelFile, paramiko.ChannelFile]:
+    """Launch the background wrapper; returns its stdout and stderr"""
+    bg_command = _background_wrapper(command, output_file, error_file)
+    stdin, stdout, stderr = client.exec_command(bg_command, timeout=SSH_COMMAND_TIMEOUT)
+    return stdout, stderr
+
+
+def _read_pid(stdout: paramiko.ChannelFile, stderr: paramiko.ChannelFile) -> int:
+    """Parse the PID the background wrapper printed"""
     pid_output = stdout.read().decode().strip()
     stderr_output = stderr.read().decode().strip()
 
@@ -480,48 +943,203 @@ def execute_command_background(
         raise RuntimeError(f"Failed to get PID: {pid_output}") from None
 
 
-def get_process_output(
-    client: paramiko.SSHClient, process: BackgroundProcess, max_size: int
-) -> tuple[str, str, str, int | None]:
-    """Get current output from process files."""
+def execute_command_spooled(
+    client: paramiko.SSHClient, process: BackgroundProcess
+) -> int:
+    """Run a background process on a channel that streams its output locally
 
-    # Check if process is still running
-    if process.pid:
-        stdin, stdout, stderr = client.exec_command(
-            f"kill -0 {process.pid} 2>/dev/null && echo 'RUNNING' || echo 'STOPPED'",
-            timeout=SSH_COMMAND_TIMEOUT,
+    The channel stays open until the process exits, and its connection is
+    released then, so the process ends if the connection drops. The client
+    is released here if anything fails, so callers must not release it.
+    Output is written to local spool files; see OutputSpool. Returns the
+    remote PID.
+    """
+    channel = None
+    try:
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            raise RuntimeError("SSH connection is not active")
+        channel = transport.open_session(timeout=SSH_COMMAND_TIMEOUT)
+        channel.exec_command(f"echo $$; exec bash -c {shlex.quote(process.command)}")
+
+        base = os.path.join(SSH_SPOOL_DIR, process.process_id)
+        spool = OutputSpool(
+            channel,
+            f"{base}.out",
+            f"{base}.err",
+            on_close=lambda: release_ssh_client(process.host, client),
         )
-        status_check = stdout.read().decode().strip()
-        status = "running" if status_check == "RUNNING" else "completed"
-    else:
-        status = "completed"
+    except Exception:
+        # Nothing reads the channel, so the remote job would block on it
+        if channel is not None:
+            channel.close()
+        release_ssh_client(process.host, client)
+        raise
+    process.spool = spool
 
-    # Get exit code if completed
-    exit_code = None
-    if status == "completed":
-        stdin, stdout, stderr = client.exec_command(
-            f"cat {process.output_file}.exit 2>/dev/null || echo ''",
-            timeout=SSH_COMMAND_TIMEOUT,
+    pid = spool.wait_for_pid(SSH_READ_TIMEOUT)
+    if pid is None:
+        spool.remove()  # Releases the client
+        raise RuntimeError("Failed to get PID of spooled command")
+    return pid
+
+
+def wait_for_process(
+    client: paramiko.SSHClient,
+    process: BackgroundProcess,
+    timeout: float,
+    min_output: int,
+) -> bool:
+    """Wait until a background process exits or has written min_output bytes
+
+    The wait runs on the remote host, so it ends within one poll interval
+    of the process finishing at the cost of a single round trip. Returns
+    whether the process has finished; gives up after timeout seconds.
+    """
+    if process.spool is not None:
+        return process.spool.wait(timeout, min_output)
+    if not process.pid:
+        return True
+    try:
+        return _wait_result(_start_wait(client, process, timeout, min_output))
+    except Exception as e:
+        # The process runs on regardless; callers check its status next
+        logger.warning(f"Waiting for process {process.pid} failed: {str(e)}")
+        return False
+
+
+async def wait_for_process_async(
+    host: str,
+    client: paramiko.SSHClient,
+    process: BackgroundProcess,
+    timeout: float,
+    min_output: int,
+) -> bool:
+    """wait_for_process that awaits the remote wait on the event loop
+
+    Only starting the remote wait and reading its answer run on a worker
+    thread for host. Spooled processes still wait on a worker thread.
+    """
+    if process.spool is not None or not process.pid:
+        return await run_blocking(
+            host, wait_for_process, client, process, timeout, min_output
         )
-        exit_output = stdout.read().decode().strip()
-        if exit_output.isdigit():
-            exit_code = int(exit_output)
+    try:
+        stdout = await run_blocking(
+            host, _start_wait, client, process, timeout, min_output
+        )
+        if not await wait_for_exit_status_async(
+            stdout.channel, timeout + SSH_COMMAND_TIMEOUT
+        ):
+            stdout.channel.close()
+            return False
+        return await run_blocking(host, _wait_result, stdout)
+    except Exception as e:
+        # The process runs on regardless; callers check its status next
+        logger.warning(f"Waiting for process {process.pid} failed: {str(e)}")
+        return False
+
 
-    # Get output with size limit
+def _start_wait(
+    client: paramiko.SSHClient,
+    process: BackgroundProcess,
+    timeout: float,
+    min_output: int,
+) -> paramiko.ChannelFile:
+    """Start the remote wait loop; returns its stdout"""
     stdin, stdout, stderr = client.exec_command(
-        f"head -c {max_size} {process.output_file} 2>/dev/null || echo ''",
-        timeout=SSH_COMMAND_TIMEOUT,
+        _wait_script(process, timeout, min_output),
+        timeout=timeout + SSH_COMMAND_TIMEOUT,
     )
-    output = stdout.read().decode()
+    return stdout
+
+
+def _wait_result(stdout: paramiko.ChannelFile) -> bool:
+    """Whether the remote wait loop saw the process finish"""
+    return bool(stdout.read().decode().strip() == "done")
 
-    # Get errors with size limit
+
+def is_process_running(client: paramiko.SSHClient, process: BackgroundProcess) -> bool:
+    """Check whether the remote PID of a background process is still alive.
+
+    A finished spool means the job has exited. An open one is not proof it
+    is still running, so that case is checked on the remote host.
+    """
+    if process.spool is not None and process.spool.finished:
+        return False
     stdin, stdout, stderr = client.exec_command(
-        f"head -c {max_size//2} {process.error_file} 2>/dev/null || echo ''",
+        f"kill -0 {process.pid} 2>/dev/null && echo 'RUNNING' || echo 'STOPPED'",
         timeout=SSH_COMMAND_TIMEOUT,
     )
-    errors = stdout.read().decode()
+    return bool(stdout.read().decode().strip() == "RUNNING")
 
-    return status, output, errors, exit_code
+
+def _snapshot_script(process: BackgroundProcess, max_size: int) -> str:
+    """Remote script printing a process's state and the start of its output
+
+    Prints one header line "<RUNNING|STOPPED> <exit code or -> <stdout size>
+    <stderr size> <stdout bytes sent> <stderr bytes sent>" followed by that
+    many bytes of stdout and then of stderr. The output files only grow,
+    so head sends exactly the byte counts measured for the header.
+    """
+    out, err = process.output_file, process.error_file
+    running = f"kill -0 {process.pid} 2>/dev/null && r=RUNNING; " if process.pid else ""
+    return (
+        f"r=STOPPED; {running}"
+        f"e=$(cat {out}.exit 2>/dev/null); "
+        f"o=$(($(wc -c 2>/dev/null < {out} || echo 0))); "
+        f"s=$(($(wc -c 2>/dev/null < {err} || echo 0))); "
+        f"n=$((o < {max_size} ? o : {max_size})); "
+        f"m=$((s < {max_size // 2} ? s : {max_size // 2})); "
+        f'echo "$r ${{e:--}} $o $s $n $m"; '
+        f"head -c $n {out} 2>/dev/null; head -c $m {err} 2>/dev/null"
+    )
+
+
+def _parse_snapshot(data: bytes) -> tuple[str, str, str, int | None, int, int]:
+    """Split _snapshot_script output into status, output, errors and exit code
+
+    Also returns the byte offset where the decoded output ends, which is
+    where the next chunk of output starts, and the size of the output file.
+
+    A missing or malformed header, e.g. when the remote shell failed before
+    printing it, is reported as a failed status with no output.
+    """
+    header, _, body = data.partition(b"\n")
+    try:
+        running, exit_output, stdout_size, _, sent_out, sent_err = (
+            header.decode().split()
+        )
+        total, out_size, err_size = int(stdout_size), int(sent_out), int(sent_err)
+    except ValueError:
+        logger.warning(f"Malformed process snapshot header: {header[:200]!r}")
+        return "failed", "", "", None, 0, 0
+    # The slices may end inside a character, which is left out
+    with memoryview(body) as view:
+        output, _, output_end = utf8_slice(view[:out_size], 0, out_size)
+        errors, _, _ = utf8_slice(view[out_size:], 0, err_size)
+
+    status = "running" if running == "RUNNING" else "completed"
+    exit_code = None
+    if status == "completed" and exit_output.isdigit():
+        exit_code = int(exit_output)
+    return status, output, errors, exit_code, output_end, total
+
+
+def get_process_output(
+    client: paramiko.SSHClient, process: BackgroundProcess, max_size: int
+) -> tuple[str, str, str, int | None, int, int]:
+    """Get current status and output from process files in one round trip.
+
+    Returns status, output, errors, exit code, the byte offset where the
+    returned output ends and the size of the whole output.
+    """
+    if process.spool is not None:
+        return process.spool.snapshot(max_size)
+    stdin, stdout, stderr = client.exec_command(
+        _snapshot_script(process, max_size), timeout=SSH_COMMAND_TIMEOUT
+    )
+    return _parse_snapshot(stdout.read())
 
 
 def get_output_chunk(
@@ -529,24 +1147,25 @@ def get_output_chunk(
     process: BackgroundProcess,
     start_byte: int,
     chunk_size: int,
-) -> tuple[str, bool]:
-    """Get specific chunk of output."""
+) -> tuple[str, bool, int]:
+    """Get specific chunk of output.
 
-    # Get chunk from specific byte position
-    stdin, stdout, stderr = client.exec_command(
-        f"tail -c +{start_byte + 1} {process.output_file} 2>/dev/null | head -c {chunk_size}",
-        timeout=SSH_COMMAND_TIMEOUT,
-    )
-    chunk = stdout.read().decode()
-
-    # Check if there's more data
-    stdin, stdout, stderr = client.exec_command(
-        f"tail -c +{start_byte + chunk_size + 1} {process.output_file} 2>/dev/null | head -c 1",
-        timeout=SSH_COMMAND_TIMEOUT,
+    The chunk is cut on UTF-8 character boundaries, so it may hold a few
+    bytes less than chunk_size. Returns the chunk, whether more output
+    follows and the byte offset where the next chunk starts.
+    """
+    if process.spool is not None:
+        chunk, next_byte, file_size = process.spool.page(0, start_byte, chunk_size)
+        return chunk, next_byte < file_size, next_byte
+
+    # Read at the offset on a kept-open SFTP handle rather than scanning
+    # the file from its start on every page
+    data, file_size = _remote_files.read(
+        client, process.output_file, start_byte, chunk_size
     )
-    has_more = bool(stdout.read().decode().strip())
-
-    return chunk, has_more
+    chunk, _, end = utf8_slice(data, 0, chunk_size)
+    next_byte = start_byte + end
+    return chunk, next_byte < file_size, next_byte
 
 
 def kill_background_process(
@@ -572,13 +1191,7 @@ def kill_background_process(
         time.sleep(2)
 
         # Check if process is still running
-        stdin, stdout, stderr = client.exec_command(
-            f"kill -0 {process.pid} 2>/dev/null && echo 'RUNNING' || echo 'STOPPED'",
-            timeout=SSH_COMMAND_TIMEOUT,
-        )
-        status_check = stdout.read().decode().strip()
-
-        if status_check == "STOPPED":
+        if not is_process_running(client, process):
             # Process terminated gracefully
             return True, f"Process {process.pid} terminated gracefully"
 
@@ -589,13 +1202,7 @@ def kill_background_process(
         kill_result = stdout.read().decode().strip()
 
         # Final check
-        stdin, stdout, stderr = client.exec_command(
-            f"kill -0 {process.pid} 2>/dev/null && echo 'RUNNING' || echo 'STOPPED'",
-            timeout=SSH_COMMAND_TIMEOUT,
-        )
-        final_status = stdout.read().decode().strip()
-
-        if final_status == "STOPPED":
+        if not is_process_running(client, process):
             return True, f"Process {process.pid} force killed"
         else:
             return False, f"Failed to kill process {process.pid}: {kill_result}"
@@ -608,6 +1215,10 @@ def cleanup_process_files(
     client: paramiko.SSHClient, process: BackgroundProcess
 ) -> bool:
     """Clean up temporary files for a process."""
+    if process.spool is not None:
+        process.spool.remove()
+        return True
+    _remote_files.forget(process.output_file)
     try:
         # Remove output, error, and exit files
         cleanup_cmd = f"rm -f {process.output_file} {process.error_file} {process.output_file}.exit 2>/dev/null"
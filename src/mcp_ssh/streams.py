@@ -0,0 +1,117 @@
+"""
+Output Streams - Drain a channel's stdout and stderr while the command runs
+"""
+
+import select
+import time
+from collections.abc import Callable
+
+import paramiko
+
+from .waits import wait_for_exit_status
+
+# Bytes read from a stream per recv call
+_RECV_SIZE = 32768
+
+
+class BoundedBuffer:
+    """
+    Byte buffer that keeps at most limit bytes.
+
+    Data past the limit is counted and dropped as it arrives, so a command
+    that prints gigabytes is still drained, keeping the channel window
+    open, without holding its output in memory. A limit of 0 keeps
+    everything.
+    """
+
+    def __init__(self, limit: int = 0) -> None:
+        self.limit = limit
+        self.dropped = 0
+        self._chunks: list[bytes] = []
+        self._size = 0
+
+    def write(self, data: bytes) -> None:
+        """Append data, dropping whatever does not fit"""
+        if self.limit:
+            room = max(0, self.limit - self._size)
+            if len(data) > room:
+                self.dropped += len(data) - room
+                data = data[:room]
+        if data:
+            self._chunks.append(data)
+            self._size += len(data)
+
+    @property
+    def truncated(self) -> bool:
+        """Whether any data was dropped"""
+        return self.dropped > 0
+
+    def getvalue(self) -> bytes:
+        """The kept bytes"""
+        return b"".join(self._chunks)
+
+    def text(self) -> str:
+        """The kept bytes as UTF-8; a character cut at the limit is replaced"""
+        errors = "replace" if self.truncated else "strict"
+        return self.getvalue().decode("utf-8", errors)
+
+
+def drain_channel(
+    channel: paramiko.Channel, timeout: float, max_bytes: int = 0
+) -> tuple[BoundedBuffer, BoundedBuffer, bool]:
+    """Read stdout and stderr as they arrive until the command exits
+
+    Both streams are read whenever either has data, so a command blocked
+    on a full stderr window cannot stall stdout or the other way round.
+    Each stream keeps at most max_bytes (0 for no limit). Returns the
+    stdout and stderr buffers and whether the command exited within
+    timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    stdout, stderr = BoundedBuffer(max_bytes), BoundedBuffer(max_bytes)
+
+    if not read_until_eof(channel, stdout.write, stderr.write, deadline):
+        return stdout, stderr, False
+    exited = wait_for_exit_status(channel, max(0.0, deadline - time.monotonic()))
+    return stdout, stderr, exited
+
+
+def read_until_eof(
+    channel: paramiko.Channel,
+    on_stdout: Callable[[bytes], None],
+    on_stderr: Callable[[bytes], None],
+    deadline: float | None = None,
+) -> bool:
+    """Pass a channel's stdout and stderr to callbacks as they arrive
+
+    Both streams are read whenever either has data. Returns once the
+    channel reaches EOF or closes, or False if the time.monotonic()
+    deadline passes first.
+    """
+    while True:
+        _read_ready(channel, on_stdout, on_stderr)
+        if channel.eof_received or channel.closed:
+            break
+        remaining = None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+        # The channel's fileno becomes readable on data for either stream,
+        # EOF and close
+        select.select([channel], [], [], remaining)
+
+    _read_ready(channel, on_stdout, on_stderr)  # Data that arrived with the EOF
+    return True
+
+
+def _read_ready(
+    channel: paramiko.Channel,
+    on_stdout: Callable[[bytes], None],
+    on_stderr: Callable[[bytes], None],
+) -> None:
+    """Pass everything already received to the callbacks"""
+    while channel.recv_ready():
+        on_stdout(channel.recv(_RECV_SIZE))
+    while channel.recv_stderr_ready():
+        on_stderr(channel.recv_stderr(_RECV_SIZE))
@@ -0,0 +1,84 @@
+"""
+Channel Waits - Wake on a paramiko channel's exit status instead of polling
+"""
+
+import asyncio
+import threading
+from collections.abc import Callable
+
+import paramiko
+
+
+class _NotifyingEvent(threading.Event):
+    """threading.Event that also runs callbacks when set."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.callbacks: list[Callable[[], None]] = []
+
+    def set(self) -> None:
+        super().set()
+        for callback in list(self.callbacks):
+            callback()
+
+
+def wait_for_exit_status(channel: paramiko.Channel, timeout: float | None) -> bool:
+    """Block until the command on channel exits or timeout seconds pass
+
+    Wakes as soon as the exit-status message (or channel close) arrives.
+    Returns whether the exit status is ready.
+    """
+    if channel.exit_status_ready():
+        return True
+    channel.status_event.wait(timeout)
+    return bool(channel.exit_status_ready())
+
+
+async def wait_for_exit_status_async(
+    channel: paramiko.Channel, timeout: float | None
+) -> bool:
+    """wait_for_exit_status for coroutines, without occupying a thread
+
+    The transport thread resolves a future on the running loop when the
+    exit status arrives. Returns whether the exit status is ready.
+    """
+    if channel.exit_status_ready():
+        return True
+
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def resolve() -> None:
+        if not done.done():
+            done.set_result(True)
+
+    def wake() -> None:
+        loop.call_soon_threadsafe(resolve)
+
+    event = _notifying_status_event(channel)
+    event.callbacks.append(wake)
+    try:
+        if event.is_set():
+            return True
+        try:
+            await asyncio.wait_for(done, timeout)
+        except TimeoutError:
+            pass
+        return bool(channel.exit_status_ready())
+    finally:
+        event.callbacks.remove(wake)
+
+
+def _notifying_status_event(channel: paramiko.Channel) -> _NotifyingEvent:
+    """Swap channel.status_event for one that runs callbacks when set"""
+    with channel.lock:
+        event = channel.status_event
+        if not isinstance(event, _NotifyingEvent):
+            replacement = _NotifyingEvent()
+            channel.status_event = replacement
+            if event.is_set():
+                replacement.set()
+            event = replacement
+    if channel.closed or channel.exit_status >= 0:
+        event.set()  # Arrived while the events were being swapped
+    return event
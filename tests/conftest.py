@@ -10,6 +10,33 @@ import tempfile
 from unittest.mock import MagicMock
 
 import pytest
+from paramiko.message import Message
+
+
+@pytest.fixture(autouse=True)
+def reset_ssh_state(tmp_path):
+    """Reset module-level SSH state so tests do not affect each other"""
+    # Imported lazily: some test modules set environment before first import
+    from mcp_ssh.ssh import _auth_hints
+
+    _auth_hints.path = str(tmp_path / "auth_hints.json")
+    yield
+    from mcp_ssh.ssh import (
+        _agent_identities,
+        _circuit_breaker,
+        _config_cache,
+        _inventory_cache,
+        _key_cache,
+        _remote_files,
+    )
+
+    _agent_identities.reset()
+    _auth_hints.clear()
+    _circuit_breaker.reset()
+    _config_cache.clear()
+    _inventory_cache.clear()
+    _key_cache.clear()
+    _remote_files.clear()
 
 
 @pytest.fixture
@@ -34,6 +61,57 @@ Host another-fixture
     os.unlink(f.name)
 
 
+class FakeChannel:
+    """Channel of a command that has exited with all its output received"""
+
+    def __init__(self, stdout: bytes = b"", stderr: bytes = b"", exit_status=0):
+        self._stdout = bytearray(stdout)
+        self._stderr = bytearray(stderr)
+        self.exit_status = exit_status
+        self.eof_received = True
+        self.closed = False
+
+    def recv_ready(self):
+        return bool(self._stdout)
+
+    def recv(self, nbytes):
+        data = bytes(self._stdout[:nbytes])
+        del self._stdout[:nbytes]
+        return data
+
+    def recv_stderr_ready(self):
+        return bool(self._stderr)
+
+    def recv_stderr(self, nbytes):
+        data = bytes(self._stderr[:nbytes])
+        del self._stderr[:nbytes]
+        return data
+
+    def exit_status_ready(self):
+        return True
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+    def close(self):
+        self.closed = True
+
+
+def feed_stderr(channel, data):
+    """Deliver stderr data to a paramiko channel, as its transport would"""
+    message = Message()
+    message.add_int(1)  # SSH_EXTENDED_DATA_STDERR
+    message.add_string(data)
+    message.rewind()
+    channel._feed_extended(message)
+
+
+@pytest.fixture
+def fake_channel():
+    """Factory for channels of finished commands"""
+    return FakeChannel
+
+
 @pytest.fixture
 def mock_ssh_client():
     """Create a mock SSH client for testing"""
@@ -47,14 +125,9 @@ def mock_ssh_client():
     mock_stdin = MagicMock()
     mock_stdout = MagicMock()
     mock_stderr = MagicMock()
-    mock_channel = MagicMock()
-
-    mock_stdout.read.return_value = b"command output"
-    mock_stderr.read.return_value = b""
-    mock_channel.recv_exit_status.return_value = 0
 
-    # Attach channel to stdout for exit code access
-    mock_stdout.channel = mock_channel
+    # Output is read from the channel stdout belongs to
+    mock_stdout.channel = FakeChannel(b"command output")
 
     client.exec_command.return_value = (mock_stdin, mock_stdout, mock_stderr)
 
@@ -33,7 +33,7 @@ class TestBackgroundExecution:
         mock_client = MagicMock()
         mock_get_client.return_value = mock_client
         mock_execute_bg.return_value = 12345
-        mock_get_output.return_value = ("completed", "file1\nfile2\n", "", 0)
+        mock_get_output.return_value = ("completed", "file1\nfile2\n", "", 0, 12, 12)
 
         request = CommandRequest(host="test-host", command="ls -la")
         mock_context = AsyncMock()
@@ -60,9 +60,16 @@ class TestBackgroundExecution:
         mock_get_client.return_value = mock_client
         mock_execute_bg.return_value = 12345
 
-        # Large output that exceeds 1000 byte limit
-        large_output = "x" * 1000  # Exactly at limit
-        mock_get_output.return_value = ("completed", large_output, "", 0)
+        # The first 1000 bytes of 5000
+        large_output = "x" * 1000
+        mock_get_output.return_value = (
+            "completed",
+            large_output,
+            "",
+            0,
+            len(large_output),
+            5000,
+        )
 
         request = CommandRequest(host="test-host", command="cat large_file")
         mock_context = AsyncMock()
@@ -71,7 +78,7 @@ class TestBackgroundExecution:
 
         assert result.success is True
         assert result.output_size == 1000
-        assert result.has_more_output is True  # Assumes truncation
+        assert result.has_more_output is True
 
     @patch("mcp_ssh.server.process_manager")
     @patch("mcp_ssh.server.get_ssh_client_from_config")
@@ -84,17 +91,20 @@ class TestBackgroundExecution:
         # Setup mock process
         mock_process = MagicMock()
         mock_process.host = "test-host"
+        mock_process.spool = None  # Output read over SSH
         mock_manager.get_process.return_value = mock_process
 
         mock_client = MagicMock()
         mock_get_client.return_value = mock_client
-        mock_get_chunk.return_value = ("chunk_data", True)  # Has more data
+        mock_get_chunk.return_value = ("chunk_data", True, 510)  # Has more data
         mock_get_output.return_value = (
             "completed",
             "",
             "",
             0,
-        )  # status, output, errors, exit_code
+            0,
+            0,
+        )  # status, output, errors, exit_code, output end, output size
 
         request = GetOutputRequest(process_id="test123", start_byte=500, chunk_size=200)
         mock_context = AsyncMock()
@@ -105,6 +115,7 @@ class TestBackgroundExecution:
         assert result.stdout == "chunk_data"
         assert result.has_more_output is True
         assert result.chunk_start == 500
+        assert result.next_byte == 510
 
         mock_get_chunk.assert_called_once_with(mock_client, mock_process, 500, 200)
         mock_client.close.assert_called_once()
@@ -119,13 +130,14 @@ class TestBackgroundExecution:
         # Setup mock process
         mock_process = MagicMock()
         mock_process.host = "test-host"
+        mock_process.spool = None  # Status read over SSH
         mock_process.start_time = MagicMock()
         mock_process.start_time.total_seconds.return_value = 10.5
         mock_manager.get_process.return_value = mock_process
 
         mock_client = MagicMock()
         mock_get_client.return_value = mock_client
-        mock_get_output.return_value = ("running", "", "", None)
+        mock_get_output.return_value = ("running", "", "", None, 0, 0)
 
         request = GetOutputRequest(process_id="test123")
         mock_context = AsyncMock()
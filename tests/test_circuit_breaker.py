@@ -0,0 +1,135 @@
+"""
+Tests for the per-host circuit breaker
+
+This module tests failure counting, fail-fast rejection, exponential
+backoff and background recovery probes.
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from mcp_ssh.breaker import CircuitBreaker, HostUnavailableError
+
+
+class TestCircuitBreaker:
+    """Test CircuitBreaker behaviour"""
+
+    def test_opens_after_threshold(self):
+        """Test the circuit stays closed until threshold failures"""
+        breaker = CircuitBreaker(threshold=2)
+
+        breaker.record_failure("test-host", "Connection refused")
+        breaker.check("test-host")
+        assert breaker.state("test-host") == "closed"
+
+        breaker.record_failure("test-host", "Connection refused")
+        assert breaker.state("test-host") == "open"
+
+    def test_open_circuit_fails_fast_with_reason(self):
+        """Test check raises immediately with the last error"""
+        breaker = CircuitBreaker(threshold=1, backoff=30)
+        breaker.record_failure("test-host", "No route to host")
+
+        start = time.perf_counter()
+        with pytest.raises(HostUnavailableError) as exc_info:
+            breaker.check("test-host")
+        elapsed = time.perf_counter() - start
+
+        assert "No route to host" in str(exc_info.value)
+        assert "next check in 30s" in str(exc_info.value)
+        assert elapsed < 0.01
+
+    def test_other_hosts_unaffected(self):
+        """Test an open circuit only rejects its own host"""
+        breaker = CircuitBreaker(threshold=1)
+        breaker.record_failure("down-host", "timed out")
+
+        breaker.check("other-host")
+
+    def test_success_resets_failures(self):
+        """Test a successful connection clears the failure count"""
+        breaker = CircuitBreaker(threshold=2)
+
+        breaker.record_failure("test-host", "timed out")
+        breaker.record_success("test-host")
+        breaker.record_failure("test-host", "timed out")
+
+        assert breaker.state("test-host") == "closed"
+
+    def test_disabled_with_zero_threshold(self):
+        """Test threshold 0 never opens a circuit"""
+        breaker = CircuitBreaker(threshold=0)
+
+        for _ in range(5):
+            breaker.record_failure("test-host", "timed out")
+
+        breaker.check("test-host")
+        assert breaker.stats() == {}
+
+    def test_probe_closes_circuit_on_recovery(self):
+        """Test a successful background probe closes the circuit"""
+        probed = threading.Event()
+
+        def probe(host):
+            probed.set()
+            return True
+
+        breaker = CircuitBreaker(probe, threshold=1, backoff=0.05)
+        breaker.record_failure("test-host", "timed out")
+
+        assert probed.wait(2)
+        for _ in range(100):
+            if breaker.state("test-host") == "closed":
+                break
+            time.sleep(0.01)
+        breaker.check("test-host")
+
+    def test_failed_probe_doubles_backoff(self):
+        """Test backoff grows exponentially up to the maximum"""
+        breaker = CircuitBreaker(MagicMock(), threshold=1, backoff=5, max_backoff=15)
+
+        with patch("mcp_ssh.breaker.threading.Timer"):
+            breaker.record_failure("test-host", "timed out")
+            circuit = breaker._circuits["test-host"]
+            backoffs = [circuit.backoff]
+            for _ in range(3):
+                breaker._probe.return_value = False
+                breaker._run_probe("test-host", circuit)
+                backoffs.append(circuit.backoff)
+
+        assert backoffs == [5, 10, 15, 15]
+        assert breaker.state("test-host") == "open"
+
+    def test_half_open_while_probing(self):
+        """Test calls are still rejected while the probe runs"""
+        release = threading.Event()
+        started = threading.Event()
+
+        def probe(host):
+            started.set()
+            release.wait(2)
+            return True
+
+        breaker = CircuitBreaker(probe, threshold=1, backoff=0.01)
+        breaker.record_failure("test-host", "timed out")
+        assert started.wait(2)
+
+        assert breaker.state("test-host") == "half_open"
+        with pytest.raises(HostUnavailableError, match="in progress"):
+            breaker.check("test-host")
+        release.set()
+
+    def test_reset_cancels_probes(self):
+        """Test reset forgets failures and stops scheduled probes"""
+        probe = MagicMock(return_value=True)
+        breaker = CircuitBreaker(probe, threshold=1, backoff=0.05)
+        breaker.record_failure("test-host", "timed out")
+
+        breaker.reset()
+        time.sleep(0.1)
+
+        probe.assert_not_called()
+        assert breaker.state("test-host") == "closed"
@@ -0,0 +1,437 @@
+"""
+Tests for the SSH connection pool
+
+This module tests checkout/checkin semantics, channel sharing over one
+connection, per-host limits, waiting for a free lease and idle eviction.
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from mcp_ssh.pool import ConnectionPool
+
+
+def make_client(active=True):
+    """Create a mock SSH client with a transport in the given state"""
+    client = MagicMock()
+    client.get_transport.return_value.is_active.return_value = active
+    return client
+
+
+class TestConnectionPool:
+    """Test ConnectionPool behaviour"""
+
+    def test_checkout_opens_new_connection(self):
+        """Test first checkout uses the factory"""
+        client = make_client()
+        factory = MagicMock(return_value=client)
+        pool = ConnectionPool(factory, max_per_host=2)
+
+        assert pool.checkout("test-host") is client
+        factory.assert_called_once_with("test-host")
+        assert pool.stats()["test-host"]["sessions"] == 1
+
+    def test_checkin_then_reuse(self):
+        """Test a returned connection is handed out again"""
+        client = make_client()
+        factory = MagicMock(return_value=client)
+        pool = ConnectionPool(factory, max_per_host=2)
+
+        pool.checkout("test-host")
+        pool.checkin("test-host", client)
+        assert pool.stats()["test-host"]["idle"] == 1
+
+        assert pool.checkout("test-host") is client
+        factory.assert_called_once()
+        client.close.assert_not_called()
+
+    def test_factory_failure_returns_none(self):
+        """Test failed connection does not occupy a pool slot"""
+        pool = ConnectionPool(MagicMock(return_value=None), max_per_host=1)
+
+        assert pool.checkout("test-host") is None
+        assert pool.stats()["test-host"]["pending"] == 0
+        assert pool.stats()["test-host"]["connections"] == 0
+
+    def test_per_host_limit_times_out(self):
+        """Test checkout gives up when the host is at capacity"""
+        factory = MagicMock(side_effect=lambda host: make_client())
+        pool = ConnectionPool(factory, max_per_host=1, max_sessions=1)
+
+        assert pool.checkout("test-host") is not None
+        assert pool.checkout("test-host", timeout=0.05) is None
+        # Other hosts are unaffected
+        assert pool.checkout("other-host") is not None
+
+    def test_waiter_gets_returned_connection(self):
+        """Test a waiting caller receives a connection once checked in"""
+        client = make_client()
+        pool = ConnectionPool(
+            MagicMock(return_value=client), max_per_host=1, max_sessions=1
+        )
+        pool.checkout("test-host")
+
+        result = {}
+
+        def waiter():
+            result["client"] = pool.checkout("test-host", timeout=2)
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.05)
+        pool.checkin("test-host", client)
+        thread.join(timeout=2)
+
+        assert result["client"] is client
+
+    def test_concurrent_callers_share_one_connection(self):
+        """Test leases are multiplexed over one transport up to max_sessions"""
+        factory = MagicMock(side_effect=lambda host: make_client())
+        pool = ConnectionPool(factory, max_per_host=2, max_sessions=3)
+
+        clients = [pool.checkout("test-host") for _ in range(3)]
+
+        assert factory.call_count == 1
+        assert clients[0] is clients[1] is clients[2]
+        assert pool.stats()["test-host"]["sessions"] == 3
+
+        # A fourth caller exceeds MaxSessions and gets a second connection
+        fourth = pool.checkout("test-host")
+        assert fourth is not clients[0]
+        assert factory.call_count == 2
+        assert pool.stats()["test-host"]["connections"] == 2
+
+    def test_concurrent_cold_checkouts_share_pending_connection(self):
+        """Test a burst on a cold host waits for one connection, not five"""
+
+        def slow_factory(host):
+            time.sleep(0.1)
+            return make_client()
+
+        factory = MagicMock(side_effect=slow_factory)
+        pool = ConnectionPool(factory, max_per_host=5, max_sessions=10)
+        clients = []
+
+        threads = [
+            threading.Thread(target=lambda: clients.append(pool.checkout("test-host")))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert factory.call_count == 1
+        assert len(clients) == 10 and all(c is clients[0] for c in clients)
+        assert pool.stats()["test-host"]["sessions"] == 10
+
+    def test_connection_kept_until_last_lease_returned(self):
+        """Test a shared connection without keep_idle closes on last checkin"""
+        client = make_client()
+        pool = ConnectionPool(MagicMock(return_value=client), keep_idle=False)
+
+        pool.checkout("test-host")
+        pool.checkout("test-host")
+        pool.checkin("test-host", client)
+        client.close.assert_not_called()
+
+        pool.checkin("test-host", client)
+        client.close.assert_called_once()
+        assert pool.stats()["test-host"]["connections"] == 0
+
+    def test_dead_shared_connection_not_handed_out(self):
+        """Test new callers skip a leased connection whose transport died"""
+        dead = make_client()
+        fresh = make_client()
+        pool = ConnectionPool(MagicMock(side_effect=[dead, fresh]))
+
+        pool.checkout("test-host")
+        dead.get_transport.return_value.is_active.return_value = False
+
+        assert pool.checkout("test-host") is fresh
+        pool.checkin("test-host", dead)
+        dead.close.assert_called_once()
+
+    def test_dead_idle_connection_replaced(self):
+        """Test checkout drops connections whose transport has died"""
+        dead = make_client()
+        fresh = make_client()
+        factory = MagicMock(side_effect=[dead, fresh])
+        pool = ConnectionPool(factory, max_per_host=1)
+
+        pool.checkout("test-host")
+        pool.checkin("test-host", dead)
+        dead.get_transport.return_value.is_active.return_value = False
+
+        assert pool.checkout("test-host") is fresh
+        dead.close.assert_called_once()
+
+    def test_reuse_without_round_trip(self):
+        """Test a recently used connection is reused without any probe"""
+        client = make_client()
+        pool = ConnectionPool(MagicMock(return_value=client), probe_after=60)
+
+        pool.checkout("test-host")
+        pool.checkin("test-host", client)
+        assert pool.checkout("test-host") is client
+
+        client.exec_command.assert_not_called()
+        client.get_transport.return_value.open_session.assert_not_called()
+
+    def test_long_idle_connection_is_probed(self):
+        """Test a connection idle past probe_after gets one channel probe"""
+        client = make_client()
+        transport = client.get_transport.return_value
+        pool = ConnectionPool(
+            MagicMock(return_value=client), probe_after=30, idle_timeout=300
+        )
+
+        with patch("mcp_ssh.pool.time.monotonic", return_value=100.0):
+            pool.checkout("test-host")
+            pool.checkin("test-host", client)
+        with patch("mcp_ssh.pool.time.monotonic", return_value=150.0):
+            assert pool.checkout("test-host") is client
+
+        transport.open_session.assert_called_once_with(timeout=5.0)
+        transport.open_session.return_value.close.assert_called_once()
+        client.exec_command.assert_not_called()
+
+    def test_failed_probe_replaces_connection(self):
+        """Test a connection failing its probe is dropped"""
+        stale = make_client()
+        stale.get_transport.return_value.open_session.side_effect = Exception("EOF")
+        fresh = make_client()
+        pool = ConnectionPool(
+            MagicMock(side_effect=[stale, fresh]), probe_after=30, idle_timeout=300
+        )
+
+        with patch("mcp_ssh.pool.time.monotonic", return_value=100.0):
+            pool.checkout("test-host")
+            pool.checkin("test-host", stale)
+        with patch("mcp_ssh.pool.time.monotonic", return_value=150.0):
+            assert pool.checkout("test-host") is fresh
+        stale.close.assert_called_once()
+
+    def test_idle_timeout_eviction(self):
+        """Test connections idle past the timeout are closed"""
+        old = make_client()
+        fresh = make_client()
+        pool = ConnectionPool(MagicMock(side_effect=[old, fresh]), idle_timeout=10)
+
+        with patch("mcp_ssh.pool.time.monotonic", return_value=100.0):
+            pool.checkout("test-host")
+            pool.checkin("test-host", old)
+        with patch("mcp_ssh.pool.time.monotonic", return_value=200.0):
+            assert pool.checkout("test-host") is fresh
+        old.close.assert_called_once()
+
+    def test_checkin_unknown_client_closes_it(self):
+        """Test clients not owned by the pool are closed on checkin"""
+        pool = ConnectionPool(MagicMock())
+        stranger = make_client()
+
+        pool.checkin("test-host", stranger)
+
+        stranger.close.assert_called_once()
+
+    def test_close_all(self):
+        """Test close_all closes idle and borrowed connections"""
+        first = make_client()
+        second = make_client()
+        pool = ConnectionPool(MagicMock(side_effect=[first, second]))
+
+        pool.checkout("test-host")
+        pool.checkin("test-host", first)
+        pool.checkout("other-host")
+        pool.close_all()
+
+        first.close.assert_called_once()
+        second.close.assert_called_once()
+        assert pool.stats() == {}
+
+    def test_on_close_runs_before_close(self):
+        """Test on_close sees each connection before it is closed"""
+        client = make_client()
+        seen = []
+        on_close = MagicMock(side_effect=lambda c: seen.append(c.close.called))
+        pool = ConnectionPool(MagicMock(return_value=client), on_close=on_close)
+
+        pool.checkout("test-host")
+        pool.close_all()
+
+        on_close.assert_called_once_with(client)
+        assert seen == [False]
+        client.close.assert_called_once()
+
+
+class TestPrewarm:
+    """Test connection pre-warming"""
+
+    def test_prewarm_connects_hosts_in_parallel(self):
+        """Test warm-up opens connections concurrently"""
+
+        def slow_factory(host):
+            time.sleep(0.2)
+            return make_client()
+
+        pool = ConnectionPool(slow_factory)
+
+        start = time.monotonic()
+        results = pool.prewarm(["a", "b", "c", "d"], concurrency=4)
+        elapsed = time.monotonic() - start
+
+        assert results == {"a": True, "b": True, "c": True, "d": True}
+        assert elapsed < 0.6
+        assert all(s["idle"] == 1 for s in pool.stats().values())
+
+    def test_prewarmed_connection_used_by_checkout(self):
+        """Test the first call gets the warm connection"""
+        client = make_client()
+        factory = MagicMock(return_value=client)
+        pool = ConnectionPool(factory)
+
+        pool.prewarm(["test-host"], keepalive=15)
+
+        assert pool.checkout("test-host") is client
+        factory.assert_called_once()
+        client.get_transport.return_value.set_keepalive.assert_called_once_with(15)
+
+    def test_prewarm_skips_connected_hosts(self):
+        """Test hosts that already have a connection are not reconnected"""
+        factory = MagicMock(side_effect=lambda host: make_client())
+        pool = ConnectionPool(factory)
+        pool.checkout("test-host")
+
+        assert pool.prewarm(["test-host"]) == {"test-host": True}
+        factory.assert_called_once()
+
+    def test_prewarm_reports_failures(self):
+        """Test unreachable hosts are reported without raising"""
+        factory = MagicMock(side_effect=[None, RuntimeError("no route")])
+        pool = ConnectionPool(factory)
+
+        results = pool.prewarm(["down", "broken"], concurrency=1)
+
+        assert results == {"down": False, "broken": False}
+        assert pool.stats()["down"]["connections"] == 0
+        assert pool.stats()["broken"]["pending"] == 0
+
+    def test_prewarmed_connection_survives_idle(self):
+        """Test warm connections outlive idle timeout and reuse being off"""
+        client = make_client()
+        pool = ConnectionPool(
+            MagicMock(return_value=client), idle_timeout=10, keep_idle=False
+        )
+
+        with patch("mcp_ssh.pool.time.monotonic", return_value=100.0):
+            pool.prewarm(["test-host"])
+            pool.checkout("test-host")
+            pool.checkin("test-host", client)
+        with patch("mcp_ssh.pool.time.monotonic", return_value=105.0):
+            assert pool.checkout("test-host") is client
+            pool.checkin("test-host", client)
+        with patch("mcp_ssh.pool.time.monotonic", return_value=500.0):
+            assert pool.checkout("test-host") is client
+        client.close.assert_not_called()
+
+
+class TestConnectionBudget:
+    """Test the global connection budget, LRU eviction and the reaper"""
+
+    def test_budget_evicts_least_recently_used_idle(self):
+        """Test a new host displaces the oldest idle connection"""
+        clients = {h: make_client() for h in ("a", "b", "c")}
+        pool = ConnectionPool(lambda h: clients[h], max_connections=2)
+
+        for host in ("a", "b"):
+            pool.checkout(host)
+        pool.checkin("b", clients["b"])
+        pool.checkin("a", clients["a"])
+
+        assert pool.checkout("c") is clients["c"]
+        clients["b"].close.assert_called_once()
+        clients["a"].close.assert_not_called()
+        assert pool.totals()["evicted_lru"] == 1
+        assert pool.totals()["connections"] == 2
+
+    def test_budget_waits_when_all_connections_busy(self):
+        """Test checkout times out rather than exceed the budget"""
+        factory = MagicMock(side_effect=lambda host: make_client())
+        pool = ConnectionPool(factory, max_connections=1, max_sessions=1)
+
+        pool.checkout("a")
+
+        assert pool.checkout("b", timeout=0.1) is None
+        assert factory.call_count == 1
+
+    def test_budget_waiter_gets_slot_on_checkin(self):
+        """Test a waiting host connects once another host goes idle"""
+        first = make_client()
+        second = make_client()
+        pool = ConnectionPool(MagicMock(side_effect=[first, second]), max_connections=1)
+        pool.checkout("a")
+        result = {}
+
+        waiter = threading.Thread(
+            target=lambda: result.update(client=pool.checkout("b", timeout=2))
+        )
+        waiter.start()
+        time.sleep(0.05)
+        pool.checkin("a", first)
+        waiter.join()
+
+        assert result["client"] is second
+        first.close.assert_called_once()
+
+    def test_reap_closes_idle_and_dead_connections(self):
+        """Test reap sweeps every host and forgets empty ones"""
+        idle = make_client()
+        dead = make_client()
+        busy = make_client()
+        pool = ConnectionPool(
+            MagicMock(side_effect=[idle, dead, busy]), idle_timeout=10
+        )
+
+        with patch("mcp_ssh.pool.time.monotonic", return_value=100.0):
+            pool.checkout("idle-host")
+            pool.checkin("idle-host", idle)
+            pool.checkout("dead-host")
+            pool.checkin("dead-host", dead)
+            pool.checkout("busy-host")
+        dead.get_transport.return_value.is_active.return_value = False
+
+        with patch("mcp_ssh.pool.time.monotonic", return_value=200.0):
+            assert pool.reap() == 2
+
+        idle.close.assert_called_once()
+        dead.close.assert_called_once()
+        busy.close.assert_not_called()
+        assert set(pool.stats()) == {"busy-host"}
+        totals = pool.totals()
+        assert (totals["evicted_idle"], totals["evicted_dead"]) == (1, 1)
+
+    def test_background_reaper(self):
+        """Test the reaper thread closes idle connections on its own"""
+        client = make_client()
+        pool = ConnectionPool(
+            MagicMock(return_value=client), idle_timeout=0, reap_interval=0.05
+        )
+
+        pool.checkout("test-host")
+        pool.checkin("test-host", client)
+        time.sleep(0.3)
+
+        client.close.assert_called_once()
+        pool.close_all()
+
+    def test_prewarm_does_not_evict(self):
+        """Test warm-up beyond the budget skips hosts instead of evicting"""
+        factory = MagicMock(side_effect=lambda host: make_client())
+        pool = ConnectionPool(factory, max_connections=2)
+
+        results = pool.prewarm(["a", "b", "c", "d"], concurrency=1)
+
+        assert results == {"a": True, "b": True, "c": False, "d": False}
+        assert factory.call_count == 2
+        assert pool.totals()["evicted_lru"] == 0
@@ -0,0 +1,98 @@
+"""
+Tests for the blocking-work executor
+
+This module tests that blocking SSH calls run on worker threads and that
+per-host limits keep one slow host from starving the others.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from mcp_ssh.executor import HostExecutor, run_blocking
+
+
+@pytest.mark.asyncio
+class TestHostExecutor:
+    """Test HostExecutor behaviour"""
+
+    async def test_runs_on_worker_thread(self):
+        """Test the callable does not run on the event loop thread"""
+        loop_thread = threading.get_ident()
+
+        worker_thread = await run_blocking("test-host", threading.get_ident)
+
+        assert worker_thread != loop_thread
+
+    async def test_passes_arguments_and_result(self):
+        """Test positional and keyword arguments reach the callable"""
+        executor = HostExecutor(max_workers=2, per_host=1)
+
+        result = await executor.run("test-host", lambda a, b=0: a + b, 2, b=3)
+
+        assert result == 5
+        executor.shutdown()
+
+    async def test_exceptions_propagate(self):
+        """Test errors raised in the worker reach the caller"""
+        executor = HostExecutor(max_workers=2, per_host=1)
+
+        def fail():
+            raise RuntimeError("connection refused")
+
+        with pytest.raises(RuntimeError, match="connection refused"):
+            await executor.run("test-host", fail)
+        executor.shutdown()
+
+    async def test_event_loop_stays_responsive(self):
+        """Test a blocking call does not stall other coroutines"""
+        executor = HostExecutor(max_workers=2, per_host=1)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await executor.run("slow-host", time.sleep, 0.2)
+        task.cancel()
+
+        assert ticks >= 5
+        executor.shutdown()
+
+    async def test_slow_host_does_not_block_other_hosts(self):
+        """Test per-host limit leaves workers free for other hosts"""
+        executor = HostExecutor(max_workers=3, per_host=1)
+        release = threading.Event()
+
+        slow = [
+            asyncio.create_task(executor.run("slow-host", release.wait, 2))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+
+        start = time.monotonic()
+        result = await executor.run("fast-host", lambda: "done")
+        elapsed = time.monotonic() - start
+
+        release.set()
+        await asyncio.gather(*slow)
+
+        assert result == "done"
+        assert elapsed < 0.5
+        executor.shutdown()
+
+    async def test_host_limits_dropped_when_unused(self):
+        """Test per-host semaphores do not accumulate for finished hosts"""
+        executor = HostExecutor(max_workers=2, per_host=1)
+
+        await asyncio.gather(
+            *(executor.run(f"host-{i}", lambda: None) for i in range(20))
+        )
+
+        assert executor._host_limits[asyncio.get_running_loop()] == {}
+        executor.shutdown()
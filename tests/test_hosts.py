@@ -0,0 +1,109 @@
+"""
+Tests for the SSH host index used by the hosts resource and search tool
+"""
+
+import pytest
+
+from mcp_ssh.hosts import HostIndex, get_host_index
+
+
+@pytest.fixture
+def index():
+    """Index over a small fleet"""
+    config = {
+        "web-01": {"hostname": "web01.prod.example.com", "user": "deploy"},
+        "db-01": {
+            "hostname": "db01.prod.example.com",
+            "user": "postgres",
+            "port": "5022",
+        },
+        "web-02": {"hostname": "web02.prod.example.com", "user": "deploy"},
+        "web-staging": {"hostname": "web.staging.example.com", "user": "ubuntu"},
+        "bastion": {"hostname": "bastion.example.com", "port": "2222"},
+    }
+    return HostIndex(config)
+
+
+class TestHostIndex:
+    """Test filtering and pagination over the host index"""
+
+    def test_hosts_keep_config_order(self, index):
+        """Test the full listing follows the config"""
+        assert [h.name for h in index.hosts] == [
+            "web-01",
+            "db-01",
+            "web-02",
+            "web-staging",
+            "bastion",
+        ]
+        assert index.hosts[1].port == 5022
+        assert index.hosts[4].user is None
+
+    def test_pattern_without_wildcards_is_a_prefix(self, index):
+        """Test a plain pattern matches alias prefixes"""
+        hosts, cursor = index.search(pattern="web-0")
+
+        assert [h.name for h in hosts] == ["web-01", "web-02"]
+        assert cursor is None
+
+    def test_glob_and_hostname_filters(self, index):
+        """Test alias globs combined with hostname globs"""
+        hosts, _ = index.search(pattern="*-0?", hostname="*.PROD.example.com")
+        assert [h.name for h in hosts] == ["web-01", "db-01", "web-02"]
+
+        hosts, _ = index.search(pattern="web*", hostname="*.staging.*")
+        assert [h.name for h in hosts] == ["web-staging"]
+
+    def test_user_and_port_filters(self, index):
+        """Test exact user and port filters"""
+        hosts, _ = index.search(user="deploy")
+        assert [h.name for h in hosts] == ["web-01", "web-02"]
+
+        hosts, _ = index.search(port=22)
+        assert [h.name for h in hosts] == ["web-01", "web-02", "web-staging"]
+
+        hosts, _ = index.search(user="deploy", pattern="*02")
+        assert [h.name for h in hosts] == ["web-02"]
+
+    def test_pagination_with_cursor(self, index):
+        """Test pages continue from the returned cursor"""
+        first, cursor = index.search(limit=2)
+        assert [h.name for h in first] == ["web-01", "db-01"]
+        assert cursor == "web-02"
+
+        second, cursor = index.search(cursor=cursor, limit=2)
+        assert [h.name for h in second] == ["web-02", "web-staging"]
+
+        last, cursor = index.search(cursor=cursor, limit=2)
+        assert [h.name for h in last] == ["bastion"]
+        assert cursor is None
+
+    def test_filtered_pagination(self, index):
+        """Test a cursor resumes a filtered search"""
+        first, cursor = index.search(pattern="web", limit=1)
+        rest, end = index.search(pattern="web", cursor=cursor, limit=10)
+
+        assert [h.name for h in first + rest] == ["web-01", "web-02", "web-staging"]
+        assert end is None
+
+    def test_unknown_cursor(self, index):
+        """Test a cursor for a removed host is rejected"""
+        with pytest.raises(ValueError, match="cursor"):
+            index.search(cursor="gone")
+
+    def test_invalid_port_defaults_to_22(self):
+        """Test a malformed Port does not drop the host"""
+        index = HostIndex({"odd": {"port": "ssh"}})
+        assert index.hosts[0].port == 22
+
+
+class TestGetHostIndex:
+    """Test the shared index is rebuilt only for a new config"""
+
+    def test_same_config_reuses_index(self):
+        """Test the index is cached per config object"""
+        config = {"a": {"hostname": "a.example.com"}}
+
+        first = get_host_index(config)
+        assert get_host_index(config) is first
+        assert get_host_index(dict(config)) is not first
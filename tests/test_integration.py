@@ -32,6 +32,8 @@ class TestCoreIntegration:
             "integration test successful",
             "",
             0,
+            27,
+            27,
         )
 
         # Mock context with async methods
@@ -67,7 +69,7 @@ class TestCoreIntegration:
         # First command fails due to connection issue
         mock_get_client.side_effect = [None, MagicMock()]
         mock_execute_bg.return_value = 12345
-        mock_get_output.return_value = ("completed", "recovered", "", 0)
+        mock_get_output.return_value = ("completed", "recovered", "", 0, 9, 9)
 
         # Mock context with async methods
         mock_ctx = MagicMock()
@@ -0,0 +1,196 @@
+"""
+Tests for host inventories and group-targeted lookups
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from mcp_ssh.inventory import Inventory
+from mcp_ssh.ssh import load_inventory, resolve_host_config
+
+INI_INVENTORY = """# Fleet
+bastion ansible_host=203.0.113.1
+
+[web]
+web[01:03].example.com ansible_user=deploy
+canary.example.com ansible_user=canary ansible_port=2222
+
+[db]
+db1 ansible_host=10.0.0.5 "ansible_ssh_private_key_file=~/.ssh/db key"
+
+[prod:children]
+web
+db
+
+[prod:vars]
+ansible_user=ops
+ansible_port=22
+"""
+
+YAML_INVENTORY = """all:
+  vars:
+    ansible_user: root
+  children:
+    app:
+      hosts:
+        app1:
+          ansible_host: 192.0.2.10
+        app2:
+      vars:
+        ansible_user: app
+    cache:
+      hosts:
+        redis1:
+          ansible_port: 6022
+"""
+
+
+def _write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+class TestInventory:
+    """Test loading inventories into the host and group index"""
+
+    def test_ini_hosts_groups_and_ranges(self, tmp_path):
+        """Test INI sections, children and numeric host ranges"""
+        inventory = Inventory.load([_write(tmp_path, "hosts", INI_INVENTORY)])
+
+        assert inventory.members("web") == [
+            "web01.example.com",
+            "web02.example.com",
+            "web03.example.com",
+            "canary.example.com",
+        ]
+        assert inventory.members("prod") == inventory.members("web") + ["db1"]
+        assert inventory.members("ungrouped") == ["bastion"]
+        assert len(inventory.members("all")) == 6
+        assert inventory.members("missing") is None
+
+    def test_ini_variable_precedence(self, tmp_path):
+        """Test host vars override child group vars, which override parents"""
+        inventory = Inventory.load([_write(tmp_path, "hosts", INI_INVENTORY)])
+
+        assert inventory["web01.example.com"] == {"user": "deploy", "port": "22"}
+        assert inventory["canary.example.com"] == {"user": "canary", "port": "2222"}
+        assert inventory["db1"] == {
+            "hostname": "10.0.0.5",
+            "identityfile": "~/.ssh/db key",
+            "user": "ops",
+            "port": "22",
+        }
+        assert inventory["bastion"] == {"hostname": "203.0.113.1"}
+
+    def test_yaml_inventory(self, tmp_path):
+        """Test the YAML group/hosts/vars/children layout"""
+        pytest.importorskip("yaml")  # Only in the inventory extra
+        inventory = Inventory.load([_write(tmp_path, "fleet.yml", YAML_INVENTORY)])
+
+        assert inventory.members("app") == ["app1", "app2"]
+        assert inventory["app1"] == {"user": "app", "hostname": "192.0.2.10"}
+        assert inventory["app2"] == {"user": "app"}
+        assert inventory["redis1"] == {"user": "root", "port": "6022"}
+
+    def test_json_list_output(self, tmp_path):
+        """Test `ansible-inventory --list` JSON with _meta hostvars"""
+        document = {
+            "_meta": {"hostvars": {"lb1": {"ansible_host": "198.51.100.7"}}},
+            "all": {"children": ["ungrouped", "lb"]},
+            "lb": {"hosts": ["lb1", "lb2"], "vars": {"ansible_user": "haproxy"}},
+        }
+        inventory = Inventory.load(
+            [_write(tmp_path, "fleet.json", json.dumps(document))]
+        )
+
+        assert inventory.members("lb") == ["lb1", "lb2"]
+        assert inventory["lb1"] == {"user": "haproxy", "hostname": "198.51.100.7"}
+        assert "ungrouped" in inventory.groups
+
+    def test_multiple_files_are_merged(self, tmp_path):
+        """Test groups from several files end up in one index"""
+        pytest.importorskip("yaml")  # Only in the inventory extra
+        inventory = Inventory.load(
+            [
+                _write(tmp_path, "hosts", INI_INVENTORY),
+                _write(tmp_path, "fleet.yml", YAML_INVENTORY),
+            ]
+        )
+
+        assert "db1" in inventory
+        assert "app1" in inventory
+        assert set(inventory.members("all")) >= {"db1", "app1", "redis1"}
+
+    def test_only_connection_variables_mapped(self, tmp_path):
+        """Test application variables are not passed on as SSH options"""
+        path = _write(
+            tmp_path,
+            "hosts.ini",
+            "app1 ansible_user=deploy proxycommand=evil http_port=8080\n",
+        )
+
+        assert Inventory.load([path])["app1"] == {"user": "deploy"}
+
+    def test_group_cycle_does_not_recurse(self, tmp_path):
+        """Test a child group referring back to its parent is ignored"""
+        content = "[a:children]\nb\n[b:children]\na\n[b]\nhost1\n"
+        inventory = Inventory.load([_write(tmp_path, "hosts", content)])
+
+        assert inventory.members("a") == ["host1"]
+        assert inventory.members("all") == ["host1"]
+
+
+class TestInventoryLookup:
+    """Test inventory hosts resolve alongside the SSH config"""
+
+    def test_load_inventory_is_cached_until_changed(self, tmp_path):
+        """Test the inventory is only re-read when a file changes"""
+        path = _write(tmp_path, "hosts", "[web]\nweb1\n")
+
+        with patch("builtins.open", wraps=open) as spy_open:
+            first = load_inventory(path)
+            assert load_inventory(path) is first
+        assert spy_open.call_count == 1
+
+        with open(path, "a") as f:
+            f.write("web2\n")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert load_inventory(path).members("web") == ["web1", "web2"]
+
+    def test_unset_or_broken_inventory(self, tmp_path):
+        """Test no inventory, or an unreadable one, resolves nothing"""
+        assert load_inventory("") is None
+        assert load_inventory(str(tmp_path / "missing.ini")) is None
+
+    @pytest.mark.parametrize(
+        "host,user", [("db1", "ops"), ("web02.example.com", "deploy")]
+    )
+    def test_resolve_inventory_host(self, tmp_path, host, user):
+        """Test inventory hosts get SSH config wildcard defaults underneath"""
+        config = _write(
+            tmp_path,
+            "config",
+            "Host known\n    HostName known.example.com\n\n"
+            "Host *\n    User nobody\n    ServerAliveInterval 15\n",
+        )
+        inventory = _write(tmp_path, "hosts", INI_INVENTORY)
+
+        def expanduser(path):
+            return path.replace("~/.ssh/config", config)
+
+        with (
+            patch("os.path.expanduser", side_effect=expanduser),
+            patch("mcp_ssh.ssh.SSH_INVENTORY", inventory),
+        ):
+            resolved = resolve_host_config(host)
+            assert resolve_host_config("known")["user"] == "nobody"
+            assert resolve_host_config("unknown") is None
+
+        assert resolved["serveraliveinterval"] == "15"
+        assert resolved["user"] == user
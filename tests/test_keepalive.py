@@ -0,0 +1,188 @@
+"""
+Tests for the keepalive scheduler
+
+This module tests acknowledged keepalives, miss counting against the
+configured maximum, and eviction of dead transports.
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+from paramiko.common import cMSG_GLOBAL_REQUEST
+
+from mcp_ssh.keepalive import KEEPALIVE_REQUEST, KeepaliveScheduler
+from mcp_ssh.pool import ConnectionPool
+
+
+def make_client(answers=True):
+    """Create a mock client whose server answers keepalives or stays silent"""
+    client = MagicMock()
+    transport = client.get_transport.return_value
+    transport.is_active.return_value = True
+    if answers:
+        # The transport thread sets the completion event on the reply
+        transport._send_user_message.side_effect = (
+            lambda message: transport.completion_event.set()
+        )
+    return client
+
+
+def sent_probes(client):
+    """Keepalive requests sent on client's transport"""
+    return client.get_transport.return_value._send_user_message.call_args_list
+
+
+def wait_for(condition, timeout=2.0):
+    """Poll until condition() is true or timeout expires"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestKeepaliveScheduler:
+    """Test KeepaliveScheduler behaviour"""
+
+    def test_answered_keepalives_are_acked(self):
+        """Test a responsive server keeps the connection watched"""
+        on_dead = MagicMock()
+        on_ack = MagicMock()
+        scheduler = KeepaliveScheduler(on_dead, on_ack)
+        client = make_client()
+
+        scheduler.watch("test-host", client, interval=0.05, count_max=2)
+
+        assert wait_for(lambda: on_ack.call_count >= 2)
+        message = sent_probes(client)[-1].args[0]
+        message.rewind()
+        assert message.get_byte() == cMSG_GLOBAL_REQUEST
+        assert message.get_text() == KEEPALIVE_REQUEST
+        assert message.get_boolean() is True  # A reply is wanted
+        on_dead.assert_not_called()
+        assert scheduler.watched() == 1
+        scheduler.stop()
+
+    def test_missed_keepalives_report_dead_connection(self):
+        """Test count_max unanswered keepalives evict the connection"""
+        on_dead = MagicMock()
+        scheduler = KeepaliveScheduler(on_dead)
+        client = make_client(answers=False)
+
+        scheduler.watch("test-host", client, interval=0.05, count_max=2)
+
+        assert wait_for(lambda: on_dead.called)
+        on_dead.assert_called_once_with("test-host", client)
+        assert scheduler.watched() == 0
+        # Only one keepalive is ever outstanding on a silent transport
+        assert len(sent_probes(client)) == 1
+        scheduler.stop()
+
+    def test_closed_transport_is_dropped(self):
+        """Test connections closed elsewhere stop being watched quietly"""
+        on_dead = MagicMock()
+        scheduler = KeepaliveScheduler(on_dead)
+        client = make_client()
+        client.get_transport.return_value.is_active.return_value = False
+
+        scheduler.watch("test-host", client, interval=0.05, count_max=2)
+
+        assert wait_for(lambda: scheduler.watched() == 0)
+        on_dead.assert_not_called()
+        scheduler.stop()
+
+    def test_silent_servers_do_not_delay_healthy_ones(self):
+        """Test many silent transports cannot starve probes to a healthy one"""
+        on_dead = MagicMock()
+        scheduler = KeepaliveScheduler(on_dead)
+        silent = [make_client(answers=False) for _ in range(8)]
+        healthy = make_client()
+
+        for i, client in enumerate(silent):
+            scheduler.watch(f"silent{i}", client, interval=0.05, count_max=3)
+        scheduler.watch("healthy", healthy, interval=0.05, count_max=3)
+
+        assert wait_for(lambda: on_dead.call_count == len(silent))
+        time.sleep(0.2)
+        assert sorted(c.args[0] for c in on_dead.call_args_list) == sorted(
+            f"silent{i}" for i in range(len(silent))
+        )
+        assert scheduler.watched() == 1
+        scheduler.stop()
+
+    def test_zero_interval_disables(self):
+        """Test ServerAliveInterval 0 does not watch the connection"""
+        scheduler = KeepaliveScheduler(MagicMock())
+
+        scheduler.watch("test-host", make_client(), interval=0, count_max=3)
+
+        assert scheduler.watched() == 0
+
+
+class TestPoolReplace:
+    """Test the pool side of keepalive eviction"""
+
+    def test_replace_reconnects_idle_connection(self):
+        """Test a dead idle connection is swapped for a fresh one"""
+        dead = make_client()
+        fresh = make_client()
+        pool = ConnectionPool(MagicMock(side_effect=[dead, fresh]))
+        pool.checkout("test-host")
+        pool.checkin("test-host", dead)
+
+        assert pool.replace("test-host", dead) is True
+
+        dead.close.assert_called_once()
+        assert pool.checkout("test-host") is fresh
+        assert pool.totals()["evicted_dead"] == 1
+
+    def test_replace_leased_connection_not_closed(self):
+        """Test a connection in use is retired, and closed only when returned"""
+        dead = make_client()
+        fresh = make_client()
+        pool = ConnectionPool(MagicMock(side_effect=[dead, fresh]))
+        pool.checkout("test-host")
+
+        assert pool.replace("test-host", dead) is True
+
+        dead.close.assert_not_called()
+        assert pool.checkout("test-host") is fresh
+        pool.checkin("test-host", dead)
+        dead.close.assert_called_once()
+
+    def test_replace_without_reuse_does_not_reconnect(self):
+        """Test connections that would not be kept are only dropped"""
+        dead = make_client()
+        factory = MagicMock(return_value=dead)
+        pool = ConnectionPool(factory, keep_idle=False)
+        pool.checkout("test-host")
+
+        assert pool.replace("test-host", dead) is False
+        factory.assert_called_once()
+
+    def test_mark_alive_skips_liveness_probe(self):
+        """Test an acked keepalive counts as recent activity"""
+        client = make_client()
+        pool = ConnectionPool(MagicMock(return_value=client), probe_after=60)
+
+        with patch("mcp_ssh.pool.time.monotonic", return_value=100.0):
+            pool.checkout("test-host")
+            pool.checkin("test-host", client)
+        with patch("mcp_ssh.pool.time.monotonic", return_value=500.0):
+            pool.mark_alive(client)
+        with patch("mcp_ssh.pool.time.monotonic", return_value=510.0):
+            assert pool.checkout("test-host") is client
+
+        client.get_transport.return_value.open_session.assert_not_called()
+
+    def test_breaker_probe_connection_not_watched(self):
+        """Test recovery-check connections are closed without keepalives"""
+        from mcp_ssh.ssh import _probe_connection
+
+        client = make_client()
+        with patch("mcp_ssh.ssh._connect_from_config", return_value=client) as connect:
+            assert _probe_connection("test-host") is True
+
+        connect.assert_called_once_with("test-host", keepalive=False)
+        client.close.assert_called_once()
@@ -4,6 +4,7 @@ Tests for MCP server functionality
 This module tests the MCP tools, resources, prompts, and server integration.
 """
 
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -14,11 +15,16 @@ from mcp_ssh.server import (
     CommandResult,
     FileTransferRequest,
     FileTransferResult,
+    GroupCommandRequest,
     HostInfo,
+    HostSearchRequest,
     SSHCommand,
     execute_command,
+    execute_command_on_group,
+    get_connection_stats,
     list_ssh_hosts,
     mcp,
+    search_ssh_hosts,
     transfer_file,
 )
 
@@ -36,7 +42,7 @@ class TestMCPTools:
         """Test successful command execution"""
         mock_client.return_value = MagicMock()
         mock_execute_bg.return_value = 12345
-        mock_get_output.return_value = ("completed", "command output", "", 0)
+        mock_get_output.return_value = ("completed", "command output", "", 0, 14, 14)
 
         request = CommandRequest(command="ls -la", host="test-host")
 
@@ -58,6 +64,32 @@ class TestMCPTools:
         assert result.status == "completed"
         mock_client.assert_called_once_with("test-host")
 
+    @patch("mcp_ssh.server.QUICK_WAIT_TIME", 30)
+    @patch("mcp_ssh.server.get_ssh_client_from_config")
+    @patch("mcp_ssh.server.execute_command_background")
+    @patch("mcp_ssh.server.wait_for_process")
+    @patch("mcp_ssh.server.get_process_output")
+    @pytest.mark.asyncio
+    async def test_execute_command_returns_when_finished(
+        self, mock_get_output, mock_wait, mock_execute_bg, mock_client
+    ):
+        """Test a finished command does not wait out QUICK_WAIT_TIME"""
+        mock_client.return_value = MagicMock()
+        mock_execute_bg.return_value = 12345
+        mock_wait.return_value = True
+        mock_get_output.return_value = ("completed", "host1\n", "", 0, 6, 6)
+
+        start = time.monotonic()
+        result = await execute_command(
+            CommandRequest(command="hostname", host="test-host"), AsyncMock()
+        )
+
+        assert time.monotonic() - start < 5
+        assert result.stdout == "host1\n"
+        client, process, timeout, min_output = mock_wait.call_args[0]
+        assert process.pid == 12345
+        assert timeout == 30
+
     @patch("mcp_ssh.server.get_ssh_client_from_config")
     @pytest.mark.asyncio
     async def test_execute_command_no_host(self, mock_client):
@@ -94,6 +126,8 @@ class TestMCPTools:
             "stdout output",
             "stderr output",
             0,
+            13,
+            13,
         )
 
         request = CommandRequest(command="ls /nonexistent", host="test-host")
@@ -113,6 +147,48 @@ class TestMCPTools:
         assert result.stderr == "stderr output"
         assert result.exit_code == 0
 
+    @patch("mcp_ssh.server.get_ssh_client_from_config")
+    @patch("mcp_ssh.server.execute_command_background")
+    @patch("mcp_ssh.server.get_process_output")
+    @pytest.mark.asyncio
+    async def test_execute_command_next_byte(
+        self, mock_get_output, mock_execute_bg, mock_client
+    ):
+        """Test next_byte is the output end reported, not the re-encoded size"""
+        mock_client.return_value = MagicMock()
+        mock_execute_bg.return_value = 12345
+        # Four bytes of output, one of them invalid UTF-8
+        mock_get_output.return_value = ("completed", "a�bc", "", 0, 4, 4)
+
+        request = CommandRequest(command="cat data.bin", host="test-host")
+        mock_ctx = AsyncMock()
+
+        result = await execute_command(request, mock_ctx)
+
+        assert result.success is True
+        assert result.next_byte == 4
+
+    @patch("mcp_ssh.server.get_ssh_client_from_config")
+    @patch("mcp_ssh.server.execute_command_background")
+    @patch("mcp_ssh.server.get_process_output")
+    @pytest.mark.asyncio
+    async def test_execute_command_multibyte_has_more(
+        self, mock_get_output, mock_execute_bg, mock_client
+    ):
+        """Test has_more_output compares bytes, not characters"""
+        mock_client.return_value = MagicMock()
+        mock_execute_bg.return_value = 12345
+        # 50 000 of 100 000 bytes, half as many characters
+        output = "é" * 25000
+        mock_get_output.return_value = ("completed", output, "", 0, 50000, 100000)
+
+        request = CommandRequest(command="cat accents.txt", host="test-host")
+
+        result = await execute_command(request, AsyncMock())
+
+        assert result.has_more_output is True
+        assert result.next_byte == 50000
+
     @patch("mcp_ssh.server.get_ssh_client_from_config")
     @patch("mcp_ssh.server.execute_command_background")
     @patch("mcp_ssh.server.get_process_output")
@@ -123,7 +199,7 @@ class TestMCPTools:
         """Test command execution with no output"""
         mock_client.return_value = MagicMock()
         mock_execute_bg.return_value = 12345
-        mock_get_output.return_value = ("completed", "", "", 0)
+        mock_get_output.return_value = ("completed", "", "", 0, 0, 0)
 
         request = CommandRequest(command="touch /tmp/test", host="test-host")
 
@@ -152,7 +228,7 @@ class TestMCPTools:
         """Test command execution with only stderr output"""
         mock_client.return_value = MagicMock()
         mock_execute_bg.return_value = 12345
-        mock_get_output.return_value = ("completed", "", "error only", 1)
+        mock_get_output.return_value = ("completed", "", "error only", 1, 0, 0)
 
         request = CommandRequest(command="invalid-command", host="test-host")
 
@@ -171,12 +247,57 @@ class TestMCPTools:
         assert result.stderr == "error only"
         assert result.exit_code == 1
 
+    @patch("mcp_ssh.server.inventory_group")
+    @patch("mcp_ssh.server.execute_command")
+    @pytest.mark.asyncio
+    async def test_execute_command_on_group(self, mock_execute, mock_group):
+        """Test a group command runs once per inventory host"""
+        mock_group.return_value = ["web1", "web2"]
+
+        async def fake_execute(request, ctx):
+            return CommandResult(
+                success=request.host == "web1",
+                process_id=f"proc-{request.host}",
+                status="completed",
+            )
+
+        mock_execute.side_effect = fake_execute
+        request = GroupCommandRequest(group="web", command="uptime")
+
+        result = await execute_command_on_group(request, AsyncMock())
+
+        mock_group.assert_called_once_with("web")
+        assert mock_execute.call_count == 2
+        assert result.success is False
+        assert result.results["web1"].process_id == "proc-web1"
+        assert result.results["web2"].success is False
+
+    @patch("mcp_ssh.server.inventory_group", return_value=None)
+    @pytest.mark.asyncio
+    async def test_execute_command_on_unknown_group(self, mock_group):
+        """Test an unknown group is reported without running anything"""
+        request = GroupCommandRequest(group="nope", command="uptime")
+
+        result = await execute_command_on_group(request, AsyncMock())
+
+        assert result.success is False
+        assert "not found" in result.error_message
+
+    @pytest.mark.asyncio
+    async def test_get_connection_stats(self):
+        """Test connection stats report pool totals and evictions"""
+        result = await get_connection_stats()
+
+        assert set(result) == {"pool", "hosts", "unreachable", "keys"}
+        assert result["pool"]["max_connections"] > 0
+        assert "evicted_lru" in result["pool"]
+
 
 class TestFileTransfer:
     """Test file transfer functionality"""
 
     @patch("mcp_ssh.server.get_ssh_client_from_config")
-    @patch("mcp_ssh.ssh.transfer_file_scp")
+    @patch("mcp_ssh.server.transfer_file_scp")
     @pytest.mark.asyncio
     async def test_transfer_file_upload_success(self, mock_transfer, mock_client):
         """Test successful file upload with source validation"""
@@ -212,7 +333,7 @@ class TestFileTransfer:
         )
 
     @patch("mcp_ssh.server.get_ssh_client_from_config")
-    @patch("mcp_ssh.ssh.transfer_file_scp")
+    @patch("mcp_ssh.server.transfer_file_scp")
     @pytest.mark.asyncio
     async def test_transfer_file_upload_source_not_exists(
         self, mock_transfer, mock_client
@@ -250,7 +371,7 @@ class TestFileTransfer:
         mock_transfer.assert_called_once()
 
     @patch("mcp_ssh.server.get_ssh_client_from_config")
-    @patch("mcp_ssh.ssh.transfer_file_scp")
+    @patch("mcp_ssh.server.transfer_file_scp")
     @pytest.mark.asyncio
     async def test_transfer_file_upload_source_not_file(
         self, mock_transfer, mock_client
@@ -288,7 +409,7 @@ class TestFileTransfer:
         mock_transfer.assert_called_once()
 
     @patch("mcp_ssh.server.get_ssh_client_from_config")
-    @patch("mcp_ssh.ssh.transfer_file_scp")
+    @patch("mcp_ssh.server.transfer_file_scp")
     @pytest.mark.asyncio
     async def test_transfer_file_download_success(self, mock_transfer, mock_client):
         """Test successful file download with remote source validation"""
@@ -319,7 +440,7 @@ class TestFileTransfer:
         assert result.error_message == ""
 
     @patch("mcp_ssh.server.get_ssh_client_from_config")
-    @patch("mcp_ssh.ssh.transfer_file_scp")
+    @patch("mcp_ssh.server.transfer_file_scp")
     @pytest.mark.asyncio
     async def test_transfer_file_download_remote_not_exists(
         self, mock_transfer, mock_client
@@ -382,7 +503,7 @@ class TestFileTransfer:
         assert result.host == "nonexistent-host"
 
     @patch("mcp_ssh.server.get_ssh_client_from_config")
-    @patch("mcp_ssh.ssh.transfer_file_scp")
+    @patch("mcp_ssh.server.transfer_file_scp")
     @patch("os.path.exists")
     @patch("os.path.isfile")
     @pytest.mark.asyncio
@@ -494,6 +615,35 @@ class TestMCPResources:
         assert dev_host.user is None
         assert dev_host.port == 22
 
+    @patch("mcp_ssh.ssh.parse_ssh_config")
+    @pytest.mark.asyncio
+    async def test_search_ssh_hosts_pages(self, mock_parse):
+        """Test searching hosts returns filtered pages with a cursor"""
+        mock_parse.return_value = {
+            f"web-{i:02d}": {"hostname": f"web{i}.example.com"} for i in range(5)
+        } | {"db-01": {"hostname": "db.example.com"}}
+
+        page = await search_ssh_hosts(HostSearchRequest(pattern="web", limit=3))
+        assert [h.name for h in page.hosts] == ["web-00", "web-01", "web-02"]
+        assert page.next_cursor == "web-03"
+
+        page = await search_ssh_hosts(
+            HostSearchRequest(pattern="web", cursor=page.next_cursor, limit=3)
+        )
+        assert [h.name for h in page.hosts] == ["web-03", "web-04"]
+        assert page.next_cursor is None
+
+    @patch("mcp_ssh.ssh.parse_ssh_config")
+    @pytest.mark.asyncio
+    async def test_search_ssh_hosts_bad_cursor(self, mock_parse):
+        """Test an unknown cursor is reported instead of raising"""
+        mock_parse.return_value = {"web-01": {"hostname": "web.example.com"}}
+
+        page = await search_ssh_hosts(HostSearchRequest(cursor="missing"))
+
+        assert page.hosts == []
+        assert "cursor" in page.error_message
+
 
 class TestSSHCommandModel:
     """Test the SSH command Pydantic model"""
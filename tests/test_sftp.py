@@ -0,0 +1,157 @@
+"""
+Tests for random-access reads of remote files over SFTP
+"""
+
+import io
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import paramiko
+import pytest
+
+from mcp_ssh.sftp import RemoteFiles
+
+
+class FakeRemoteFile(io.BytesIO):
+    """SFTP file double backed by bytes that may grow"""
+
+    def stat(self):
+        return SimpleNamespace(st_size=len(self.getbuffer()))
+
+
+def make_client(files):
+    """A client whose SFTP sessions serve the in-memory file system files"""
+    client = MagicMock()
+    client.get_transport.return_value.is_active.return_value = True
+
+    def open_sftp():
+        session = MagicMock()
+        session.get_channel.return_value.closed = False
+
+        def open_file(path, mode):
+            if path not in files:
+                raise FileNotFoundError(2, "No such file")
+            return FakeRemoteFile(files[path])
+
+        session.open.side_effect = open_file
+        return session
+
+    client.open_sftp.side_effect = open_sftp
+    return client
+
+
+@pytest.fixture
+def remote():
+    """A client and the remote files it can read"""
+    files = {"/tmp/job.out": b"0123456789" * 10}
+    return SimpleNamespace(client=make_client(files), files=files)
+
+
+class TestRemoteFiles:
+    """Test SFTP sessions and handles are reused across reads"""
+
+    def test_pages_reuse_session_and_handle(self, remote):
+        """Test consecutive pages open one session and one file"""
+        files = RemoteFiles()
+
+        path = "/tmp/job.out"
+        assert files.read(remote.client, path, 0, 10) == (b"0123456789", 100)
+        assert files.read(remote.client, path, 95, 10) == (b"56789", 100)
+        assert files.read(remote.client, path, 100, 10) == (b"", 100)
+
+        remote.client.open_sftp.assert_called_once()
+        session = files._sessions[remote.client.get_transport()].sftp
+        session.open.assert_called_once_with("/tmp/job.out", "rb")
+
+    def test_missing_file_reads_empty(self, remote):
+        """Test a file that does not exist reads as empty"""
+        files = RemoteFiles()
+
+        assert files.read(remote.client, "/tmp/missing.out", 0, 10) == (b"", 0)
+
+    def test_least_recently_read_handle_closed(self, remote):
+        """Test at most max_handles files stay open"""
+        remote.files.update({"/tmp/a": b"a", "/tmp/b": b"b"})
+        files = RemoteFiles(max_handles=2)
+
+        first = files._handle(remote.client, "/tmp/job.out").file
+        files.read(remote.client, "/tmp/a", 0, 1)
+        files.read(remote.client, "/tmp/b", 0, 1)
+
+        assert first.closed
+        assert len(files._handles) == 2
+
+    def test_stale_session_reopened(self, remote):
+        """Test a read failing on a dead session is retried on a new one"""
+        files = RemoteFiles()
+        files.read(remote.client, "/tmp/job.out", 0, 10)
+        handle = files._handle(remote.client, "/tmp/job.out")
+        handle.file = MagicMock()
+        handle.file.stat.side_effect = paramiko.SSHException("channel closed")
+
+        data, size = files.read(remote.client, "/tmp/job.out", 10, 10)
+        assert (data, size) == (b"0123456789", 100)
+        assert remote.client.open_sftp.call_count == 2
+
+    def test_forget_closes_handle(self, remote):
+        """Test forgetting a path closes its handle and keeps the session"""
+        files = RemoteFiles()
+        files.read(remote.client, "/tmp/job.out", 0, 10)
+        handle = files._handle(remote.client, "/tmp/job.out")
+
+        files.forget("/tmp/job.out")
+
+        assert handle.file.closed
+        assert remote.client.get_transport() in files._sessions
+
+    def test_forget_closes_handles_of_other_connections(self, remote):
+        """Test forgetting a path closes handles opened on an earlier client"""
+        files = RemoteFiles()
+        old_client = make_client(remote.files)
+        old_handle = files._handle(old_client, "/tmp/job.out")
+        new_handle = files._handle(remote.client, "/tmp/job.out")
+
+        files.forget("/tmp/job.out")
+
+        assert old_handle.file.closed
+        assert new_handle.file.closed
+        assert not files._handles
+
+    def test_drop_closes_session_and_handles(self, remote):
+        """Test dropping a connection closes its session and files only"""
+        files = RemoteFiles()
+        other = make_client(remote.files)
+        handle = files._handle(remote.client, "/tmp/job.out")
+        kept = files._handle(other, "/tmp/job.out")
+        sftp = files._sessions[remote.client.get_transport()].sftp
+
+        files.drop(remote.client)
+
+        assert handle.file.closed
+        sftp.close.assert_called_once()
+        assert remote.client.get_transport() not in files._sessions
+        assert not kept.file.closed
+        assert other.get_transport() in files._sessions
+
+    def test_closed_connection_sessions_dropped(self, remote):
+        """Test sessions of inactive transports are closed on the next open"""
+        files = RemoteFiles()
+        old_client = make_client(remote.files)
+        old_handle = files._handle(old_client, "/tmp/job.out")
+        old_sftp = files._sessions[old_client.get_transport()].sftp
+        old_client.get_transport.return_value.is_active.return_value = False
+
+        files.read(remote.client, "/tmp/job.out", 0, 10)
+
+        assert old_handle.file.closed
+        old_sftp.close.assert_called_once()
+        assert old_client.get_transport() not in files._sessions
+
+    def test_inactive_connection_not_read(self, remote):
+        """Test reading on a closed connection raises instead of caching"""
+        files = RemoteFiles()
+        remote.client.get_transport.return_value = None
+
+        with pytest.raises(paramiko.SSHException):
+            files.read(remote.client, "/tmp/job.out", 0, 10)
+        assert not files._sessions
@@ -0,0 +1,88 @@
+"""
+Tests for cutting output pages on UTF-8 character boundaries
+"""
+
+import mmap
+
+from mcp_ssh.slices import utf8_slice
+from mcp_ssh.ssh import _parse_snapshot
+
+TEXT = "añ€😀z".encode()  # 1, 2, 3, 4 and 1 byte characters
+
+
+class TestUtf8Slice:
+    """Test pages never split a character"""
+
+    def test_whole_data(self):
+        """Test a page covering everything returns it unchanged"""
+        assert utf8_slice(TEXT, 0, 100) == ("añ€😀z", 0, len(TEXT))
+
+    def test_end_moves_back_to_boundary(self):
+        """Test a character the page cannot hold is left for the next page"""
+        # Bytes 0-4 hold "añ" and the first two bytes of "€"
+        assert utf8_slice(TEXT, 0, 5) == ("añ", 0, 3)
+        assert utf8_slice(TEXT, 3, 5) == ("€", 3, 6)
+
+    def test_pages_cover_data_exactly(self):
+        """Test following next offsets reads every character once"""
+        pages, start = [], 0
+        while start < len(TEXT):
+            text, _, start = utf8_slice(TEXT, start, 4)
+            pages.append(text)
+
+        assert "".join(pages) == "añ€😀z"
+
+    def test_start_inside_character(self):
+        """Test a start inside a character moves to the next one"""
+        assert utf8_slice(TEXT, 2, 100) == ("€😀z", 3, len(TEXT))
+
+    def test_page_smaller_than_character(self):
+        """Test a page too small for one character returns it whole"""
+        assert utf8_slice(TEXT, 6, 2) == ("😀", 6, 10)
+
+    def test_incomplete_character_at_end(self):
+        """Test a character still being written is not returned yet"""
+        assert utf8_slice(TEXT[:8], 0, 100) == ("añ€", 0, 6)
+
+    def test_incomplete_character_alone(self):
+        """Test a lone character still being written is not returned yet"""
+        assert utf8_slice("é€".encode()[:4], 2, 100) == ("", 2, 2)
+        assert utf8_slice("é€".encode()[:4], 2, 1) == ("", 2, 2)
+
+    def test_invalid_bytes_replaced(self):
+        """Test bytes that are not UTF-8 are replaced, not raised on"""
+        assert utf8_slice(b"ok\xff\xfe", 0, 100) == ("ok��", 0, 4)
+
+    def test_memory_map(self, tmp_path):
+        """Test slicing a memory-mapped file"""
+        path = tmp_path / "output"
+        path.write_bytes(TEXT * 1000)
+
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            assert utf8_slice(mapped, len(TEXT) * 500, 8) == ("añ€", 5500, 5506)
+        finally:
+            mapped.close()
+
+
+class TestSnapshotDecoding:
+    """Test snapshot output cut inside a character decodes"""
+
+    def test_cut_character_left_out(self):
+        """Test a character cut by the size limit is dropped"""
+        data = b"NOTRUNNING 0 9 0 4 0\n" + "añ€".encode()[:4]
+
+        assert _parse_snapshot(data) == ("completed", "añ", "", 0, 3, 9)
+
+    def test_malformed_header(self):
+        """Test an empty or short header reports a failed status"""
+        assert _parse_snapshot(b"") == ("failed", "", "", None, 0, 0)
+        assert _parse_snapshot(b"STOPPED 0 4\nabcd") == ("failed", "", "", None, 0, 0)
+        assert _parse_snapshot(b"STOPPED 0 4 0 x 0\n") == ("failed", "", "", None, 0, 0)
+
+    def test_next_byte_counts_consumed_bytes(self):
+        """Test the output end counts bytes, not re-encoded replacements"""
+        data = b"STOPPED 0 4 0 4 0\na\xffbc"
+
+        assert _parse_snapshot(data) == ("completed", "a\ufffdbc", "", 0, 4, 4)
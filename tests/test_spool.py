@@ -0,0 +1,250 @@
+"""
+Tests for spooling background job output to local files
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import paramiko
+import pytest
+
+from mcp_ssh.background import BackgroundProcess
+from mcp_ssh.spool import OutputSpool
+from mcp_ssh.ssh import (
+    execute_command_spooled,
+    get_output_chunk,
+    get_process_output,
+    is_process_running,
+    wait_for_process,
+)
+from tests.conftest import feed_stderr
+
+
+class RemoteJob:
+    """Drives a channel the way a transport would for a running job"""
+
+    def __init__(self):
+        self.channel = paramiko.Channel(1)
+
+    def stdout(self, data):
+        self.channel._feed(data)
+
+    def stderr(self, data):
+        feed_stderr(self.channel, data)
+
+    def exit(self, status=0):
+        self.channel._handle_eof(None)
+        self.channel.exit_status = status
+        self.channel.status_event.set()
+
+
+@pytest.fixture
+def job():
+    return RemoteJob()
+
+
+@pytest.fixture
+def spool(job, tmp_path):
+    on_close = MagicMock()
+    spool = OutputSpool(
+        job.channel, str(tmp_path / "job.out"), str(tmp_path / "job.err"), on_close
+    )
+    yield spool
+    if not spool.finished:
+        job.exit()
+
+
+class TestOutputSpool:
+    """Test output is spooled locally as the job produces it"""
+
+    def test_pid_line_not_spooled(self, job, spool):
+        """Test the launch wrapper's PID line is parsed, not kept as output"""
+        job.stdout(b"4321\nfirst line\n")
+
+        assert spool.wait_for_pid(5) == 4321
+        assert spool.wait(5, len(b"first line\n")) is False
+        assert spool.page(0, 0, 100) == ("first line\n", 11, 11)
+
+    def test_pid_split_across_packets(self, job, spool):
+        """Test a PID line arriving in pieces is still parsed"""
+        job.stdout(b"43")
+        job.stdout(b"21\nout")
+
+        assert spool.wait_for_pid(5) == 4321
+        spool.wait(5, 3)
+        assert spool.page(0, 0, 100) == ("out", 3, 3)
+
+    def test_exit_status_from_channel(self, job, spool):
+        """Test completion and exit code come from the exit-status message"""
+        job.stdout(b"1\nhello\n")
+        job.stderr(b"warning\n")
+        job.exit(3)
+
+        assert spool.wait(5, 10**9) is True
+        assert spool.snapshot(1000) == ("completed", "hello\n", "warning\n", 3, 6, 6)
+        spool._on_close.assert_called_once()
+
+    def test_running_snapshot(self, job, spool):
+        """Test a running job reports its output so far"""
+        job.stdout(b"1\npartial")
+        spool.wait(5, 7)
+
+        assert spool.snapshot(1000) == ("running", "partial", "", None, 7, 7)
+
+    def test_read_slices(self, job, spool):
+        """Test pages are cut from the spooled bytes"""
+        job.stdout(b"1\n" + b"0123456789" * 3)
+        job.exit()
+        spool.wait(5, 10**9)
+
+        assert spool.page(0, 25, 10) == ("56789", 30, 30)
+        assert spool.page(0, 30, 10) == ("", 30, 30)
+
+    def test_pages_follow_growing_output(self, job, spool):
+        """Test pages are cut on characters as more output is spooled"""
+        data = "ünïcödé".encode()
+        job.stdout(b"1\n" + data[:4])
+        spool.wait(5, 4)
+
+        # The third character is still incomplete
+        assert spool.page(0, 0, 100) == ("ün", 3, 4)
+
+        job.stdout(data[4:])
+        spool.wait(5, len(data))
+        assert spool.page(0, 3, 100) == ("ïcödé", len(data), len(data))
+
+    def test_remove_deletes_files(self, job, spool):
+        """Test cleanup stops spooling and deletes the spool files"""
+        job.stdout(b"1\n")
+        spool.wait_for_pid(5)
+        job.exit()
+        spool.remove()
+
+        assert spool.finished
+        spool._on_close.assert_called_once()
+        assert not os.path.exists(spool.stdout_path)
+        assert not os.path.exists(spool.stderr_path)
+
+    def test_files_private_to_user(self, spool):
+        """Test the spool files are readable only by the current user"""
+        assert os.stat(spool.stdout_path).st_mode & 0o777 == 0o600
+        assert os.stat(spool.stderr_path).st_mode & 0o777 == 0o600
+
+    def test_directory_made_private(self, job, tmp_path):
+        """Test a new or group-readable spool directory is restricted"""
+        spool_dir = tmp_path / "spool"
+        spool_dir.mkdir(mode=0o755)
+        spool = OutputSpool(
+            job.channel, str(spool_dir / "job.out"), str(spool_dir / "job.err")
+        )
+        job.exit()
+        spool.wait(5, 10**9)
+
+        assert os.stat(spool_dir).st_mode & 0o777 == 0o700
+
+    def test_foreign_directory_refused(self, job, tmp_path):
+        """Test a spool directory owned by another user is not used"""
+        with (
+            patch("mcp_ssh.spool.os.getuid", return_value=os.getuid() + 1),
+            pytest.raises(PermissionError),
+        ):
+            OutputSpool(job.channel, str(tmp_path / "job.out"), str(tmp_path / "j.err"))
+        assert not os.path.exists(tmp_path / "job.out")
+
+
+class TestSpooledCommands:
+    """Test the SSH functions serve spooled processes locally"""
+
+    def _process(self):
+        return BackgroundProcess(
+            "spool123",
+            "test-host",
+            "make build",
+            None,
+            datetime.now(),
+            "running",
+            "/tmp/out",
+            "/tmp/err",
+        )
+
+    def test_launch_and_serve_locally(self, job, tmp_path):
+        """Test a spooled launch returns the PID and reads need no SSH calls"""
+        client = MagicMock()
+        client.get_transport.return_value.open_session.return_value = job.channel
+        job.channel.exec_command = MagicMock()
+        process = self._process()
+
+        def run_job():
+            time.sleep(0.01)
+            job.stdout(b"777\nbuilt\n")
+            job.exit(0)
+
+        thread = threading.Thread(target=run_job)
+        thread.start()
+        with (
+            patch("mcp_ssh.ssh.SSH_SPOOL_DIR", str(tmp_path)),
+            patch("mcp_ssh.ssh.release_ssh_client") as release,
+        ):
+            assert execute_command_spooled(client, process) == 777
+            assert wait_for_process(client, process, 5, 10**9) is True
+            thread.join()
+            process.spool._thread.join(5)
+
+            assert get_process_output(client, process, 1000) == (
+                "completed",
+                "built\n",
+                "",
+                0,
+                6,
+                6,
+            )
+            assert get_output_chunk(client, process, 2, 100) == ("ilt\n", False, 6)
+            release.assert_called_once_with("test-host", client)
+
+        assert job.channel.exec_command.call_args.args[0] == (
+            "echo $$; exec bash -c 'make build'"
+        )
+        client.exec_command.assert_not_called()
+        client.open_sftp.assert_not_called()
+
+    def test_spool_failure_releases_client(self):
+        """Test a spool that cannot be created closes the channel and releases"""
+        client = MagicMock()
+        channel = client.get_transport.return_value.open_session.return_value
+
+        with (
+            patch("mcp_ssh.ssh.OutputSpool", side_effect=OSError("read-only")),
+            patch("mcp_ssh.ssh.release_ssh_client") as release,
+            pytest.raises(OSError),
+        ):
+            execute_command_spooled(client, self._process())
+
+        channel.close.assert_called_once()
+        release.assert_called_once_with("test-host", client)
+
+    def test_running_checked_remotely(self, job, spool):
+        """Test an open spool still asks the remote host whether the PID lives"""
+        stdout = MagicMock()
+        stdout.read.return_value = b"STOPPED\n"
+        client = MagicMock()
+        client.exec_command.return_value = (MagicMock(), stdout, MagicMock())
+        process = self._process()
+        process.pid = 777
+        process.spool = spool
+
+        assert is_process_running(client, process) is False
+        assert "kill -0 777" in client.exec_command.call_args.args[0]
+
+    def test_finished_spool_not_running(self, job, spool):
+        """Test a finished spool answers without an SSH call"""
+        client = MagicMock()
+        process = self._process()
+        process.spool = spool
+        job.exit()
+        spool.wait(5, 10**9)
+
+        assert is_process_running(client, process) is False
+        client.exec_command.assert_not_called()
@@ -0,0 +1,402 @@
+"""
+Tests for ssh-agent authentication and remembered per-host identities
+"""
+
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import paramiko
+import pytest
+from paramiko.message import Message
+
+from mcp_ssh.auth import AgentError, AgentIdentities, AuthHints, Identity, _SharedAgent
+from mcp_ssh.ssh import (
+    _agent_identities,
+    _auth_hints,
+    _circuit_breaker,
+    get_ssh_client_from_config,
+)
+
+
+def _agent_key(name):
+    key = MagicMock(spec=paramiko.AgentKey)
+    key.get_fingerprint.return_value = name.encode()
+    key.name = name
+    return key
+
+
+class FakeAgentSocket:
+    """ssh-agent socket offering one key and answering each request in turn"""
+
+    def __init__(self, *answers):
+        key_blob = paramiko.RSAKey.generate(1024).asbytes()
+        listing = Message()
+        listing.add_byte(bytes([12]))  # SSH2_AGENT_IDENTITIES_ANSWER
+        listing.add_int(1)
+        listing.add_string(key_blob)
+        listing.add_string("test key")
+        self.answers = [listing.asbytes(), *answers]
+        self.buffer = b""
+
+    def send(self, data):
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        self.buffer += len(answer).to_bytes(4, "big") + answer
+
+    def recv(self, size):
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def agent_keys():
+    """Three identities offered by a fake ssh-agent"""
+    return [_agent_key("first"), _agent_key("second"), _agent_key("third")]
+
+
+@pytest.fixture
+def fake_agent(agent_keys):
+    """Point the shared agent listing at a fake agent"""
+    agent = MagicMock()
+    agent.get_keys.return_value = tuple(agent_keys)
+    factory = MagicMock(return_value=agent)
+    with (
+        patch.dict(os.environ, {"SSH_AUTH_SOCK": "/tmp/agent.sock"}),
+        patch.object(_agent_identities, "_agent_factory", factory),
+    ):
+        yield factory
+
+
+class TestAgentIdentities:
+    """Test agent identities are listed once and ordered per host"""
+
+    def test_identities_listed_once(self, fake_agent, agent_keys):
+        """Test the agent is only asked for its keys on first use"""
+        identities = AgentIdentities(fake_agent)
+
+        assert identities.keys("web1") == agent_keys
+        assert identities.keys("web2") == agent_keys
+        fake_agent.assert_called_once()
+        fake_agent.return_value.get_keys.assert_called_once()
+
+    def test_last_successful_key_first(self, fake_agent, agent_keys):
+        """Test the identity that authenticated a host is offered first"""
+        identities = AgentIdentities(fake_agent)
+        identities.record_success("web1", agent_keys[2])
+
+        assert [k.name for k in identities.keys("web1")] == [
+            "third",
+            "first",
+            "second",
+        ]
+        assert identities.keys("web2") == agent_keys
+
+    def test_no_agent(self):
+        """Test no SSH_AUTH_SOCK means no identities and no agent connection"""
+        factory = MagicMock()
+        with patch.dict(os.environ, {}, clear=True):
+            assert AgentIdentities(factory).keys("web1") == []
+        factory.assert_not_called()
+
+    def test_unreachable_agent(self):
+        """Test an agent that cannot be reached is retried on the next call"""
+        factory = MagicMock(side_effect=paramiko.SSHException("no agent"))
+        identities = AgentIdentities(factory)
+        with patch.dict(os.environ, {"SSH_AUTH_SOCK": "/tmp/missing.sock"}):
+            assert identities.keys("web1") == []
+            assert identities.keys("web1") == []
+        assert factory.call_count == 2
+
+    def test_agent_lost_while_listing(self):
+        """Test a socket error while listing keys closes the agent and retries"""
+        agent = MagicMock()
+        agent.get_keys.side_effect = OSError("Broken pipe")
+        factory = MagicMock(return_value=agent)
+        identities = AgentIdentities(factory)
+        with patch.dict(os.environ, {"SSH_AUTH_SOCK": "/tmp/agent.sock"}):
+            assert identities.keys("web1") == []
+            assert identities.keys("web1") == []
+        agent.close.assert_called()
+        assert factory.call_count == 2
+
+    def test_reset_lists_keys_again(self, fake_agent, agent_keys):
+        """Test reset() drops the agent so a restarted one is listed afresh"""
+        identities = AgentIdentities(fake_agent)
+        identities.keys("web1")
+
+        identities.reset()
+
+        assert identities.keys("web1") == agent_keys
+        assert fake_agent.call_count == 2
+        fake_agent.return_value.close.assert_called_once()
+
+
+class TestSharedAgent:
+    """Test agent failures are raised as AgentError"""
+
+    def test_refused_signature(self):
+        """Test an agent refusing to sign raises AgentError"""
+        failure = bytes([5])  # SSH_AGENT_FAILURE
+        with patch(
+            "paramiko.agent.get_agent_connection",
+            return_value=FakeAgentSocket(failure),
+        ):
+            (key,) = _SharedAgent().get_keys()
+
+        with pytest.raises(AgentError, match="cannot sign"):
+            key.sign_ssh_data(b"data")
+
+    def test_lost_agent_socket(self):
+        """Test a socket error talking to the agent raises AgentError"""
+        with patch(
+            "paramiko.agent.get_agent_connection",
+            return_value=FakeAgentSocket(OSError("Broken pipe")),
+        ):
+            (key,) = _SharedAgent().get_keys()
+
+        with pytest.raises(AgentError, match="Broken pipe"):
+            key.sign_ssh_data(b"data")
+
+
+class TestAgentConnect:
+    """Test connecting with agent identities"""
+
+    CONFIG = {
+        "test-host": {
+            "hostname": "example.com",
+            "user": "deploy",
+            "identityfile": "~/.ssh/missing_key",
+        }
+    }
+
+    @patch("mcp_ssh.ssh.parse_ssh_config", return_value=CONFIG)
+    @patch("paramiko.SSHClient")
+    @patch("os.path.exists", return_value=False)
+    def test_agent_used_without_key_file(
+        self, mock_exists, mock_ssh, mock_config, fake_agent, agent_keys
+    ):
+        """Test a missing key file falls back to the agent's identities"""
+        client = mock_ssh.return_value
+
+        assert get_ssh_client_from_config("test-host") is client
+
+        kwargs = client.connect.call_args.kwargs
+        assert kwargs["pkey"] is agent_keys[0]
+        assert kwargs["allow_agent"] is False
+        assert kwargs["look_for_keys"] is False
+
+    @patch("mcp_ssh.ssh.parse_ssh_config", return_value=CONFIG)
+    @patch("paramiko.SSHClient")
+    @patch("os.path.exists", return_value=False)
+    def test_rejected_key_tries_the_next(
+        self, mock_exists, mock_ssh, mock_config, fake_agent, agent_keys
+    ):
+        """Test later identities are tried on the same transport and remembered"""
+        client = mock_ssh.return_value
+        client.connect.side_effect = paramiko.AuthenticationException("denied")
+        transport = client.get_transport.return_value
+        transport.is_active.return_value = True
+        transport.auth_publickey.side_effect = [
+            paramiko.AuthenticationException("denied"),
+            ["publickey"],
+        ]
+
+        assert get_ssh_client_from_config("test-host") is client
+        assert transport.auth_publickey.call_args.args == ("deploy", agent_keys[2])
+        assert _agent_identities.keys("test-host")[0] is agent_keys[2]
+
+        client.connect.side_effect = None
+        get_ssh_client_from_config("test-host")
+        assert client.connect.call_args.kwargs["pkey"] is agent_keys[2]
+
+    @patch("mcp_ssh.ssh.parse_ssh_config", return_value=CONFIG)
+    @patch("paramiko.SSHClient")
+    @patch("os.path.exists", return_value=False)
+    def test_all_keys_rejected(self, mock_exists, mock_ssh, mock_config, fake_agent):
+        """Test the connection fails when no identity is accepted"""
+        client = mock_ssh.return_value
+        client.connect.side_effect = paramiko.AuthenticationException("denied")
+        transport = client.get_transport.return_value
+        transport.auth_publickey.side_effect = paramiko.AuthenticationException(
+            "denied"
+        )
+
+        assert get_ssh_client_from_config("test-host") is None
+
+    @patch("mcp_ssh.ssh.parse_ssh_config", return_value=CONFIG)
+    @patch("paramiko.SSHClient")
+    @patch("os.path.exists", return_value=False)
+    def test_agent_failure_not_counted_against_host(
+        self, mock_exists, mock_ssh, mock_config, fake_agent
+    ):
+        """Test a failing local agent resets the listing, not the host circuit"""
+        mock_ssh.return_value.connect.side_effect = AgentError("Lost ssh-agent")
+
+        for _ in range(10):
+            assert get_ssh_client_from_config("test-host") is None
+
+        assert _circuit_breaker.state("test-host") == "closed"
+        assert fake_agent.call_count == 10
+
+    @patch("mcp_ssh.ssh.parse_ssh_config", return_value=CONFIG)
+    @patch("mcp_ssh.ssh.SSH_AUTH_MODE", "agent")
+    def test_agent_mode_without_agent(self, mock_config):
+        """Test agent-only mode fails cleanly when there is no agent"""
+        with patch.dict(os.environ, {}, clear=True):
+            assert get_ssh_client_from_config("test-host") is None
+
+    @patch("mcp_ssh.ssh.parse_ssh_config", return_value=CONFIG)
+    @patch("mcp_ssh.ssh.SSH_AUTH_MODE", "key")
+    @patch("os.path.exists", return_value=False)
+    def test_key_mode_ignores_agent(self, mock_exists, mock_config, fake_agent):
+        """Test key-only mode still requires the key file"""
+        assert get_ssh_client_from_config("test-host") is None
+        fake_agent.assert_not_called()
+
+
+class TestAuthHints:
+    """Test the identity that authenticated each host is persisted"""
+
+    def test_hint_survives_reload(self, tmp_path):
+        """Test a recorded identity is read back by a new instance"""
+        path = tmp_path / "hints" / "auth.json"
+        AuthHints(str(path)).record("web1", Identity("default", "/k/id_ed25519"))
+
+        assert AuthHints(str(path)).get("web1") == {
+            "method": "default",
+            "identity": "/k/id_ed25519",
+        }
+        assert oct(path.stat().st_mode & 0o777) == "0o600"
+
+    def test_unchanged_hint_not_rewritten(self, tmp_path):
+        """Test recording the same identity again leaves the file alone"""
+        path = tmp_path / "auth.json"
+        hints = AuthHints(str(path))
+        hints.record("web1", Identity("key", "/k/id_rsa"))
+        stored = {"web1": {"method": "key", "identity": "/k/id_rsa"}, "x": {}}
+        path.write_text(json.dumps(stored))
+
+        hints.record("web1", Identity("key", "/k/id_rsa"))
+
+        assert "x" in json.loads(path.read_text())
+
+    def test_hinted_identity_ordered_first(self, tmp_path):
+        """Test order() moves the remembered identity to the front"""
+        hints = AuthHints(str(tmp_path / "auth.json"))
+        identities = [
+            Identity("key", "/k/id_rsa"),
+            Identity("agent", "ab"),
+            Identity("default", "/k/id_ed25519"),
+        ]
+        assert hints.order("web1", identities) == identities
+
+        hints.record("web1", identities[2])
+        assert [i.name for i in hints.order("web1", identities)] == [
+            "/k/id_ed25519",
+            "/k/id_rsa",
+            "ab",
+        ]
+
+    def test_unreadable_file_ignored(self, tmp_path):
+        """Test a corrupt hints file behaves like an empty one"""
+        path = tmp_path / "auth.json"
+        path.write_text("{not json")
+
+        assert AuthHints(str(path)).get("web1") is None
+
+    def test_malformed_entries_dropped(self, tmp_path):
+        """Test hand-edited or truncated entries are skipped, not raised on"""
+        path = tmp_path / "auth.json"
+        stored = {
+            "web1": {"method": "key"},
+            "web2": "agent",
+            "web3": {"method": "key", "identity": "/k/id_rsa"},
+        }
+        path.write_text(json.dumps(stored))
+        hints = AuthHints(str(path))
+        identities = [Identity("agent", "ab"), Identity("key", "/k/id_rsa")]
+
+        assert hints.order("web1", identities) == identities
+        assert hints.get("web2") is None
+        assert hints.order("web3", identities)[0].name == "/k/id_rsa"
+
+
+class TestRememberedIdentityConnect:
+    """Test connections start with the identity that last worked"""
+
+    @pytest.fixture
+    def key_files(self, tmp_path):
+        """A configured key and a default ~/.ssh/id_ed25519 key"""
+        ssh_dir = tmp_path / "home" / ".ssh"
+        ssh_dir.mkdir(parents=True)
+        for name in ("deploy_key", "id_ed25519"):
+            (ssh_dir / name).write_text("key")
+        home = str(tmp_path / "home")
+        with patch("os.path.expanduser", side_effect=lambda p: p.replace("~", home, 1)):
+            yield ssh_dir
+
+    @pytest.fixture
+    def loaded_keys(self, key_files):
+        """Distinct loaded keys per file"""
+        keys = {}
+
+        def load(path):
+            return keys.setdefault(path, MagicMock(name=os.path.basename(path)))
+
+        with patch("mcp_ssh.ssh._load_private_key", side_effect=load):
+            yield keys
+
+    CONFIG = {
+        "test-host": {
+            "hostname": "example.com",
+            "user": "deploy",
+            "identityfile": "~/.ssh/deploy_key",
+        }
+    }
+
+    @patch("mcp_ssh.ssh.parse_ssh_config", return_value=CONFIG)
+    @patch("paramiko.SSHClient")
+    @patch.dict(os.environ, {}, clear=True)
+    def test_rejected_key_falls_back_and_is_remembered(
+        self, mock_ssh, mock_config, key_files, loaded_keys
+    ):
+        """Test a default key accepted after a rejected one is offered first later"""
+        client = mock_ssh.return_value
+        client.connect.side_effect = paramiko.AuthenticationException("denied")
+        transport = client.get_transport.return_value
+        transport.is_active.return_value = True
+
+        assert get_ssh_client_from_config("test-host") is client
+        default_key = str(key_files / "id_ed25519")
+        assert transport.auth_publickey.call_args.args == (
+            "deploy",
+            loaded_keys[default_key],
+        )
+        assert json.loads(open(_auth_hints.path).read()) == {
+            "test-host": {"method": "default", "identity": default_key}
+        }
+
+        # A new process reads the hint back from the file
+        _auth_hints.clear()
+        client.connect.side_effect = None
+        get_ssh_client_from_config("test-host")
+        kwargs = client.connect.call_args.kwargs
+        assert kwargs["pkey"] is loaded_keys[default_key]
+        assert kwargs["look_for_keys"] is False
+        assert kwargs["allow_agent"] is False
+
+    @patch("mcp_ssh.ssh.parse_ssh_config", return_value=CONFIG)
+    @patch("paramiko.SSHClient")
+    @patch.dict(os.environ, {}, clear=True)
+    def test_default_keys_loaded_only_when_offered(
+        self, mock_ssh, mock_config, key_files, loaded_keys
+    ):
+        """Test an accepted configured key leaves the default keys unread"""
+        get_ssh_client_from_config("test-host")
+
+        assert list(loaded_keys) == [str(key_files / "deploy_key")]
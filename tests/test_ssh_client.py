@@ -11,7 +11,9 @@ from unittest.mock import MagicMock, patch
 import paramiko
 import pytest
 
+from mcp_ssh.breaker import HostUnavailableError
 from mcp_ssh.ssh import (
+    _resolve_algorithms,
     execute_ssh_command,
     get_ssh_client_from_config,
     parse_ssh_config,
@@ -156,6 +158,81 @@ class TestSSHClient:
 
         assert result is None
 
+    @patch.dict(os.environ, {"SSH_KEY_FILE": ""})
+    @patch("mcp_ssh.ssh.parse_ssh_config")
+    @patch("paramiko.SSHClient")
+    def test_unreachable_host_fails_fast(self, mock_ssh, mock_config):
+        """Test repeated connect failures stop further connection attempts"""
+        mock_config.return_value = {"down-host": {"hostname": "down.example.com"}}
+        mock_client = MagicMock()
+        mock_client.connect.side_effect = TimeoutError("timed out")
+        mock_ssh.return_value = mock_client
+
+        assert get_ssh_client_from_config("down-host") is None
+        assert get_ssh_client_from_config("down-host") is None
+
+        with pytest.raises(HostUnavailableError, match="timed out"):
+            get_ssh_client_from_config("down-host")
+        assert mock_client.connect.call_count == 2
+
+    @patch.dict(os.environ, {"SSH_KEY_FILE": ""})
+    @patch("mcp_ssh.ssh.parse_ssh_config")
+    @patch("paramiko.SSHClient")
+    def test_auth_failure_does_not_open_circuit(self, mock_ssh, mock_config):
+        """Test authentication errors are not treated as an unreachable host"""
+        mock_config.return_value = {"auth-host": {"hostname": "auth.example.com"}}
+        mock_client = MagicMock()
+        mock_client.connect.side_effect = paramiko.AuthenticationException("denied")
+        mock_ssh.return_value = mock_client
+
+        for _ in range(3):
+            assert get_ssh_client_from_config("auth-host") is None
+        assert mock_client.connect.call_count == 3
+
+    @patch.dict(os.environ, {"SSH_KEY_FILE": ""})
+    @patch("mcp_ssh.ssh.parse_ssh_config")
+    @patch("paramiko.SSHClient")
+    def test_get_ssh_client_algorithms_and_compression(self, mock_ssh, mock_config):
+        """Test Ciphers, KexAlgorithms, MACs and Compression reach the transport"""
+        mock_config.return_value = {
+            "tuned-host": {
+                "hostname": "example.com",
+                "ciphers": "aes256-gcm@openssh.com,chacha20-poly1305@openssh.com",
+                "kexalgorithms": "curve25519-sha256",
+                "macs": "^hmac-sha2-512",
+                "compression": "yes",
+            }
+        }
+        mock_client = MagicMock()
+        mock_ssh.return_value = mock_client
+
+        get_ssh_client_from_config("tuned-host")
+
+        connect_args = mock_client.connect.call_args[1]
+        assert connect_args["compress"] is True
+        with patch("paramiko.Transport") as mock_transport:
+            connect_args["transport_factory"](MagicMock(), gss_kex=False)
+        options = mock_transport.return_value.get_security_options.return_value
+        assert options.ciphers == ("aes256-gcm@openssh.com",)
+        assert options.kex == ("curve25519-sha256@libssh.org",)
+        assert options.digests[0] == "hmac-sha2-512"
+        assert "hmac-sha2-256" in options.digests
+
+    @patch.dict(os.environ, {"SSH_KEY_FILE": ""})
+    @patch("mcp_ssh.ssh.parse_ssh_config")
+    @patch("paramiko.SSHClient")
+    def test_get_ssh_client_default_algorithms(self, mock_ssh, mock_config):
+        """Test hosts without algorithm settings keep paramiko's defaults"""
+        mock_config.return_value = {"plain-host": {"hostname": "example.com"}}
+        mock_client = MagicMock()
+        mock_ssh.return_value = mock_client
+
+        get_ssh_client_from_config("plain-host")
+
+        connect_args = mock_client.connect.call_args[1]
+        assert "transport_factory" not in connect_args
+        assert "compress" not in connect_args
+
     def test_execute_ssh_command_success(self, mock_ssh_client):
         """Test successful SSH command execution"""
         stdout, stderr, exit_code = execute_ssh_command(mock_ssh_client, "ls -la")
@@ -167,18 +244,14 @@ class TestSSHClient:
             "ls -la", get_pty=False, timeout=60
         )
 
-    def test_execute_ssh_command_with_stderr(self):
+    def test_execute_ssh_command_with_stderr(self, fake_channel):
         """Test SSH command execution with stderr output"""
         mock_client = MagicMock()
         mock_stdin = MagicMock()
         mock_stdout = MagicMock()
         mock_stderr = MagicMock()
-        mock_channel = MagicMock()
 
-        mock_stdout.read.return_value = b""
-        mock_stderr.read.return_value = b"error message"
-        mock_channel.recv_exit_status.return_value = 0
-        mock_stdout.channel = mock_channel
+        mock_stdout.channel = fake_channel(b"", b"error message", exit_status=0)
 
         mock_client.exec_command.return_value = (mock_stdin, mock_stdout, mock_stderr)
 
@@ -199,18 +272,16 @@ class TestSSHClient:
         assert stderr == "Execution failed"
         assert exit_code is None
 
-    def test_execute_ssh_command_special_characters(self):
+    def test_execute_ssh_command_special_characters(self, fake_channel):
         """Test SSH command execution with special characters"""
         mock_client = MagicMock()
         mock_stdin = MagicMock()
         mock_stdout = MagicMock()
         mock_stderr = MagicMock()
-        mock_channel = MagicMock()
 
-        mock_stdout.read.return_value = b"Special chars: !@#$%^&*(){}[]|\\;:'\",<>.?/"
-        mock_stderr.read.return_value = b""
-        mock_channel.recv_exit_status.return_value = 0
-        mock_stdout.channel = mock_channel
+        mock_stdout.channel = fake_channel(
+            b"Special chars: !@#$%^&*(){}[]|\\;:'\",<>.?/", exit_status=0
+        )
 
         mock_client.exec_command.return_value = (mock_stdin, mock_stdout, mock_stderr)
 
@@ -301,6 +372,40 @@ class TestCommandHandling:
         assert _has_complex_quoting("echo $HOME") is False
 
 
+class TestAlgorithmLists:
+    """Test OpenSSH algorithm list resolution"""
+
+    DEFAULTS = ("aes128-ctr", "aes256-ctr", "aes128-cbc", "aes128-gcm@openssh.com")
+
+    def test_explicit_list_keeps_order_and_drops_unsupported(self):
+        """Test a plain list is filtered to supported names in given order"""
+        result = _resolve_algorithms(
+            "aes128-gcm@openssh.com,chacha20-poly1305@openssh.com,aes128-ctr",
+            self.DEFAULTS,
+        )
+
+        assert result == ("aes128-gcm@openssh.com", "aes128-ctr")
+
+    def test_remove_prefix_with_wildcard(self):
+        """Test '-' removes matching algorithms from the defaults"""
+        assert _resolve_algorithms("-*-cbc", self.DEFAULTS) == (
+            "aes128-ctr",
+            "aes256-ctr",
+            "aes128-gcm@openssh.com",
+        )
+
+    def test_head_prefix_moves_to_front(self):
+        """Test '^' puts the listed algorithms first"""
+        result = _resolve_algorithms("^aes128-gcm@openssh.com", self.DEFAULTS)
+
+        assert result[0] == "aes128-gcm@openssh.com"
+        assert sorted(result) == sorted(self.DEFAULTS)
+
+    def test_append_prefix_keeps_defaults(self):
+        """Test '+' leaves the defaults, which already include all supported"""
+        assert _resolve_algorithms("+aes128-cbc", self.DEFAULTS) == self.DEFAULTS
+
+
 class TestFileTransfer:
     """Test file transfer functionality"""
 
@@ -529,8 +634,8 @@ class TestBackgroundExecution:
         mock_stdout = MagicMock()
         mock_stderr = MagicMock()
 
-        # Mock status check - process is running
-        mock_stdout.read.side_effect = [b"RUNNING\n", b"output data", b"error data"]
+        # One snapshot: running, no exit code, sizes, then both slices
+        mock_stdout.read.return_value = b"RUNNING - 11 10 11 10\noutput dataerror data"
         mock_client.exec_command.return_value = (mock_stdin, mock_stdout, mock_stderr)
 
         process = BackgroundProcess(
@@ -544,7 +649,7 @@ class TestBackgroundExecution:
             error_file="/tmp/test.err",
         )
 
-        status, output, errors, exit_code = get_process_output(
+        status, output, errors, exit_code, output_end, output_size = get_process_output(
             mock_client, process, 1000
         )
 
@@ -552,13 +657,16 @@ class TestBackgroundExecution:
         assert output == "output data"
         assert errors == "error data"
         assert exit_code is None
+        assert output_end == 11
+        assert output_size == 11
 
-        # Verify the commands executed
-        calls = mock_client.exec_command.call_args_list
-        assert len(calls) == 3
-        assert "kill -0 12345" in calls[0][0][0]
-        assert "head -c 1000 /tmp/test.out" in calls[1][0][0]
-        assert "head -c 500 /tmp/test.err" in calls[2][0][0]
+        # Status, exit code and both outputs come from a single command
+        mock_client.exec_command.assert_called_once()
+        script = mock_client.exec_command.call_args[0][0]
+        assert "kill -0 12345" in script
+        assert "/tmp/test.out.exit" in script
+        assert "1000" in script
+        assert "500" in script
 
     def test_get_process_output_completed(self):
         """Test getting output from completed process"""
@@ -570,13 +678,11 @@ class TestBackgroundExecution:
         mock_stdout = MagicMock()
         mock_stderr = MagicMock()
 
-        # Mock status check - process is stopped, exit code 0
-        mock_stdout.read.side_effect = [
-            b"STOPPED\n",
-            b"0\n",
-            b"output data",
-            b"error data",
-        ]
+        # Mock snapshot - process is stopped, exit code 0, more output
+        # on disk than was sent
+        mock_stdout.read.return_value = (
+            b"STOPPED 0 5000 10 11 10\noutput dataerror data"
+        )
         mock_client.exec_command.return_value = (mock_stdin, mock_stdout, mock_stderr)
 
         process = BackgroundProcess(
@@ -590,7 +696,7 @@ class TestBackgroundExecution:
             error_file="/tmp/test.err",
         )
 
-        status, output, errors, exit_code = get_process_output(
+        status, output, errors, exit_code, output_end, output_size = get_process_output(
             mock_client, process, 1000
         )
 
@@ -598,6 +704,167 @@ class TestBackgroundExecution:
         assert output == "output data"
         assert errors == "error data"
         assert exit_code == 0
+        assert output_end == 11
+        assert output_size == 5000
+
+    def test_snapshot_script_frames_output(self, tmp_path):
+        """Test the snapshot script's header matches the slices it sends"""
+        import subprocess
+
+        from mcp_ssh.background import BackgroundProcess
+        from mcp_ssh.ssh import _parse_snapshot, _snapshot_script
+
+        out, err = tmp_path / "job.out", tmp_path / "job.err"
+        out.write_bytes(b"line one\nline two\n")
+        err.write_bytes(b"warning\n")
+        (tmp_path / "job.out.exit").write_text("2\n")
+        process = BackgroundProcess(
+            "test123", "test-host", "ls", None, None, "running", str(out), str(err)
+        )
+
+        data = subprocess.check_output(_snapshot_script(process, 12), shell=True)
+
+        assert data.split(b"\n", 1)[0] == b"STOPPED 2 18 8 12 6"
+        assert _parse_snapshot(data) == (
+            "completed",
+            "line one\nlin",
+            "warnin",
+            2,
+            12,
+            18,
+        )
+
+    def test_wait_for_process_single_call(self):
+        """Test waiting for a process is one remote call bounded by timeout"""
+        from mcp_ssh.background import BackgroundProcess
+        from mcp_ssh.ssh import wait_for_process
+
+        mock_client = MagicMock()
+        mock_stdout = MagicMock()
+        mock_stdout.read.return_value = b"done\n"
+        mock_client.exec_command.return_value = (MagicMock(), mock_stdout, MagicMock())
+        process = BackgroundProcess(
+            "test123",
+            "test-host",
+            "ls",
+            12345,
+            None,
+            "running",
+            "/tmp/test.out",
+            "/tmp/test.err",
+        )
+
+        assert wait_for_process(mock_client, process, 5, 1000) is True
+
+        mock_client.exec_command.assert_called_once()
+        script = mock_client.exec_command.call_args[0][0]
+        assert "kill -0 12345" in script
+        assert "/tmp/test.out.exit" in script
+        assert "-lt 1000" in script
+        assert mock_client.exec_command.call_args[1]["timeout"] == 65
+
+    @pytest.mark.asyncio
+    async def test_background_launch_waits_on_event_loop(self):
+        """Test the async launch uses workers only to start and read the PID"""
+        import threading
+
+        from mcp_ssh import ssh
+
+        channel = paramiko.Channel(1)
+        mock_stdout = MagicMock(channel=channel)
+        mock_stdout.read.return_value = b"4321\n"
+        mock_stderr = MagicMock()
+        mock_stderr.read.return_value = b""
+        mock_client = MagicMock()
+        mock_client.exec_command.return_value = (MagicMock(), mock_stdout, mock_stderr)
+        on_worker = []
+
+        async def run_blocking(host, func, *args):
+            on_worker.append(func)
+            return func(*args)
+
+        def exit_later():
+            channel.exit_status = 0
+            channel.status_event.set()
+
+        timer = threading.Timer(0.05, exit_later)
+        timer.start()
+        with patch("mcp_ssh.ssh.run_blocking", new=run_blocking):
+            pid = await ssh.execute_command_background_async(
+                "test-host", mock_client, "sleep 60", "/tmp/a.out", "/tmp/a.err"
+            )
+        timer.join()
+
+        assert pid == 4321
+        assert on_worker == [ssh._start_background, ssh._read_pid]
+
+    @pytest.mark.asyncio
+    async def test_quick_wait_times_out_without_worker(self):
+        """Test the async quick wait gives up and closes its channel"""
+        from mcp_ssh.background import BackgroundProcess
+        from mcp_ssh.ssh import wait_for_process_async
+
+        channel = MagicMock()
+        channel.exit_status_ready.return_value = False
+        mock_stdout = MagicMock(channel=channel)
+        mock_client = MagicMock()
+        mock_client.exec_command.return_value = (MagicMock(), mock_stdout, MagicMock())
+        process = BackgroundProcess(
+            "test123",
+            "test-host",
+            "sleep 60",
+            12345,
+            None,
+            "running",
+            "/tmp/test.out",
+            "/tmp/test.err",
+        )
+
+        with (
+            patch("mcp_ssh.ssh.SSH_COMMAND_TIMEOUT", 0),
+            patch("mcp_ssh.ssh.wait_for_exit_status_async", return_value=False) as wait,
+        ):
+            assert (
+                await wait_for_process_async(
+                    "test-host", mock_client, process, 0.01, 1000
+                )
+                is False
+            )
+
+        wait.assert_awaited_once_with(channel, 0.01)
+        channel.close.assert_called_once()
+        mock_stdout.read.assert_not_called()
+
+    def test_wait_script_returns_when_process_exits(self, tmp_path):
+        """Test the remote wait loop ends with the process, not the timeout"""
+        import subprocess
+        import time
+
+        from mcp_ssh.background import BackgroundProcess
+        from mcp_ssh.ssh import _background_wrapper, _wait_script
+
+        def run(command, timeout, min_output):
+            out = str(tmp_path / f"{len(list(tmp_path.iterdir()))}.out")
+            err = f"{out}.err"
+            launch = _background_wrapper(command, out, err)
+            pid = int(subprocess.check_output(launch, shell=True, text=True))
+            process = BackgroundProcess(
+                "test123", "test-host", command, pid, None, "running", out, err
+            )
+            start = time.monotonic()
+            result = subprocess.check_output(
+                _wait_script(process, timeout, min_output), shell=True, text=True
+            )
+            return result.strip(), time.monotonic() - start
+
+        status, elapsed = run("echo hi", 5, 1000)
+        assert status == "done" and elapsed < 2
+
+        status, elapsed = run("head -c 5000 /dev/zero; sleep 3", 5, 1000)
+        assert status == "running" and elapsed < 2
+
+        status, elapsed = run("sleep 3", 0.2, 1000)
+        assert status == "running" and elapsed < 2
 
     def test_get_output_chunk_success(self):
         """Test getting specific chunk of output"""
@@ -605,13 +872,11 @@ class TestBackgroundExecution:
         from mcp_ssh.ssh import get_output_chunk
 
         mock_client = MagicMock()
-        mock_stdin = MagicMock()
-        mock_stdout = MagicMock()
-        mock_stderr = MagicMock()
+        remote_file = mock_client.open_sftp.return_value.open.return_value
 
-        # Mock chunk retrieval - has more data
-        mock_stdout.read.side_effect = [b"chunk data", b"x"]
-        mock_client.exec_command.return_value = (mock_stdin, mock_stdout, mock_stderr)
+        # Mock chunk retrieval - the file extends past the chunk
+        remote_file.stat.return_value.st_size = 1000
+        remote_file.read.return_value = b"chunk data"
 
         process = BackgroundProcess(
             process_id="test123",
@@ -624,17 +889,19 @@ class TestBackgroundExecution:
             error_file="/tmp/test.err",
         )
 
-        chunk, has_more = get_output_chunk(mock_client, process, 100, 50)
+        chunk, has_more, next_byte = get_output_chunk(mock_client, process, 100, 50)
 
         assert chunk == "chunk data"
         assert has_more is True
+        assert next_byte == 110
 
-        # Verify the commands executed
-        calls = mock_client.exec_command.call_args_list
-        assert len(calls) == 2
-        assert "tail -c +101 /tmp/test.out" in calls[0][0][0]
-        assert "head -c 50" in calls[0][0][0]
-        assert "tail -c +151 /tmp/test.out" in calls[1][0][0]
+        # Read at the offset over SFTP, without remote commands
+        mock_client.open_sftp.return_value.open.assert_called_once_with(
+            "/tmp/test.out", "rb"
+        )
+        remote_file.seek.assert_called_once_with(100)
+        remote_file.read.assert_called_once_with(50)
+        mock_client.exec_command.assert_not_called()
 
     def test_get_output_chunk_no_more_data(self):
         """Test getting chunk when no more data available"""
@@ -642,13 +909,11 @@ class TestBackgroundExecution:
         from mcp_ssh.ssh import get_output_chunk
 
         mock_client = MagicMock()
-        mock_stdin = MagicMock()
-        mock_stdout = MagicMock()
-        mock_stderr = MagicMock()
+        remote_file = mock_client.open_sftp.return_value.open.return_value
 
-        # Mock chunk retrieval - no more data
-        mock_stdout.read.side_effect = [b"chunk data", b""]
-        mock_client.exec_command.return_value = (mock_stdin, mock_stdout, mock_stderr)
+        # Mock chunk retrieval - the chunk reaches the end of the file
+        remote_file.stat.return_value.st_size = 110
+        remote_file.read.return_value = b"chunk data"
 
         process = BackgroundProcess(
             process_id="test123",
@@ -661,10 +926,11 @@ class TestBackgroundExecution:
             error_file="/tmp/test.err",
         )
 
-        chunk, has_more = get_output_chunk(mock_client, process, 100, 50)
+        chunk, has_more, next_byte = get_output_chunk(mock_client, process, 100, 50)
 
         assert chunk == "chunk data"
         assert has_more is False
+        assert next_byte == 110
 
     def test_kill_background_process_success_graceful(self):
         """Test successful graceful process termination"""
@@ -5,6 +5,7 @@ This module tests the SSH configuration file parsing, including
 various syntax formats, host filtering, and error handling.
 """
 
+import os
 from unittest.mock import mock_open, patch
 
 import pytest
@@ -156,3 +157,209 @@ Host clean-host
             assert result["robust-host"]["hostname"] == "robust.example.com"
             assert result["robust-host"]["user"] == "robustuser"
             assert result["robust-host"]["port"] == "22"
+
+
+class TestSSHConfigCache:
+    """Test caching of the parsed SSH config"""
+
+    def test_unchanged_file_is_not_reread(self, temp_ssh_config):
+        """Test repeated parses reuse the cached result"""
+        with (
+            patch("os.path.expanduser", return_value=temp_ssh_config),
+            patch("builtins.open", wraps=open) as spy_open,
+        ):
+            first = parse_ssh_config()
+            second = parse_ssh_config()
+
+        assert first is second
+        assert spy_open.call_count == 1
+
+    def test_changed_file_is_reloaded(self, temp_ssh_config):
+        """Test a modified config is parsed again"""
+        with patch("os.path.expanduser", return_value=temp_ssh_config):
+            assert "new-host" not in parse_ssh_config()
+
+            with open(temp_ssh_config, "a") as f:
+                f.write("\nHost new-host\n    HostName new.example.com\n")
+
+            result = parse_ssh_config()
+
+        assert result["new-host"]["hostname"] == "new.example.com"
+
+    def test_same_size_rewrite_detected_by_mtime(self, temp_ssh_config):
+        """Test an edit that keeps the file size still invalidates the cache"""
+        with patch("os.path.expanduser", return_value=temp_ssh_config):
+            parse_ssh_config()
+            with open(temp_ssh_config) as f:
+                content = f.read()
+            with open(temp_ssh_config, "w") as f:
+                f.write(content.replace("admin", "ADMIN"))
+            stat = os.stat(temp_ssh_config)
+            os.utime(
+                temp_ssh_config,
+                ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000),
+            )
+
+            result = parse_ssh_config()
+
+        assert result["another-fixture"]["user"] == "ADMIN"
+
+    def test_read_errors_are_not_cached(self, temp_ssh_config):
+        """Test a failed read is retried on the next call"""
+        with patch("os.path.expanduser", return_value=temp_ssh_config):
+            with patch("builtins.open", side_effect=OSError("busy")):
+                assert parse_ssh_config() == {}
+
+            assert "test-fixture" in parse_ssh_config()
+
+
+def _in_dir(config_file):
+    """expanduser replacement pointing ~/.ssh/config at config_file"""
+    return lambda path: path.replace("~/.ssh/config", str(config_file))
+
+
+class TestOpenSSHSemantics:
+    """Test OpenSSH resolution rules: wildcards, Include, Match, first match wins"""
+
+    @staticmethod
+    def _parse(tmp_path, content):
+        config_file = tmp_path / "config"
+        config_file.write_text(content)
+        with patch("os.path.expanduser", side_effect=_in_dir(config_file)):
+            return parse_ssh_config()
+
+    def test_wildcard_defaults_are_merged(self, tmp_path):
+        """Test options from matching wildcard blocks apply to concrete hosts"""
+        result = self._parse(
+            tmp_path,
+            """Host web1
+    HostName web1.example.com
+
+Host web*
+    User deploy
+    Port 2200
+
+Host *
+    User nobody
+    ServerAliveInterval 30
+""",
+        )
+
+        assert list(result) == ["web1"]
+        assert result["web1"] == {
+            "hostname": "web1.example.com",
+            "user": "deploy",
+            "port": "2200",
+            "serveraliveinterval": "30",
+        }
+
+    def test_first_value_wins(self, tmp_path):
+        """Test the first value obtained for a keyword is kept"""
+        result = self._parse(
+            tmp_path,
+            """User global-user
+
+Host db
+    HostName db.example.com
+    HostName ignored.example.com
+""",
+        )
+
+        assert result["db"]["hostname"] == "db.example.com"
+        assert result["db"]["user"] == "global-user"
+
+    def test_multiple_aliases_and_negation(self, tmp_path):
+        """Test multi-alias Host lines and negated patterns"""
+        result = self._parse(
+            tmp_path,
+            """Host alpha beta
+    HostName %h.example.com
+
+Host * !beta
+    User restricted
+""",
+        )
+
+        assert set(result) == {"alpha", "beta"}
+        assert result["alpha"]["hostname"] == "alpha.example.com"
+        assert result["alpha"]["user"] == "restricted"
+        assert result["beta"]["hostname"] == "beta.example.com"
+        assert "user" not in result["beta"]
+
+    def test_include_is_followed(self, tmp_path):
+        """Test Include globs are read relative to the config directory"""
+        (tmp_path / "conf.d").mkdir()
+        (tmp_path / "conf.d" / "a.conf").write_text(
+            "Host included\n    HostName included.example.com\n"
+        )
+        (tmp_path / "conf.d" / "b.conf").write_text("Host *\n    User from-include\n")
+
+        result = self._parse(tmp_path, "Include conf.d/*.conf\n")
+
+        assert result["included"] == {
+            "hostname": "included.example.com",
+            "user": "from-include",
+        }
+
+    def test_include_inside_host_block_is_conditional(self, tmp_path):
+        """Test an Include within a Host block only applies to that host"""
+        (tmp_path / "extra").write_text("Port 2222\n")
+
+        result = self._parse(
+            tmp_path,
+            """Host special
+    Include extra
+    User special-user
+
+Host other
+    HostName other.example.com
+""",
+        )
+
+        assert result["special"] == {"port": "2222", "user": "special-user"}
+        assert result["other"] == {"hostname": "other.example.com"}
+
+    def test_match_host_uses_resolved_hostname(self, tmp_path):
+        """Test Match host compares against the HostName resolved so far"""
+        result = self._parse(
+            tmp_path,
+            """Host jump
+    HostName bastion.corp.example
+
+Host app
+    HostName app.example.com
+
+Match host *.corp.example
+    User corp
+
+Match originalhost app
+    Port 2022
+
+Match exec "true"
+    User never
+""",
+        )
+
+        assert result["jump"]["user"] == "corp"
+        assert "port" not in result["jump"]
+        assert result["app"]["port"] == "2022"
+        assert "user" not in result["app"]
+
+    def test_include_changes_invalidate_cache(self, tmp_path):
+        """Test edits to an included file cause the config to be re-read"""
+        included = tmp_path / "hosts.conf"
+        included.write_text("Host first\n    HostName first.example.com\n")
+        config_file = tmp_path / "config"
+        config_file.write_text(f"Include {included}\n")
+
+        with patch("os.path.expanduser", side_effect=_in_dir(config_file)):
+            assert list(parse_ssh_config()) == ["first"]
+            included.write_text("Host second\n    HostName second.example.com\n")
+            assert list(parse_ssh_config()) == ["second"]
+
+    def test_resolution_is_memoized(self, tmp_path):
+        """Test resolving the same alias twice returns the same result"""
+        result = self._parse(tmp_path, "Host memo\n    HostName memo.example.com\n")
+
+        assert result["memo"] is result["memo"]
+        assert result.resolve("memo") is result["memo"]
@@ -0,0 +1,282 @@
+"""
+Tests for the asyncio SSH engine
+
+This module tests engine dispatch from the MCP server and the asyncssh
+implementations of the SSH operations against a mocked connection.
+"""
+
+import inspect
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from mcp_ssh import async_engine
+from mcp_ssh.background import BackgroundProcess
+from mcp_ssh.ssh import get_ssh_client_from_config
+
+
+def make_result(stdout="", stderr="", exit_status=0):
+    """Create an asyncssh-style completed process result"""
+    return SimpleNamespace(
+        stdout=stdout.encode(), stderr=stderr.encode(), exit_status=exit_status
+    )
+
+
+def make_process():
+    """Create a background process record for tests"""
+    return BackgroundProcess(
+        process_id="test-id",
+        host="test-host",
+        command="sleep 1",
+        pid=4321,
+        start_time=datetime.now(),
+        status="running",
+        output_file="/tmp/out",
+        error_file="/tmp/err",
+    )
+
+
+@pytest.mark.asyncio
+class TestEngineDispatch:
+    """Test server dispatch between the paramiko and asyncssh engines"""
+
+    async def test_paramiko_engine_runs_on_worker(self):
+        """Test the default engine calls the blocking function"""
+        from mcp_ssh.server import _ssh_call
+
+        with patch("mcp_ssh.server.run_blocking", new=AsyncMock()) as mock_run:
+            mock_run.return_value = "client"
+
+            result = await _ssh_call(
+                "test-host", get_ssh_client_from_config, "test-host"
+            )
+
+        assert result == "client"
+        mock_run.assert_awaited_once_with(
+            "test-host", get_ssh_client_from_config, "test-host"
+        )
+
+    async def test_async_engine_uses_mapped_coroutine(self):
+        """Test the asyncssh engine replaces the blocking function"""
+        from mcp_ssh.server import _ssh_call
+
+        with (
+            patch("mcp_ssh.async_engine.use_async_engine", return_value=True),
+            patch(
+                "mcp_ssh.async_engine.get_ssh_client_from_config", new=AsyncMock()
+            ) as mock_connect,
+            patch("mcp_ssh.server.run_blocking", new=AsyncMock()) as mock_run,
+        ):
+            mock_connect.return_value = "conn"
+
+            result = await _ssh_call(
+                "test-host", get_ssh_client_from_config, "test-host"
+            )
+
+        assert result == "conn"
+        mock_connect.assert_awaited_once_with("test-host")
+        mock_run.assert_not_awaited()
+
+    async def test_paramiko_waits_run_on_event_loop(self):
+        """Test the paramiko launch and quick wait do not wait on a worker"""
+        from mcp_ssh.server import _ssh_call
+        from mcp_ssh.ssh import wait_for_process
+
+        process = make_process()
+        mock_wait = AsyncMock(return_value=True)
+        with (
+            patch.dict(
+                "mcp_ssh.server._PARAMIKO_COROUTINES", {wait_for_process: mock_wait}
+            ),
+            patch("mcp_ssh.server.run_blocking", new=AsyncMock()) as mock_run,
+        ):
+            assert await _ssh_call(
+                "test-host", wait_for_process, "client", process, 5, 100
+            )
+
+        mock_wait.assert_awaited_once_with("test-host", "client", process, 5, 100)
+        mock_run.assert_not_awaited()
+
+    async def test_every_operation_has_a_coroutine(self):
+        """Test each mapped async_engine coroutine exists"""
+        from mcp_ssh.server import _ASYNC_OPERATIONS, _PARAMIKO_COROUTINES
+
+        for name in _ASYNC_OPERATIONS.values():
+            assert inspect.iscoroutinefunction(getattr(async_engine, name)), name
+        for coroutine in _PARAMIKO_COROUTINES.values():
+            assert inspect.iscoroutinefunction(coroutine), coroutine
+
+    async def test_unmapped_function_runs_on_worker(self):
+        """Test functions without a coroutine keep the worker pool"""
+        from mcp_ssh.server import _ssh_call
+
+        def probe(host):
+            return host
+
+        with (
+            patch("mcp_ssh.async_engine.use_async_engine", return_value=True),
+            patch("mcp_ssh.server.run_blocking", new=AsyncMock()) as mock_run,
+        ):
+            await _ssh_call("test-host", probe, "test-host")
+
+        mock_run.assert_awaited_once_with("test-host", probe, "test-host")
+
+
+@pytest.mark.asyncio
+class TestAsyncOperations:
+    """Test asyncssh implementations of the SSH operations"""
+
+    async def test_execute_ssh_command(self):
+        """Test command output and exit code are decoded"""
+        conn = MagicMock()
+        conn.run = AsyncMock(return_value=make_result("output", "warn", 3))
+
+        stdout, stderr, exit_code = await async_engine.execute_ssh_command(conn, "ls")
+
+        assert (stdout, stderr, exit_code) == ("output", "warn", 3)
+
+    async def test_execute_ssh_command_error(self):
+        """Test connection errors are returned, not raised"""
+        conn = MagicMock()
+        conn.run = AsyncMock(side_effect=OSError("connection lost"))
+
+        stdout, stderr, exit_code = await async_engine.execute_ssh_command(conn, "ls")
+
+        assert stdout is None
+        assert "connection lost" in stderr
+        assert exit_code is None
+
+    async def test_execute_command_background_returns_pid(self):
+        """Test the PID printed by the wrapper is returned"""
+        conn = MagicMock()
+        conn.run = AsyncMock(return_value=make_result("4321\n"))
+
+        pid = await async_engine.execute_command_background(
+            conn, "sleep 1", "/tmp/out", "/tmp/err"
+        )
+
+        assert pid == 4321
+
+    async def test_execute_command_background_bad_pid(self):
+        """Test an unparseable PID raises RuntimeError"""
+        conn = MagicMock()
+        conn.run = AsyncMock(return_value=make_result("", "nohup: failed"))
+
+        with pytest.raises(RuntimeError, match="Failed to get PID"):
+            await async_engine.execute_command_background(
+                conn, "sleep 1", "/tmp/out", "/tmp/err"
+            )
+
+    async def test_wait_for_process(self):
+        """Test the remote wait loop result is reported"""
+        conn = MagicMock()
+        conn.run = AsyncMock(return_value=make_result("done\n"))
+
+        assert await async_engine.wait_for_process(conn, make_process(), 5, 100)
+        assert "kill -0" in conn.run.call_args.args[0]
+
+    async def test_get_process_output_completed(self):
+        """Test output of a finished process includes its exit code"""
+        conn = MagicMock()
+        conn.run = AsyncMock(return_value=make_result("STOPPED 0 5 0 5 0\nhello"))
+
+        result = await async_engine.get_process_output(conn, make_process(), 100)
+
+        assert result == ("completed", "hello", "", 0, 5, 5)
+        conn.run.assert_awaited_once()
+
+    async def test_get_output_chunk(self):
+        """Test chunks are read at offsets on one kept-open SFTP file"""
+        remote_file = MagicMock()
+        remote_file.stat = AsyncMock(return_value=SimpleNamespace(size=10))
+        remote_file.read = AsyncMock(side_effect=[b"chunk", b"page2"])
+        remote_file.close = AsyncMock()
+        sftp = MagicMock()
+        sftp.open = AsyncMock(return_value=remote_file)
+        conn = MagicMock()
+        conn.start_sftp_client = AsyncMock(return_value=sftp)
+
+        chunk, has_more, next_byte = await async_engine.get_output_chunk(
+            conn, make_process(), 0, 5
+        )
+        assert chunk == "chunk"
+        assert has_more is True
+        assert next_byte == 5
+
+        chunk, has_more, next_byte = await async_engine.get_output_chunk(
+            conn, make_process(), 5, 10
+        )
+        assert chunk == "page2"
+        assert has_more is False
+        assert next_byte == 10
+        assert remote_file.read.await_args.args == (5, 5)
+        conn.start_sftp_client.assert_awaited_once()
+        sftp.open.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+class TestAsyncConnections:
+    """Test connection sharing in the asyncssh engine"""
+
+    async def test_connection_shared_between_callers(self):
+        """Test concurrent callers get the same connection"""
+        conn = MagicMock()
+        conn.is_closed.return_value = False
+
+        with patch(
+            "mcp_ssh.async_engine._connect_from_config", new=AsyncMock()
+        ) as mock_connect:
+            mock_connect.return_value = conn
+            first = await async_engine.get_ssh_client_from_config("shared-host")
+            second = await async_engine.get_ssh_client_from_config("shared-host")
+
+        assert first is second is conn
+        mock_connect.assert_awaited_once()
+
+        await async_engine.release_ssh_client("shared-host", first)
+        conn.close.assert_not_called()
+        await async_engine.release_ssh_client("shared-host", second)
+
+    async def test_last_release_closes_without_reuse(self):
+        """Test the connection closes when its last user releases it"""
+        conn = MagicMock()
+        conn.is_closed.return_value = False
+
+        with (
+            patch("mcp_ssh.async_engine.SSH_CONNECTION_REUSE", False),
+            patch(
+                "mcp_ssh.async_engine._connect_from_config",
+                new=AsyncMock(return_value=conn),
+            ),
+        ):
+            client = await async_engine.get_ssh_client_from_config("closing-host")
+            await async_engine.release_ssh_client("closing-host", client)
+
+        conn.close.assert_called_once()
+
+    async def test_invalid_server_alive_settings_ignored(self):
+        """Test a bad ServerAliveInterval does not abort the connect"""
+        pytest.importorskip("asyncssh")  # Only in the async extra
+        host_config = {
+            "hostname": "10.0.0.1",
+            "serveraliveinterval": "often",
+            "identityfile": "/nonexistent/key",
+        }
+
+        with (
+            patch("mcp_ssh.async_engine.resolve_host_config", return_value=host_config),
+            patch("mcp_ssh.async_engine.SSH_AUTH_MODE", "auto"),
+            patch.dict("os.environ", {"SSH_AUTH_SOCK": "/tmp/agent.sock"}),
+            patch(
+                "mcp_ssh.async_engine.asyncssh.connect", new=AsyncMock()
+            ) as mock_connect,
+        ):
+            mock_connect.return_value = "conn"
+            conn = await async_engine._connect_from_config("bad-alive-host")
+
+        assert conn == "conn"
+        options = mock_connect.await_args.kwargs
+        assert options["keepalive_interval"] == 0
+        assert options["keepalive_count_max"] == 3
@@ -0,0 +1,153 @@
+"""
+Tests for draining channel output while commands run
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import paramiko
+
+from mcp_ssh.ssh import execute_ssh_command
+from mcp_ssh.streams import BoundedBuffer, drain_channel
+from tests.conftest import feed_stderr
+
+
+def _run_remote(channel, chunks, exit_status=0, delay=0.001):
+    """Deliver (stream, data) chunks, EOF and an exit status like a transport"""
+
+    def deliver():
+        for stream, data in chunks:
+            time.sleep(delay)
+            if stream == "stderr":
+                feed_stderr(channel, data)
+            else:
+                channel._feed(data)
+        channel._handle_eof(None)
+        channel.exit_status = exit_status
+        channel.status_event.set()
+
+    thread = threading.Thread(target=deliver)
+    thread.start()
+    return thread
+
+
+class TestBoundedBuffer:
+    """Test output buffers respect their limit"""
+
+    def test_unlimited(self):
+        """Test a zero limit keeps all data"""
+        buffer = BoundedBuffer()
+        buffer.write(b"a" * 10)
+        buffer.write(b"b" * 10)
+
+        assert buffer.getvalue() == b"a" * 10 + b"b" * 10
+        assert not buffer.truncated
+
+    def test_limit_drops_and_counts(self):
+        """Test data past the limit is dropped and counted"""
+        buffer = BoundedBuffer(limit=8)
+        buffer.write(b"12345")
+        buffer.write(b"67890")
+        buffer.write(b"abc")
+
+        assert buffer.getvalue() == b"12345678"
+        assert buffer.dropped == 5
+        assert buffer.truncated
+
+    def test_text_replaces_cut_character(self):
+        """Test a multibyte character split by the limit does not raise"""
+        buffer = BoundedBuffer(limit=4)
+        buffer.write("abcé".encode())
+
+        assert buffer.text() == "abc�"
+
+
+class TestDrainChannel:
+    """Test both streams are read while the command runs"""
+
+    def test_interleaved_streams(self):
+        """Test stdout and stderr arriving in turns are both collected"""
+        channel = paramiko.Channel(1)
+        chunks = [("stdout", b"out1 "), ("stderr", b"err1 "), ("stdout", b"out2")]
+        thread = _run_remote(channel, chunks, exit_status=3)
+
+        stdout, stderr, exited = drain_channel(channel, 5)
+        thread.join()
+
+        assert stdout.getvalue() == b"out1 out2"
+        assert stderr.getvalue() == b"err1 "
+        assert exited
+        assert channel.recv_exit_status() == 3
+
+    def test_output_larger_than_window(self):
+        """Test output beyond the default 2 MB window is read as it arrives"""
+        channel = paramiko.Channel(1)
+        chunk = b"x" * 65536
+        thread = _run_remote(channel, [("stdout", chunk)] * 48, delay=0)
+
+        stdout, stderr, exited = drain_channel(channel, 5)
+        thread.join()
+
+        assert len(stdout.getvalue()) == 48 * 65536
+        assert exited
+
+    def test_cap_bounds_memory(self):
+        """Test each stream keeps at most max_bytes"""
+        channel = paramiko.Channel(1)
+        chunks = [("stdout", b"o" * 1000), ("stderr", b"e" * 1000)] * 5
+        thread = _run_remote(channel, chunks)
+
+        stdout, stderr, exited = drain_channel(channel, 5, max_bytes=1500)
+        thread.join()
+
+        assert len(stdout.getvalue()) == 1500
+        assert stdout.dropped == 3500
+        assert len(stderr.getvalue()) == 1500
+        assert exited
+
+    def test_timeout_returns_partial_output(self):
+        """Test a command still running at the timeout returns what it printed"""
+        channel = paramiko.Channel(1)
+        channel._feed(b"partial")
+
+        stdout, stderr, exited = drain_channel(channel, 0.05)
+
+        assert stdout.getvalue() == b"partial"
+        assert not exited
+
+
+class TestExecuteStreams:
+    """Test execute_ssh_command reports drained output"""
+
+    def _client(self, channel):
+        client = MagicMock()
+        stdout = MagicMock()
+        stdout.channel = channel
+        client.exec_command.return_value = (MagicMock(), stdout, MagicMock())
+        return client
+
+    def test_truncated_output_marked(self, fake_channel, monkeypatch):
+        """Test capped output says how many bytes were left out"""
+        monkeypatch.setattr("mcp_ssh.ssh.SSH_MAX_COMMAND_OUTPUT", 4)
+        client = self._client(fake_channel(b"0123456789"))
+
+        stdout, stderr, exit_code = execute_ssh_command(client, "seq 10")
+
+        assert stdout == "0123\n[output truncated: 6 more bytes]"
+        assert exit_code == 0
+
+    def test_timeout_closes_channel(self, monkeypatch):
+        """Test a command that outlives the read timeout has no exit code"""
+        monkeypatch.setattr("mcp_ssh.ssh.SSH_READ_TIMEOUT", 0.05)
+        channel = paramiko.Channel(1)
+        channel._feed(b"started\n")
+        channel.close = MagicMock()
+
+        stdout, stderr, exit_code = execute_ssh_command(
+            self._client(channel), "sleep 60"
+        )
+
+        assert stdout == "started\n"
+        assert exit_code is None
+        channel.close.assert_called_once()
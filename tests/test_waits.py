@@ -0,0 +1,90 @@
+"""
+Tests for event-driven channel waits
+"""
+
+import threading
+import time
+
+import paramiko
+import pytest
+
+from mcp_ssh.waits import wait_for_exit_status, wait_for_exit_status_async
+
+
+def _exit_later(channel, delay, status=0):
+    """Deliver an exit status from another thread, as the transport does"""
+
+    def deliver():
+        time.sleep(delay)
+        channel.exit_status = status
+        channel.status_event.set()
+
+    thread = threading.Thread(target=deliver)
+    thread.start()
+    return thread
+
+
+class TestWaitForExitStatus:
+    """Test the blocking wait"""
+
+    def test_wakes_on_exit_status(self):
+        """Test the wait returns as soon as the exit status arrives"""
+        channel = paramiko.Channel(1)
+        thread = _exit_later(channel, 0.02)
+
+        start = time.monotonic()
+        assert wait_for_exit_status(channel, 5) is True
+        assert time.monotonic() - start < 1
+        thread.join()
+
+    def test_timeout(self):
+        """Test a command that does not exit in time reports not ready"""
+        channel = paramiko.Channel(1)
+
+        assert wait_for_exit_status(channel, 0.01) is False
+
+    def test_already_exited(self):
+        """Test no wait when the exit status is already there"""
+        channel = paramiko.Channel(1)
+        channel.exit_status = 3
+        channel.status_event.set()
+
+        assert wait_for_exit_status(channel, None) is True
+
+
+@pytest.mark.asyncio
+class TestWaitForExitStatusAsync:
+    """Test the coroutine wait"""
+
+    async def test_wakes_on_exit_status(self):
+        """Test the coroutine resumes when the transport sets the status"""
+        channel = paramiko.Channel(1)
+        thread = _exit_later(channel, 0.02)
+
+        start = time.monotonic()
+        assert await wait_for_exit_status_async(channel, 5) is True
+        assert time.monotonic() - start < 1
+        thread.join()
+
+    async def test_timeout(self):
+        """Test the coroutine gives up after timeout"""
+        channel = paramiko.Channel(1)
+
+        assert await wait_for_exit_status_async(channel, 0.01) is False
+        assert not channel.status_event.callbacks
+
+    async def test_status_set_before_wait(self):
+        """Test an exit status recorded before the event swap is not missed"""
+        channel = paramiko.Channel(1)
+        channel.exit_status = 0  # Event not yet set by the transport
+
+        assert await wait_for_exit_status_async(channel, 5) is True
+
+    async def test_blocking_wait_sees_swapped_event(self):
+        """Test the blocking wait still works after an async wait timed out"""
+        channel = paramiko.Channel(1)
+        await wait_for_exit_status_async(channel, 0.01)
+        thread = _exit_later(channel, 0.02)
+
+        assert wait_for_exit_status(channel, 5) is True
+        thread.join()